@@ -0,0 +1,135 @@
+// src/components/inout/LivePreview.jsx
+
+import React, { useEffect, useState } from "react";
+import axiosClient from "../../api/axiosClient";
+
+// Chiều rộng preview xin server (server làm tròn theo STREAM_PREVIEW_WIDTHS)
+const PREVIEW_WIDTH = 640;
+// Mất kết nối WebSocket -> thử lại sau N ms
+const RECONNECT_MS = 2000;
+
+// Camera vào đầu tiên (giống /streaming/capture_in), không có thì camera đầu tiên
+const pickCamera = (cameras) =>
+  cameras.find((c) => c.role === "entry") || cameras[0] || null;
+
+/**
+ * Livestream camera ở chế độ passthrough (JPEG gốc của camera, server không vẽ
+ * lại từng frame) + khung biển số do trình duyệt tự vẽ từ kênh riêng
+ * WS /streaming/cameras/{id}/detections/ws.
+ * Box theo toạ độ frame gốc (width x height trong message): SVG dùng cùng
+ * viewBox + "slice" nên khớp với ảnh objectFit "cover" ở mọi cỡ hiển thị.
+ */
+export default function LivePreview({ backendUrl }) {
+  const [camera, setCamera] = useState(null);
+  const [detections, setDetections] = useState(null);
+
+  // 1) chọn camera
+  useEffect(() => {
+    let cancelled = false;
+    axiosClient
+      .get("/streaming/cameras")
+      .then((res) => {
+        if (!cancelled) setCamera(pickCamera(res?.data ?? []));
+      })
+      .catch((err) => console.error("Không tải được danh sách camera:", err));
+    return () => {
+      cancelled = true;
+    };
+  }, []);
+
+  // 2) kênh khung biển số, tự nối lại khi server restart / mất mạng
+  useEffect(() => {
+    if (!camera) return undefined;
+    const wsUrl = `${backendUrl.replace(/^http/, "ws")}/streaming/cameras/${encodeURIComponent(
+      camera.id
+    )}/detections/ws`;
+    let ws = null;
+    let timer = null;
+    let closed = false;
+
+    const connect = () => {
+      ws = new WebSocket(wsUrl);
+      ws.onmessage = (event) => {
+        try {
+          setDetections(JSON.parse(event.data));
+        } catch (err) {
+          console.error("Message khung biển số lỗi:", err);
+        }
+      };
+      ws.onclose = () => {
+        setDetections(null);
+        if (!closed) timer = setTimeout(connect, RECONNECT_MS);
+      };
+    };
+    connect();
+
+    return () => {
+      closed = true;
+      clearTimeout(timer);
+      if (ws) ws.close();
+    };
+  }, [backendUrl, camera]);
+
+  if (!camera) return null;
+
+  const streamUrl = `${backendUrl}/streaming/cameras/${encodeURIComponent(
+    camera.id
+  )}/stream?mode=passthrough&width=${PREVIEW_WIDTH}`;
+  const plates = detections?.width ? detections.plates || [] : [];
+
+  return (
+    <div style={{ position: "relative", width: "100%", height: "100%" }}>
+      <img
+        id="livestream_img"
+        src={streamUrl}
+        alt="Camera livestream"
+        style={{
+          width: "100%",
+          height: "100%",
+          objectFit: "cover",
+          display: "block",
+        }}
+      />
+      {plates.length > 0 && (
+        <svg
+          viewBox={`0 0 ${detections.width} ${detections.height}`}
+          preserveAspectRatio="xMidYMid slice"
+          style={{ position: "absolute", inset: 0, width: "100%", height: "100%", pointerEvents: "none" }}
+        >
+          {plates.map((p, i) => {
+            const [x1, y1, x2, y2] = p.box;
+            const color = p.stable ? "#22c55e" : "#facc15";
+            const fontSize = Math.max(14, detections.height / 30);
+            return (
+              <g key={p.track_id ?? i}>
+                <rect
+                  x={x1}
+                  y={y1}
+                  width={x2 - x1}
+                  height={y2 - y1}
+                  fill="none"
+                  stroke={color}
+                  strokeWidth={Math.max(2, detections.width / 400)}
+                />
+                {p.plate_number && (
+                  <text
+                    x={x1}
+                    y={Math.max(fontSize, y1 - 4)}
+                    fill={color}
+                    fontSize={fontSize}
+                    fontWeight="700"
+                    stroke="#000"
+                    strokeWidth={fontSize / 12}
+                    paintOrder="stroke"
+                  >
+                    {p.plate_number}
+                  </text>
+                )}
+              </g>
+            );
+          })}
+        </svg>
+      )}
+    </div>
+  );
+}
@@ -10,6 +10,7 @@ import AlertMessages from "../components/inout/AlertMessages";
 
 import EntryForm from "../components/inout/EntryForm";
 import ExitForm from "../components/inout/ExitForm";
+import LivePreview from "../components/inout/LivePreview";
 import { VEHICLE_TYPES } from "../constants/vehicleTypes";
 import { formatTime } from "../components/common/deps";
 import { renderTemplate } from "../api/settingsTemplates";
@@ -70,12 +71,9 @@ const formatDuration = (entryIso, exitIso) => {
   return `${h} giờ ${m} phút`;
 };
 
-// URL backend FastAPI
+// URL backend FastAPI (livestream passthrough + kênh khung biển số)
 const BACKEND_URL = "http://localhost:8000";
 
-// URL livestream
-const STREAM_URL = `${BACKEND_URL}/streaming/capture_in`;
-
 export default function InOut() {
   const [areas, setAreas] = useState([]);
   const [activeLogs, setActiveLogs] = useState([]);
@@ -432,17 +430,7 @@ export default function InOut() {
               alignItems: "center",
             }}
           >
-            <img
-              id="livestream_img"
-              // src={STREAM_URL}
-              alt="Camera livestream"
-              style={{
-                width: "100%",
-                height: "100%",
-                objectFit: "cover",
-                display: "block",
-              }}
-            />
+            <LivePreview backendUrl={BACKEND_URL} />
           </div>
 
           <p
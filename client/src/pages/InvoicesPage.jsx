@@ -109,6 +109,9 @@ const buildImageSrc = (raw) => {
   // đã là data url
   if (s.startsWith("data:image")) return s;
 
+  // ảnh trong kho ảnh của server: "/images/<key>" (cần token -> PlateImage tải bằng axiosClient)
+  if (s.startsWith("/images/")) return s;
+
   // Nếu lỡ trả về dạng b'xxxxx' hoặc "xxxxx"
   let cleaned = s.replace(/^b['"]|['"]$/g, "");
   cleaned = cleaned.replace(/\s/g, "");
@@ -119,6 +122,39 @@ const buildImageSrc = (raw) => {
 
 
 
+// Ảnh biển số: data URL hiển thị thẳng; ảnh kho "/images/<key>" cần header
+// Authorization nên tải bằng axiosClient rồi hiển thị qua object URL
+const PlateImage = ({ src, alt, style }) => {
+  const [url, setUrl] = useState(src && src.startsWith("/images/") ? null : src);
+
+  useEffect(() => {
+    if (!src || !src.startsWith("/images/")) {
+      setUrl(src);
+      return undefined;
+    }
+    let objectUrl = null;
+    let cancelled = false;
+    setUrl(null);
+    axiosClient
+      .get(src, { responseType: "blob" })
+      .then((res) => {
+        if (cancelled) return;
+        objectUrl = URL.createObjectURL(res.data);
+        setUrl(objectUrl);
+      })
+      .catch((err) => console.error("Không tải được ảnh biển số:", err));
+    return () => {
+      cancelled = true;
+      if (objectUrl) URL.revokeObjectURL(objectUrl);
+    };
+  }, [src]);
+
+  if (!url) return <div style={{ fontSize: 13, color: "#6b7280" }}>Đang tải ảnh...</div>;
+  return <img src={url} alt={alt} style={style} />;
+};
+
+
+
 // -----------------------------
 // Component
 // -----------------------------
@@ -536,7 +572,7 @@ export default function InvoicesPage() {
                   <div style={{ flex: "1 1 48%", minWidth: 200 }}>
                     <div style={{ fontSize: 13, marginBottom: 6, fontWeight: 600 }}>Ảnh lúc vào</div>
                     <div style={{ borderRadius: 8, border: "1px solid #e5e7eb", padding: 6, background: "#f9fafb" }}>
-                      <img
+                      <PlateImage
                         src={buildImageSrc(selectedInvoice.entry_plate_image)}
                         alt="Biển số lúc vào"
                         style={{ width: "100%", height: "auto", display: "block", borderRadius: 6, objectFit: "contain" }}
@@ -554,7 +590,7 @@ export default function InvoicesPage() {
                   <div style={{ flex: "1 1 48%", minWidth: 200 }}>
                     <div style={{ fontSize: 13, marginBottom: 6, fontWeight: 600 }}>Ảnh lúc ra</div>
                     <div style={{ borderRadius: 8, border: "1px solid #e5e7eb", padding: 6, background: "#f9fafb" }}>
-                      <img
+                      <PlateImage
                         src={buildImageSrc(selectedInvoice.exit_plate_image)}
                         alt="Biển số lúc ra"
                         style={{ width: "100%", height: "auto", display: "block", borderRadius: 6, objectFit: "contain" }}
@@ -0,0 +1,43 @@
+# app/images/config.py
+import os
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _parse_widths(value: str) -> tuple[int, ...]:
+    widths = set()
+    for part in value.split(","):
+        try:
+            width = int(part)
+        except ValueError:
+            continue
+        if width > 0:
+            widths.add(width)
+    return tuple(sorted(widths))
+
+
+# Thư mục lưu ảnh biển số (tương đối với thư mục chạy server)
+IMAGE_DIR = os.getenv("IMAGE_DIR", "images")
+
+# Chiều rộng các bản thu nhỏ tạo sẵn cho mỗi ảnh (GET /images/{key}?w=...)
+IMAGE_THUMB_WIDTHS = _parse_widths(os.getenv("IMAGE_THUMB_WIDTHS", "160,480"))
+
+# Số thread tạo ảnh thu nhỏ (ngoài request)
+IMAGE_THUMB_WORKERS = max(1, _env_int("IMAGE_THUMB_WORKERS", 2))
+
+# Chất lượng JPEG của ảnh thu nhỏ
+IMAGE_THUMB_QUALITY = min(100, max(1, _env_int("IMAGE_THUMB_QUALITY", 80)))
+
+# Dung lượng tối đa 1 ảnh (MB), lớn hơn thì không lưu
+IMAGE_MAX_MB = max(1, _env_int("IMAGE_MAX_MB", 5))
+
+# Lúc khởi động: chuyển ảnh base64 còn nằm trong bảng logs ra kho ảnh (ở nền)
+IMAGE_BACKFILL_ON_STARTUP = os.getenv("IMAGE_BACKFILL_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+
+# Số dòng logs mỗi lô khi chuyển (mỗi lô 1 commit)
+IMAGE_BACKFILL_BATCH = max(1, _env_int("IMAGE_BACKFILL_BATCH", 200))
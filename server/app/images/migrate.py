@@ -0,0 +1,141 @@
+# app/images/migrate.py
+"""
+Chuyển ảnh biển số base64 trong bảng logs (entry_plate_image / exit_plate_image)
+sang kho ảnh (store.py), chỉ giữ lại key.
+
+- ensure_columns(): thêm cột entry_image_key / exit_image_key cho DB cũ
+  (create_all không thêm cột vào bảng đã có).
+- backfill(): duyệt logs theo id từng lô: đọc lô, ghi ảnh ra kho (ngoài mọi
+  transaction DB), rồi ghi key + xoá base64 cũ trong 1 transaction ngắn -> không
+  giữ lock ghi SQLite trong lúc ghi file, /inout vẫn ghi lượt được khi đang chuyển.
+  Chạy lại an toàn (dòng đã chuyển không còn base64); ảnh hỏng được giữ nguyên để xem lại.
+
+Tự chạy ở nền lúc khởi động (IMAGE_BACKFILL_ON_STARTUP) hoặc chạy tay từ thư mục server/:
+    python -m app.images.migrate --batch 500 --vacuum
+"""
+import argparse
+import threading
+import time
+
+from sqlalchemy import inspect, or_, text
+
+from app.db import SessionLocal, engine
+from app.models import Log
+
+from . import config
+from .store import image_store
+
+KEY_COLUMNS = ("entry_image_key", "exit_image_key")
+# cột base64 cũ -> cột key mới
+IMAGE_COLUMNS = {"entry_plate_image": "entry_image_key", "exit_plate_image": "exit_image_key"}
+
+
+def ensure_columns(bind=engine) -> list[str]:
+    """Thêm cột key còn thiếu vào bảng logs, trả về các cột đã thêm."""
+    existing = {c["name"] for c in inspect(bind).get_columns("logs")}
+    added = [name for name in KEY_COLUMNS if name not in existing]
+    if added:
+        with bind.begin() as conn:
+            for name in added:
+                conn.execute(text(f"ALTER TABLE logs ADD COLUMN {name} VARCHAR(80)"))
+        print("✅ Đã thêm cột logs:", ", ".join(added))
+    return added
+
+
+def backfill(batch_size: int = config.IMAGE_BACKFILL_BATCH, session_factory=SessionLocal) -> dict:
+    """Chuyển toàn bộ ảnh base64 còn lại, trả về số dòng / ảnh đã chuyển."""
+    report = {"rows": 0, "images": 0, "invalid": 0, "batches": 0}
+    last_id = 0
+    t0 = time.perf_counter()
+    while True:
+        # 1) đọc 1 lô, đóng session ngay (không giữ transaction đọc trong lúc ghi file)
+        db = session_factory()
+        try:
+            # chỉ đọc id + 2 cột ảnh của 1 lô, không load cả Log
+            rows = (
+                db.query(Log.id, Log.entry_plate_image, Log.exit_plate_image)
+                .filter(Log.id > last_id)
+                .filter(or_(Log.entry_plate_image.isnot(None), Log.exit_plate_image.isnot(None)))
+                .order_by(Log.id)
+                .limit(batch_size)
+                .all()
+            )
+        finally:
+            db.close()
+        if not rows:
+            break
+
+        # 2) ghi ảnh ra kho, chưa đụng tới DB
+        updates = []
+        for row in rows:
+            values = {}
+            for column, key_column in IMAGE_COLUMNS.items():
+                raw = getattr(row, column)
+                if raw is None:
+                    continue
+                key = None
+                if raw.strip():
+                    key = image_store.put_base64(raw)
+                    if key is None:
+                        # ảnh hỏng: giữ base64 để xem lại (lô sau đi tiếp theo id)
+                        report["invalid"] += 1
+                        continue
+                    report["images"] += 1
+                values[key_column] = key
+                values[column] = None
+            if values:
+                updates.append((row.id, values))
+
+        # 3) ghi key: 1 transaction ngắn cho cả lô (file đã có sẵn trên đĩa)
+        if updates:
+            db = session_factory()
+            try:
+                for log_id, values in updates:
+                    db.query(Log).filter(Log.id == log_id).update(values, synchronize_session=False)
+                db.commit()
+            finally:
+                db.close()
+        report["rows"] += len(updates)
+        last_id = rows[-1].id
+        report["batches"] += 1
+
+    report["seconds"] = round(time.perf_counter() - t0, 2)
+    return report
+
+
+def vacuum(bind=engine):
+    """Thu hồi dung lượng file SQLite sau khi xoá base64 (khoá DB trong lúc chạy)."""
+    with bind.connect() as conn:
+        conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("VACUUM"))
+
+
+def _backfill_in_background():
+    try:
+        report = backfill()
+        if report["rows"] or report["invalid"]:
+            print("✅ Đã chuyển ảnh biển số sang kho ảnh:", report)
+    except Exception as e:
+        print("❌ Lỗi chuyển ảnh biển số sang kho ảnh:", e)
+
+
+def start_backfill():
+    """Chuyển ảnh cũ ở nền (IMAGE_BACKFILL_ON_STARTUP), không chặn startup."""
+    if config.IMAGE_BACKFILL_ON_STARTUP:
+        threading.Thread(target=_backfill_in_background, name="image-backfill", daemon=True).start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch", type=int, default=config.IMAGE_BACKFILL_BATCH, help="số dòng logs mỗi lô")
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM SQLite sau khi chuyển")
+    args = parser.parse_args()
+
+    ensure_columns()
+    print(backfill(max(1, args.batch)))
+    if args.vacuum:
+        vacuum()
+        print("✅ VACUUM xong")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# app/images/routes.py
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import FileResponse, Response
+
+from app.permission.guards import require_page
+from . import config
+from .store import image_store, is_key
+
+# ảnh biển số chỉ xem ở trang hóa đơn -> cùng quyền với /invoices
+router = APIRouter(prefix="/images", tags=["Images"], dependencies=[Depends(require_page("/dashboard/invoices"))])
+
+# nội dung theo key không bao giờ đổi -> trình duyệt giữ vĩnh viễn; ảnh cần đăng nhập
+# nên chỉ cache riêng (private), proxy dùng chung không được giữ
+CACHE_CONTROL = "private, max-age=31536000, immutable"
+MEDIA_TYPES = {"jpg": "image/jpeg", "png": "image/png", "webp": "image/webp"}
+
+
+def _etag(key: str, width: int | None = None) -> str:
+    digest = key.rsplit(".", 1)[0]
+    return f'"{digest}-w{width}"' if width else f'"{digest}"'
+
+
+def _variant_width(w: int | None) -> int | None:
+    """Bản thu nhỏ nhỏ nhất vẫn rộng >= w (chỉ các cỡ cấu hình sẵn); không có -> ảnh gốc."""
+    if not w:
+        return None
+    return next((width for width in config.IMAGE_THUMB_WIDTHS if width >= w), None)
+
+
+@router.get("/{key}")
+def get_image(key: str, request: Request, w: int | None = None):
+    """
+    Ảnh biển số theo key (lưu trong logs). w: chiều rộng mong muốn -> trả bản
+    thu nhỏ gần nhất (IMAGE_THUMB_WIDTHS). Key là sha256 của ảnh nên không đoán được.
+    """
+    if not is_key(key) or not image_store.path(key).exists():
+        raise HTTPException(status_code=404, detail="Không có ảnh")
+
+    width = _variant_width(w)
+    etag = _etag(key, width)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    # trình duyệt đã có đúng bản này -> không gửi lại
+    if request.headers.get("if-none-match") in (etag, f"W/{etag}", "*"):
+        return Response(status_code=304, headers=headers)
+
+    path = image_store.thumbnail(key, width) if width else None
+    if path is None:
+        # ảnh gốc (không cần / không tạo được bản thu nhỏ)
+        path = image_store.path(key)
+        headers["ETag"] = _etag(key)
+        media_type = MEDIA_TYPES[key.rsplit(".", 1)[1]]
+    else:
+        media_type = "image/jpeg"
+    return FileResponse(path, media_type=media_type, headers=headers)
@@ -0,0 +1,200 @@
+# app/images/store.py
+"""
+Kho ảnh biển số đặt tên theo nội dung (content-addressed).
+
+Ảnh được lưu 1 lần theo sha256 của bytes: key = "<sha256>.<jpg|png|webp>",
+file nằm ở <IMAGE_DIR>/<2 ký tự đầu>/<2 ký tự kế>/<key> (chia thư mục để mỗi
+thư mục không quá nhiều file). Bảng logs chỉ giữ key, không giữ base64 -> mọi
+SELECT trên logs (báo cáo, hóa đơn, lượt đang gửi) không kéo theo ảnh.
+
+Cùng 1 ảnh gửi lại -> cùng key, không ghi thêm. Ảnh thu nhỏ (IMAGE_THUMB_WIDTHS)
+được tạo ở thread pool sau khi lưu ảnh gốc: <key bỏ đuôi>.w<rộng>.jpg.
+
+Ảnh gốc luôn được ghi xong trước khi put() trả key (lượt vào / ra chỉ commit
+key của file đã có); chỉ ảnh thu nhỏ chạy ở nền.
+Nội dung theo key không bao giờ đổi -> trả về với ETag + cache vĩnh viễn.
+"""
+import base64
+import binascii
+import hashlib
+import os
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from . import config
+
+_KEY = re.compile(r"^[0-9a-f]{64}\.(jpg|png|webp)$")
+_DATA_URL = re.compile(r"^data:image/[\w.+-]+;base64,")
+
+
+def image_ext(data: bytes) -> str | None:
+    """Loại ảnh theo magic bytes; không phải JPEG / PNG / WebP -> None."""
+    if data[:3] == b"\xff\xd8\xff":
+        return "jpg"
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return "png"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def decode_base64(value: str) -> bytes:
+    """Base64 thuần / data URL / dạng b'...' (ảnh cũ trong logs) -> bytes. Sai -> ValueError."""
+    s = _DATA_URL.sub("", value.strip())
+    s = re.sub(r"^b['\"]|['\"]$", "", s)
+    s = re.sub(r"\s", "", s)
+    try:
+        return base64.b64decode(s, validate=True)
+    except binascii.Error as e:
+        raise ValueError(f"Base64 không hợp lệ: {e}")
+
+
+def is_key(key: str) -> bool:
+    return bool(_KEY.match(key))
+
+
+def image_url(key: str | None) -> str | None:
+    """Đường dẫn ảnh cho frontend (GET /images/{key}), None nếu không có ảnh."""
+    return f"/images/{key}" if key else None
+
+
+class BlobStore:
+    def __init__(self, root: str, thumb_widths: tuple[int, ...] = (), workers: int = 2, quality: int = 80):
+        """
+        root: thư mục gốc của kho ảnh
+        thumb_widths: chiều rộng các bản thu nhỏ tạo sẵn
+        workers: số thread tạo ảnh thu nhỏ
+        quality: chất lượng JPEG ảnh thu nhỏ
+        """
+        self.root = Path(root)
+        self.thumb_widths = thumb_widths
+        self.workers = workers
+        self.quality = quality
+
+        self._lock = threading.Lock()
+        self._pool: ThreadPoolExecutor | None = None
+        # ảnh thu nhỏ đang tạo: mỗi (key, rộng) chỉ 1 lần dù nhiều request cùng chờ
+        self._pending: dict[tuple[str, int], Future] = {}
+
+        self.stored = 0
+        self.deduplicated = 0
+        self.thumbnails = 0
+
+    # ---------- đường dẫn ----------
+
+    def path(self, key: str, width: int | None = None) -> Path:
+        name = key if width is None else f"{key.rsplit('.', 1)[0]}.w{width}.jpg"
+        return self.root / key[:2] / key[2:4] / name
+
+    # ---------- ghi ----------
+
+    def put(self, data: bytes) -> str:
+        """Lưu bytes ảnh, trả về key. Không phải ảnh / quá lớn -> ValueError, lỗi ghi -> OSError."""
+        ext = image_ext(data)
+        if ext is None:
+            raise ValueError("Không phải ảnh JPEG / PNG / WebP")
+        if len(data) > config.IMAGE_MAX_MB * 1024 * 1024:
+            raise ValueError("Ảnh quá lớn")
+
+        key = f"{hashlib.sha256(data).hexdigest()}.{ext}"
+        path = self.path(key)
+        if path.exists():
+            self.deduplicated += 1
+            return key
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _write_atomic(path, data)
+        self.stored += 1
+        for width in self.thumb_widths:
+            self._thumbnail_async(key, width)
+        return key
+
+    def put_base64(self, value: str | None) -> str | None:
+        """
+        Lưu ảnh base64 (ảnh cũ trong logs), trả về key. Rỗng / lỗi -> None (chỉ
+        báo lỗi). Lượt vào / ra dùng put(decode_base64(...)) để lỗi làm hỏng request.
+        """
+        if not value:
+            return None
+        try:
+            return self.put(decode_base64(value))
+        except (ValueError, OSError) as e:
+            print("❌ Không lưu được ảnh biển số:", e)
+            return None
+
+    # ---------- ảnh thu nhỏ ----------
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="image-thumb")
+            return self._pool
+
+    def _thumbnail_async(self, key: str, width: int) -> Future:
+        executor = self._executor()
+        with self._lock:
+            future = self._pending.get((key, width))
+            if future is not None:
+                return future
+            future = executor.submit(self._make_thumbnail, key, width)
+            self._pending[(key, width)] = future
+        future.add_done_callback(lambda _: self._pending.pop((key, width), None))
+        return future
+
+    def _make_thumbnail(self, key: str, width: int) -> Path | None:
+        target = self.path(key, width)
+        if target.exists():
+            return target
+        data = self.path(key).read_bytes()
+        image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            return None
+        h, w = image.shape[:2]
+        if w > width:
+            image = cv2.resize(image, (width, max(1, round(h * width / w))), interpolation=cv2.INTER_AREA)
+        ok, buffer = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            return None
+        _write_atomic(target, buffer.tobytes())
+        self.thumbnails += 1
+        return target
+
+    def thumbnail(self, key: str, width: int, timeout: float = 5.0) -> Path | None:
+        """Ảnh thu nhỏ rộng `width` (chưa có thì tạo ở pool rồi chờ). Lỗi -> None."""
+        target = self.path(key, width)
+        if target.exists():
+            return target
+        try:
+            return self._thumbnail_async(key, width).result(timeout)
+        except Exception as e:
+            print("❌ Không tạo được ảnh thu nhỏ:", key, width, e)
+            return None
+
+    def stats(self) -> dict:
+        return {
+            "root": str(self.root),
+            "stored": self.stored,
+            "deduplicated": self.deduplicated,
+            "thumbnails": self.thumbnails,
+            "pending_thumbnails": len(self._pending),
+        }
+
+
+def _write_atomic(path: Path, data: bytes):
+    # ghi file tạm rồi đổi tên: người đọc không bao giờ thấy file ghi dở
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+image_store = BlobStore(
+    config.IMAGE_DIR,
+    config.IMAGE_THUMB_WIDTHS,
+    config.IMAGE_THUMB_WORKERS,
+    config.IMAGE_THUMB_QUALITY,
+)
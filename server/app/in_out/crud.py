@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session, joinedload
 from fastapi import HTTPException
 
 from app.models import Vehicle, ParkingArea, ParkingSlot, Log, User
+from app.images.store import decode_base64, image_store
 
 
 # -------------------------
@@ -19,6 +20,23 @@ def get_or_create_vehicle(db: Session, plate: str, vehicle_type: str) -> Vehicle
     return vehicle
 
 
+def store_plate_image(value: str | None) -> str | None:
+    """
+    Lưu ảnh biển số base64 vào kho ảnh (ghi xong file mới trả key), gọi trước
+    db.commit() để log không bao giờ trỏ tới ảnh không có. Không có ảnh -> None;
+    ảnh hỏng -> 400, không ghi được -> 500 (lượt vào / ra không được ghi nhận).
+    """
+    if not value:
+        return None
+    try:
+        return image_store.put(decode_base64(value))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Ảnh biển số không hợp lệ: {e}")
+    except OSError as e:
+        print("❌ Không lưu được ảnh biển số:", e)
+        raise HTTPException(status_code=500, detail="Không lưu được ảnh biển số")
+
+
 def get_active_parking_log(db: Session, vehicle_id: int) -> Log | None:
     return (
         db.query(Log)
@@ -94,7 +112,7 @@ def create_entry_log(
         parking_area_id=area.id,
         parking_slot_id=slot.id if slot else None,
         entry_staff_id=current_user.id,
-        entry_plate_image=entry_plate_image_base64,
+        entry_image_key=store_plate_image(entry_plate_image_base64),
         entry_time=datetime.utcnow(),
     )
     db.add(log)
@@ -160,7 +178,8 @@ def exit_vehicle(
     # cập nhật log
     log.exit_time = exit_time
     log.exit_staff_id = current_user.id
-    log.exit_plate_image = exit_plate_image_base64
+    # ảnh ghi xong file trước khi commit key
+    log.exit_image_key = store_plate_image(exit_plate_image_base64)
 
     db.commit()
     db.refresh(log)
@@ -105,7 +105,8 @@ def vehicle_entry(
         parking_slot_id=slot.id,
         entry_staff_id=current_user.id,
         entry_time=datetime.utcnow(),
-        entry_plate_image=payload.entry_plate_image_base64,
+        # ảnh lưu vào kho ảnh (ghi xong file trước commit), logs chỉ giữ key
+        entry_image_key=crud.store_plate_image(payload.entry_plate_image_base64),
     )
     db.add(log)
 
@@ -118,6 +119,12 @@ def vehicle_entry(
     db.refresh(vehicle)
     db.refresh(area)
 
+    # 7) Clip camera quanh lúc xe vào (ghi ở nền, không chặn request).
+    # Import trong hàm: router in/out không kéo cả stack streaming / nhận diện lúc import
+    from app.streaming.clips import request_clips
+
+    clips = request_clips(log.id, "entry", camera_id=payload.camera_id, parking_area_id=area.id)
+
     return {
         "ok": True,
         "message": f"Xe {plate} đã được ghi nhận vào bãi {area.name} (slot {slot.code})",
@@ -131,6 +138,8 @@ def vehicle_entry(
             "parking_slot_code": slot.code,
             "parking_area_id": area.id,
             "parking_area_name": area.name,
+            "clips": clips["clips"],
+            "clips_skipped": clips["skipped"],
         }
     }
 
@@ -148,6 +157,10 @@ def vehicle_exit(
         exit_plate_image_base64=payload.exit_plate_image_base64,
         calculate_fee_for_log=calculate_fee_for_log,
     )
+    # clip camera quanh lúc xe ra (ghi ở nền, không chặn request)
+    from app.streaming.clips import request_clips
+
+    clips = request_clips(log.id, "exit", camera_id=payload.camera_id, parking_area_id=log.parking_area_id)
 
     return {
         "ok": True,
@@ -165,6 +178,9 @@ def vehicle_exit(
             "pricing_rule_id": log.pricing_rule_id,
             "morning_shifts": fee_result.get("morning_shifts"),
             "night_shifts": fee_result.get("night_shifts"),
+            "log_id": log.id,
+            "clips": clips["clips"],
+            "clips_skipped": clips["skipped"],
         },
     }
 
@@ -64,10 +64,14 @@ class VehicleEntryIn(BaseModel):
     # ảnh biển số lúc vào
     entry_plate_image_base64: Optional[str] = None
 
+    # camera đã chụp (camera_id trong kết quả snap) -> clip bằng chứng lấy từ camera này
+    camera_id: Optional[str] = None
+
 
 class VehicleExitIn(BaseModel):
     license_plate_number: str
     exit_plate_image_base64: Optional[str] = None
+    camera_id: Optional[str] = None
 
 
 # =========================
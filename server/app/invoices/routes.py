@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func, or_, and_
 from app.db import get_db
 from app.models import Log, Vehicle, User
+from app.images.store import image_url
 from typing import Optional
 from datetime import datetime
 from app.permission.guards import require_page
@@ -72,8 +73,9 @@ def get_invoices(
                 "exit_staff": log.exit_staff.full_name if log.exit_staff else None,
                 "entry_time": log.entry_time.isoformat() if log.entry_time else None,
                 "exit_time": log.exit_time.isoformat() if log.exit_time else None,
-                "entry_plate_image": log.entry_plate_image,
-                "exit_plate_image": log.exit_plate_image,
+                # đường dẫn ảnh trong kho ảnh (GET /images/{key})
+                "entry_plate_image": image_url(log.entry_image_key),
+                "exit_plate_image": image_url(log.exit_image_key),
             }
         )
 
@@ -26,10 +26,17 @@ from app import (
     permission,
     site_info,
     vehicle_type,
+    images,
 )
 from app.parking_slot_events import routes as parking_slot_events
 from apscheduler.schedulers.background import BackgroundScheduler
 from app.monthlyticket.cron import job_wrapper
+from app.streaming.pipeline import start_clip_cameras, stop_cameras
+from app.streaming.inference import stop_inference
+from app.streaming.journal import close_journal
+from app.streaming.preload import preload_inline
+from app.streaming.warmup import start_warmup
+from app.images.migrate import ensure_columns, start_backfill
 from zoneinfo import ZoneInfo
 
 app = FastAPI(title="Parking System API")
@@ -44,6 +51,12 @@ app.add_middleware(
 
 # tạo bảng
 Base.metadata.create_all(bind=engine)
+# DB cũ: thêm cột key ảnh vào logs (trước mọi truy vấn trên logs)
+ensure_columns(engine)
+
+# MODEL_PRELOAD + INFERENCE_MODE=inline: load model ngay lúc import, trước khi
+# gunicorn --preload fork worker -> các worker dùng chung trọng số
+preload_inline()
 
 
 # -----------------------------
@@ -218,9 +231,23 @@ def on_startup():
         # ignore scheduler errors at startup
         pass
 
+    # load sẵn model nhận diện ở nền (MODEL_WARMUP=true), không chặn startup
+    start_warmup()
+    # mở sẵn camera giữ clip bằng chứng (CLIP_KEEP_ALIVE): có frame trước lúc ghi lượt
+    start_clip_cameras()
+    # chuyển ảnh base64 cũ trong logs sang kho ảnh ở nền
+    start_backfill()
+
 
 @app.on_event("shutdown")
 def on_shutdown():
+    # release mọi camera còn thread capture đang chạy
+    stop_cameras()
+    # dừng process chạy YOLO + OCR
+    stop_inference()
+    # đẩy segment nhật ký nhận diện đang ghi xuống đĩa
+    close_journal()
+
     sched = getattr(app.state, "scheduler", None)
     if sched:
         try:
@@ -247,6 +274,7 @@ app.include_router(permission.router)
 app.include_router(site_info.router)
 app.include_router(vehicle_type.router)
 app.include_router(parking_slot_events.router)
+app.include_router(images.router)
 
 
 @app.get("/health")
@@ -1,6 +1,6 @@
 from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime,UniqueConstraint ,  func, Text, JSON
 from app.db import Base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 from datetime import datetime, timezone
 
 # -------------------------------------------------
@@ -199,8 +199,14 @@ class Log(Base):
     vehicle = relationship("Vehicle", back_populates="logs")
     parking_area = relationship("ParkingArea", back_populates="logs")
     
-    entry_plate_image = Column(Text, nullable=True)
-    exit_plate_image = Column(Text, nullable=True)
+    # key ảnh biển số trong kho ảnh (app/images), ảnh: GET /images/{key}
+    entry_image_key = Column(String(80), nullable=True)
+    exit_image_key = Column(String(80), nullable=True)
+
+    # ảnh base64 cũ, đã chuyển sang kho ảnh (app/images/migrate.py);
+    # deferred: SELECT trên logs không đọc 2 cột này
+    entry_plate_image = deferred(Column(Text, nullable=True))
+    exit_plate_image = deferred(Column(Text, nullable=True))
 
     entry_staff = relationship(
     "User",
@@ -0,0 +1,105 @@
+# app/streaming/batcher.py
+"""
+Gom job từ nhiều thread (livestream, snap, nhiều camera) thành 1 lô cho model.
+
+Mỗi thread gọi submit(items) rồi chờ; thread gom lô lấy hết job đang chờ
+(tối đa max_batch phần tử, đợi thêm window ms để gom thêm) và gọi run(lô)
+1 lần. Trong lúc 1 lô đang chạy, job mới vẫn được xếp hàng -> lô sau tự lớn
+lên khi tải cao mà không thêm độ trễ lúc vắng.
+"""
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable
+
+
+class MicroBatcher:
+    def __init__(
+        self,
+        run: Callable[[list], list],
+        window_ms: int = 5,
+        max_batch: int = 16,
+        threads: int = 1,
+        name: str = "batcher",
+    ):
+        """
+        run: nhận list phần tử, trả list kết quả cùng thứ tự
+        threads: số lô chạy song song (vd. = số process nhận diện)
+        """
+        self._run_batch = run
+        self.window = window_ms / 1000
+        self.max_batch = max(1, max_batch)
+        self.name = name
+
+        self._cond = threading.Condition()
+        self._queue: list[tuple[list, Future]] = []
+        self._threads: list[threading.Thread | None] = [None] * max(1, threads)
+
+        self.calls = 0
+        self.items = 0
+
+    def submit(self, items: list) -> list:
+        if not items:
+            return []
+
+        fut: Future = Future()
+        with self._cond:
+            self._queue.append((items, fut))
+            for i, t in enumerate(self._threads):
+                if t is None or not t.is_alive():
+                    t = threading.Thread(target=self._run, name=f"{self.name}-{i}", daemon=True)
+                    self._threads[i] = t
+                    t.start()
+            self._cond.notify_all()
+        return fut.result()
+
+    def _take_batch(self):
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+
+            # chờ thêm 1 chút để gom request của thread khác
+            deadline = time.monotonic() + self.window
+            while sum(len(items) for items, _ in self._queue) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+                if not self._queue:
+                    # thread gom lô khác đã lấy hết
+                    return []
+
+            batch, count = [], 0
+            while self._queue and (not batch or count + len(self._queue[0][0]) <= self.max_batch):
+                items, fut = self._queue.pop(0)
+                batch.append((items, fut))
+                count += len(items)
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                continue
+            all_items = [x for items, _ in batch for x in items]
+            try:
+                results = self._run_batch(all_items)
+            except Exception as e:
+                for _, fut in batch:
+                    fut.set_exception(e)
+                continue
+
+            with self._cond:
+                self.calls += 1
+                self.items += len(all_items)
+            i = 0
+            for items, fut in batch:
+                fut.set_result(results[i:i + len(items)])
+                i += len(items)
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "items": self.items,
+            "avg_batch": round(self.items / self.calls, 2) if self.calls else 0.0,
+        }
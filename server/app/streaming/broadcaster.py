@@ -0,0 +1,141 @@
+# app/streaming/broadcaster.py
+"""
+Phát MJPEG cho nhiều người xem cùng lúc.
+
+Mỗi frame camera chỉ được nhận diện + vẽ khung + encode JPEG MỘT lần trong
+thread broadcaster, sau đó cùng một gói bytes được gửi cho mọi viewer.
+Viewer chậm không có hàng đợi: luôn nhận gói mới nhất, frame trung gian bị bỏ.
+"""
+import threading
+import time
+from typing import Callable
+
+from .camera import CaptureWorker, Frame
+
+BOUNDARY = b"frame"
+
+
+def mjpeg_part(jpg_bytes: bytes) -> bytes:
+    """Đóng gói 1 ảnh JPEG thành 1 part của multipart/x-mixed-replace."""
+    return (
+        b"--" + BOUNDARY + b"\r\n"
+        b"Content-Type: image/jpeg\r\n\r\n" + jpg_bytes + b"\r\n"
+    )
+
+
+class MjpegBroadcaster:
+    """
+    get_capture: hàm trả về CaptureWorker (đã start)
+    render: nhận Frame từ ring (ảnh dùng chung, muốn vẽ phải copy) -> bytes JPEG,
+            None nếu bỏ frame
+    """
+
+    def __init__(
+        self,
+        get_capture: Callable[[], CaptureWorker],
+        render: Callable[[Frame], bytes | None],
+        wait_timeout: float = 3.0,
+    ):
+        self._get_capture = get_capture
+        self._render = render
+        self._wait_timeout = wait_timeout
+
+        self._cond = threading.Condition()
+        self._packet: bytes | None = None
+        self._seq = 0
+        self._viewers = 0
+        self._thread: threading.Thread | None = None
+
+        self.error: str | None = None
+        self.frames_encoded = 0
+
+    # ---------- viewer ----------
+
+    @property
+    def viewers(self) -> int:
+        return self._viewers
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _add_viewer(self) -> int:
+        """Tăng refcount, start thread nếu cần. Trả về seq mà viewer bắt đầu chờ từ đó."""
+        with self._cond:
+            self._viewers += 1
+            if self.running:
+                # đang phát -> gửi ngay gói hiện tại cho viewer mới
+                return self._seq - 1 if self._packet is not None else self._seq
+
+            self.error = None
+            self._packet = None
+            self._thread = threading.Thread(
+                target=self._run, name="mjpeg-broadcaster", daemon=True
+            )
+            self._thread.start()
+            return self._seq
+
+    def _remove_viewer(self):
+        with self._cond:
+            self._viewers = max(0, self._viewers - 1)
+            self._cond.notify_all()
+
+    def stream(self):
+        """Generator cho StreamingResponse: mỗi viewer gọi 1 lần."""
+        last_seq = self._add_viewer()
+        try:
+            while True:
+                with self._cond:
+                    deadline = time.monotonic() + self._wait_timeout
+                    while self._seq <= last_seq and self.running:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                    if self._seq <= last_seq:
+                        if not self.running:
+                            return
+                        continue
+                    last_seq = self._seq
+                    packet = self._packet
+                yield packet
+        finally:
+            # client đóng kết nối -> GeneratorExit -> giảm refcount
+            self._remove_viewer()
+
+    # ---------- thread encode ----------
+
+    def _publish(self, jpg_bytes: bytes):
+        packet = mjpeg_part(jpg_bytes)
+        with self._cond:
+            self._seq += 1
+            self._packet = packet
+            self.frames_encoded += 1
+            self._cond.notify_all()
+
+    def _run(self):
+        try:
+            capture = self._get_capture()
+            for frame in capture.frames():
+                with self._cond:
+                    if self._viewers == 0:
+                        # hết viewer: đánh dấu dừng dưới lock để viewer mới start thread khác
+                        self._thread = None
+                        return
+                jpg_bytes = self._render(frame)
+                if jpg_bytes:
+                    self._publish(jpg_bytes)
+        except Exception as e:
+            self.error = str(e)
+            print("❌ Lỗi broadcaster:", e)
+        finally:
+            with self._cond:
+                self._cond.notify_all()
+
+    def stats(self) -> dict:
+        return {
+            "viewers": self._viewers,
+            "running": self.running,
+            "frames_encoded": self.frames_encoded,
+            "error": self.error,
+        }
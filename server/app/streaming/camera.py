@@ -0,0 +1,355 @@
+# app/streaming/camera.py
+"""
+Thread capture duy nhất giữ mỗi camera.
+
+Chỉ CaptureWorker được gọi cap.read(); livestream và API snap chỉ đọc frame
+mới nhất từ ring buffer nên không tranh nhau camera, cũng không nhận frame cũ
+còn nằm trong buffer của driver.
+
+Nguồn MJPEG (CAMERA_PASSTHROUGH) cho frame dạng bytes JPEG gốc: ring giữ
+nguyên bytes đó, chỉ giải mã khi có người cần ảnh (snap, YOLO, preview có vẽ
+khung), còn preview passthrough gửi thẳng bytes cho viewer.
+
+Ngoài ra CaptureWorker giữ JPEG vài giây gần nhất (PrerollRing, thưa theo
+CLIP_FPS) để cắt clip bằng chứng lúc ghi lượt vào / ra (xem clips.py).
+"""
+import math
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from . import config
+from .jpeg import decode_jpeg, encode_jpeg, jpeg_size, reduce_factor
+from .sources import open_source
+
+
+class Frame:
+    """
+    1 frame trong ring (dùng chung cho mọi người đọc, KHÔNG được vẽ trực tiếp lên).
+    seq: số thứ tự tăng dần, dùng để biết frame nào là mới
+    ts: time.monotonic() lúc đọc được frame
+    jpeg: bytes JPEG gốc từ camera (None nếu nguồn không phải MJPEG)
+    """
+
+    __slots__ = ("seq", "ts", "jpeg", "_image", "_lock")
+
+    def __init__(self, seq: int, ts: float, image: np.ndarray | None = None, jpeg: bytes | None = None):
+        self.seq = seq
+        self.ts = ts
+        self.jpeg = jpeg
+        self._image = image
+        self._lock = threading.Lock()
+
+    @property
+    def decoded(self) -> bool:
+        return self._image is not None
+
+    @property
+    def image(self) -> np.ndarray:
+        """Ảnh BGR đủ cỡ; frame JPEG được giải mã lần đầu cần tới rồi giữ lại."""
+        if self._image is None:
+            with self._lock:
+                if self._image is None:
+                    image = decode_jpeg(self.jpeg) if self.jpeg else None
+                    if image is None:
+                        raise RuntimeError("Frame JPEG từ camera bị lỗi")
+                    self._image = image
+        return self._image
+
+    @property
+    def size(self) -> tuple[int, int]:
+        """(rộng, cao) của frame, không giải mã nếu đọc được từ header JPEG."""
+        if self._image is None and self.jpeg:
+            size = jpeg_size(self.jpeg)
+            if size:
+                return size
+        h, w = self.image.shape[:2]
+        return w, h
+
+    def downscaled(self, min_width: int, gray: bool = False) -> np.ndarray:
+        """
+        Ảnh nhỏ rộng >= min_width (motion gate, preview thu nhỏ). Frame chưa
+        giải mã thì giải mã thẳng 1/2, 1/4, 1/8 từ JPEG; đã có ảnh thì trả ảnh đủ cỡ.
+        """
+        if self._image is None and self.jpeg:
+            factor = reduce_factor(self.size[0], min_width)
+            image = decode_jpeg(self.jpeg, factor, gray) if factor > 1 else None
+            if image is not None:
+                return image
+        return self.image
+
+
+class FrameRing:
+    """Ring buffer nhỏ các frame gần nhất, có Condition để chờ frame mới."""
+
+    def __init__(self, size: int):
+        self._buf: deque[Frame] = deque(maxlen=size)
+        self._cond = threading.Condition()
+        self._seq = 0
+
+    def push(self, image: np.ndarray | None, ts: float | None = None, jpeg: bytes | None = None) -> Frame:
+        with self._cond:
+            self._seq += 1
+            frame = Frame(self._seq, ts if ts is not None else time.monotonic(), image=image, jpeg=jpeg)
+            self._buf.append(frame)
+            self._cond.notify_all()
+            return frame
+
+    def latest(self) -> Frame | None:
+        with self._cond:
+            return self._buf[-1] if self._buf else None
+
+    def wait_newer(self, after_seq: int, timeout: float) -> Frame | None:
+        """Chờ tới khi có frame seq > after_seq, trả về frame mới nhất (hoặc None nếu hết giờ)."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while not self._buf or self._buf[-1].seq <= after_seq:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            return self._buf[-1]
+
+    def snapshot(self) -> list[Frame]:
+        with self._cond:
+            return list(self._buf)
+
+    def clear(self):
+        """Xóa frame cũ (seq vẫn tiếp tục tăng)."""
+        with self._cond:
+            self._buf.clear()
+
+    def wake_all(self):
+        with self._cond:
+            self._cond.notify_all()
+
+
+class PrerollRing:
+    """
+    JPEG các frame trong `seconds` giây gần nhất, tối đa `fps` frame / giây.
+    Số frame cố định (deque maxlen) -> RAM không tăng theo thời gian chạy.
+    """
+
+    def __init__(self, seconds: float, fps: float, quality: int = 80):
+        self.interval = 1.0 / fps
+        self.quality = quality
+        self._buf: deque[tuple[float, bytes]] = deque(maxlen=max(1, math.ceil(seconds * fps) + 1))
+        self._lock = threading.Lock()
+        self._last_ts = 0.0
+
+    def offer(self, frame: Frame):
+        """Giữ frame nếu đã đủ khoảng cách với frame giữ trước đó (gọi từ thread capture)."""
+        # chừa 10% cho jitter: camera 10 fps + CLIP_FPS=10 không bị rớt frame xen kẽ
+        if frame.ts - self._last_ts < self.interval * 0.9:
+            return
+        # nguồn MJPEG: dùng luôn bytes gốc, còn lại encode (chỉ CLIP_FPS lần / giây)
+        jpeg = frame.jpeg or encode_jpeg(frame.image, self.quality)
+        if jpeg is None:
+            return
+        with self._lock:
+            self._buf.append((frame.ts, jpeg))
+            self._last_ts = frame.ts
+
+    def between(self, start: float, end: float) -> list[tuple[float, bytes]]:
+        """(ts, JPEG) có start <= ts <= end (time.monotonic())."""
+        with self._lock:
+            return [(ts, jpeg) for ts, jpeg in self._buf if start <= ts <= end]
+
+    def clear(self):
+        with self._lock:
+            self._buf.clear()
+            self._last_ts = 0.0
+
+    def stats(self) -> dict:
+        with self._lock:
+            frames = list(self._buf)
+        return {
+            "frames": len(frames),
+            "capacity": self._buf.maxlen,
+            "bytes": sum(len(jpeg) for _, jpeg in frames),
+            "seconds": round(frames[-1][0] - frames[0][0], 2) if frames else 0.0,
+        }
+
+
+class CaptureWorker:
+    """
+    Sở hữu nguồn frame (camera / file phát lại, xem sources.py) và đọc liên tục vào FrameRing.
+    Tự dừng + release camera khi không còn ai đọc trong idle_timeout giây
+    (trừ khi keep_alive). Camera keep_alive dừng vì lỗi được mở lại sau
+    restart_delay giây, lỗi tiếp thì chờ gấp đôi (tối đa max_restart_delay).
+    """
+
+    def __init__(
+        self,
+        source=config.CAMERA_SOURCE,
+        ring_size: int = config.CAMERA_RING_SIZE,
+        idle_timeout: float = config.CAMERA_IDLE_TIMEOUT_SEC,
+        preroll: PrerollRing | None = None,
+        keep_alive: bool = False,
+        restart_delay: float = config.CAMERA_RESTART_DELAY_SEC,
+        max_restart_delay: float = config.CAMERA_RESTART_MAX_SEC,
+    ):
+        """
+        preroll: giữ JPEG vài giây gần nhất cho clip bằng chứng (None = không giữ)
+        keep_alive: không tự dừng khi không ai đọc (preroll luôn có frame trước lúc ghi lượt)
+        restart_delay / max_restart_delay: chờ trước khi mở lại camera keep_alive bị lỗi
+        """
+        self.source = source
+        self.idle_timeout = idle_timeout
+        self.keep_alive = keep_alive
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.restarts = 0
+        self.ring = FrameRing(ring_size)
+        self.preroll = preroll
+        self.error: str | None = None
+        # nguồn đang cho bytes JPEG gốc (preview passthrough không phải encode lại)
+        self.passthrough = False
+
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._last_access = time.monotonic()
+        self._backoff = restart_delay
+        self._restart_timer: threading.Timer | None = None
+
+    # ---------- vòng đời ----------
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Mở camera (nếu chưa) và chạy thread capture. Lỗi mở camera -> RuntimeError."""
+        with self._lock:
+            self.touch()
+            if self.running:
+                return
+
+            cap = open_source(self.source)
+
+            self.passthrough = cap.passthrough
+            self.error = None
+            self.ring.clear()
+            if self.preroll is not None:
+                # không ghép frame của lần mở camera trước vào clip
+                self.preroll.clear()
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, args=(cap,), name="camera-capture", daemon=True
+            )
+            self._thread.start()
+            print("✅ Camera capture started:", self.source, "(passthrough MJPEG)" if cap.passthrough else "")
+
+    def stop(self, timeout: float = 2.0):
+        self._stop.set()
+        timer = self._restart_timer
+        if timer is not None:
+            timer.cancel()
+        self.ring.wake_all()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def touch(self):
+        self._last_access = time.monotonic()
+
+    def schedule_restart(self):
+        """Mở lại camera sau self._backoff giây (camera keep_alive bị lỗi / không mở được)."""
+        delay = self._backoff
+        self._backoff = min(self._backoff * 2, self.max_restart_delay)
+        print(f"⏳ Mở lại camera sau {delay:.1f} giây:", self.source)
+        timer = threading.Timer(delay, self._restart)
+        timer.daemon = True
+        self._restart_timer = timer
+        timer.start()
+
+    def _restart(self):
+        self._restart_timer = None
+        # đã dừng hẳn, hoặc có người đọc đã mở lại camera trước đó
+        if self._stop.is_set() or self.running:
+            return
+        try:
+            self.start()
+        except RuntimeError as e:
+            print("❌ Không mở lại được camera:", self.source, e)
+            self.schedule_restart()
+            return
+        self.restarts += 1
+
+    def _run(self, cap):
+        failures = 0
+        try:
+            while not self._stop.is_set():
+                if not self.keep_alive and time.monotonic() - self._last_access > self.idle_timeout:
+                    break
+
+                ok, image, jpeg = cap.read_frame()
+                if not ok or (image is None and jpeg is None):
+                    if cap.ended:
+                        # phát lại hết video / thư mục ảnh (REPLAY_LOOP=false)
+                        self.error = "Đã phát hết nguồn video"
+                        break
+                    failures += 1
+                    if failures >= config.CAMERA_MAX_READ_FAILURES:
+                        self.error = "Không đọc được frame từ camera"
+                        break
+                    time.sleep(0.01)
+                    continue
+
+                failures = 0
+                # đọc được lại -> lần lỗi sau bắt đầu chờ lại từ restart_delay
+                self._backoff = self.restart_delay
+                frame = self.ring.push(image, jpeg=jpeg)
+                if self.preroll is not None:
+                    self.preroll.offer(frame)
+        finally:
+            cap.release()
+            self.ring.wake_all()
+            print("✅ Camera released (capture idle/stopped)")
+            if self.keep_alive and not self._stop.is_set():
+                # camera luôn mở dừng vì lỗi: không ai đọc để mở lại -> tự mở lại
+                self.schedule_restart()
+
+    # ---------- đọc frame ----------
+
+    def _ensure_running(self):
+        # thread đã dừng (idle / mất camera) -> mở lại camera
+        if not self.running:
+            self.start()
+
+    def latest_frame(
+        self,
+        timeout: float = config.CAMERA_FRAME_TIMEOUT_SEC,
+        max_age: float = config.CAMERA_MAX_FRAME_AGE_SEC,
+    ) -> Frame:
+        """
+        Frame mới nhất trong ring. Nếu camera vừa mở (ring rỗng) hoặc frame
+        mới nhất đã cũ hơn max_age giây thì chờ frame kế tiếp.
+        """
+        self._ensure_running()
+        self.touch()
+
+        frame = self.ring.latest()
+        if frame is None or time.monotonic() - frame.ts > max_age:
+            frame = self.ring.wait_newer(frame.seq if frame else 0, timeout)
+        if frame is None:
+            raise RuntimeError(self.error or "Không đọc được frame từ camera")
+        return frame
+
+    def frames(self, timeout: float = config.CAMERA_FRAME_TIMEOUT_SEC):
+        """Generator trả từng frame mới (bỏ qua frame trung gian nếu đọc chậm)."""
+        self._ensure_running()
+        last_seq = 0
+        while True:
+            self.touch()
+            frame = self.ring.wait_newer(last_seq, timeout)
+            if frame is None:
+                if not self.running:
+                    return
+                continue
+            last_seq = frame.seq
+            yield frame
+
@@ -0,0 +1,136 @@
+# app/streaming/cameras.py
+"""
+Danh sách camera của bãi: mỗi làn vào / ra 1 camera, có nguồn riêng (webcam,
+file video, RTSP), vai trò entry / exit, bãi xe (parking_area_id) và vùng làn
+xe (ROI) riêng. Đọc từ CAMERAS / CAMERAS_FILE (JSON), mặc định 1 camera vào
+như cấu hình cũ.
+"""
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import urlsplit, urlunsplit
+
+from . import config
+
+ROLES = ("entry", "exit")
+FULL_FRAME = (0.0, 0.0, 1.0, 1.0)
+# id camera được ghi nguyên vẹn vào cột camera của nhật ký nhận diện (journal.RECORD)
+MAX_ID_BYTES = 12
+
+
+@dataclass(frozen=True)
+class CameraConfig:
+    id: str
+    source: int | str                      # index webcam / file video / RTSP URL
+    role: str = "entry"                    # "entry" (xe vào) / "exit" (xe ra)
+    name: str = ""
+    parking_area_id: int | None = None
+    roi: tuple[float, float, float, float] | None = None         # vùng đưa vào YOLO, None = toàn frame
+    motion_roi: tuple[float, float, float, float] = FULL_FRAME  # vùng motion gate
+
+    def public(self) -> dict:
+        """Thông tin trả cho frontend (ẩn mật khẩu trong URL RTSP)."""
+        return {
+            "id": self.id,
+            "name": self.name or self.id,
+            "role": self.role,
+            "parking_area_id": self.parking_area_id,
+            "source": mask_source(self.source),
+            "roi": list(self.roi) if self.roi else None,
+        }
+
+
+def mask_source(source: int | str) -> int | str:
+    if not isinstance(source, str) or "@" not in source:
+        return source
+    parts = urlsplit(source)
+    if parts.password is None:
+        return source
+    netloc = f"{parts.username}:***@{parts.hostname}" + (f":{parts.port}" if parts.port else "")
+    return urlunsplit(parts._replace(netloc=netloc))
+
+
+def _roi(value) -> tuple[float, float, float, float] | None:
+    # "x,y,w,h" hoặc [x, y, w, h]
+    if isinstance(value, (list, tuple)):
+        value = ",".join(str(v) for v in value)
+    return config.parse_roi(value)
+
+
+def parse_camera(entry: dict) -> CameraConfig:
+    """1 phần tử của CAMERAS -> CameraConfig. Sai định dạng -> ValueError."""
+    camera_id = str(entry.get("id") or "").strip()
+    if not camera_id:
+        raise ValueError("camera thiếu id")
+    if len(camera_id.encode("utf-8")) > MAX_ID_BYTES:
+        # id dài bị cắt trong nhật ký -> 2 camera cùng tiền tố bị gộp làm 1
+        raise ValueError(f"camera '{camera_id}': id dài quá {MAX_ID_BYTES} byte")
+    if "source" not in entry:
+        raise ValueError(f"camera '{camera_id}' thiếu source")
+
+    role = str(entry.get("role", "entry")).lower()
+    if role not in ROLES:
+        raise ValueError(f"camera '{camera_id}': role phải là entry / exit")
+
+    area = entry.get("parking_area_id")
+    roi = _roi(entry.get("roi"))
+    return CameraConfig(
+        id=camera_id,
+        source=config.parse_source(str(entry["source"])),
+        role=role,
+        name=str(entry.get("name") or ""),
+        parking_area_id=int(area) if area is not None else None,
+        roi=roi,
+        # motion gate mặc định theo dõi đúng vùng làn xe
+        motion_roi=_roi(entry.get("motion_roi")) or roi or FULL_FRAME,
+    )
+
+
+def parse_cameras(raw: str) -> list[CameraConfig]:
+    """JSON list camera -> list CameraConfig; phần tử sai hoặc trùng id bị bỏ qua."""
+    try:
+        entries = json.loads(raw)
+    except ValueError as e:
+        print("❌ CAMERAS không phải JSON hợp lệ:", e)
+        return []
+    if not isinstance(entries, list):
+        print("❌ CAMERAS phải là 1 list camera")
+        return []
+
+    parsed: list[CameraConfig] = []
+    for entry in entries:
+        try:
+            camera = parse_camera(entry if isinstance(entry, dict) else {})
+        except (ValueError, TypeError) as e:
+            print("❌ Bỏ qua camera:", e)
+            continue
+        if any(c.id == camera.id for c in parsed):
+            print("❌ Bỏ qua camera trùng id:", camera.id)
+            continue
+        parsed.append(camera)
+    return parsed
+
+
+def default_camera() -> CameraConfig:
+    """1 camera vào duy nhất theo cấu hình cũ (CAMERA_SOURCE, DETECT_ROI, MOTION_ROI)."""
+    return CameraConfig(
+        id="in",
+        source=config.CAMERA_SOURCE,
+        role="entry",
+        roi=config.DETECT_ROI,
+        motion_roi=config.MOTION_ROI,
+    )
+
+
+def load_cameras(raw: str = config.CAMERAS, path: str = config.CAMERAS_FILE) -> list[CameraConfig]:
+    if path:
+        try:
+            raw = Path(path).read_text(encoding="utf-8")
+        except OSError as e:
+            print("❌ Không đọc được CAMERAS_FILE:", e)
+    parsed = parse_cameras(raw) if raw.strip() else []
+    return parsed or [default_camera()]
+
+
+# camera đã cấu hình (đọc 1 lần lúc import)
+cameras = load_cameras()
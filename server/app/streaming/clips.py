@@ -0,0 +1,228 @@
+# app/streaming/clips.py
+"""
+Clip bằng chứng cho lượt xe vào / ra.
+
+Thread capture của mỗi camera giữ JPEG vài giây gần nhất (PrerollRing). Khi
+/inout/entry, /inout/exit ghi lượt, request chỉ xếp 1 job vào hàng đợi (không
+encode / ghi đĩa trên đường request); thread ghi clip chờ thêm CLIP_POSTROLL_SEC
+rồi cắt các frame quanh thời điểm đó ra file, đặt theo id lượt gửi xe (Log.id):
+
+    <CLIP_DIR>/<log_id>/<entry|exit>-<camera_id>.mjpeg   JPEG nối liền (ffplay / VLC mở được)
+    <CLIP_DIR>/<log_id>/<entry|exit>-<camera_id>.json    thời điểm, camera, vị trí từng frame
+
+CLIP_KEEP_ALIVE=true: camera giữ clip được mở từ lúc khởi động, không tự dừng
+và tự mở lại khi mất kết nối. Camera không chạy (lỗi mở camera, hoặc CLIP_KEEP_ALIVE=false và không ai
+xem / snap) thì không có frame -> không có clip; camera bị bỏ qua được báo
+lại (request_clips trả về skipped, stats đếm skipped).
+"""
+import json
+import os
+import queue
+import re
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+from . import config
+from .cameras import cameras
+from .pipeline import get_pipeline
+
+EVENTS = ("entry", "exit")
+_NAME = re.compile(r"^(entry|exit)-[\w.-]+$")
+_UNSAFE = re.compile(r"[^\w.-]")
+
+
+@dataclass(frozen=True)
+class ClipJob:
+    log_id: int
+    event: str        # "entry" / "exit"
+    camera_id: str
+    ts: float         # time.monotonic() lúc ghi lượt
+    wall: float       # time.time() lúc ghi lượt
+
+    @property
+    def name(self) -> str:
+        return f"{self.event}-{_UNSAFE.sub('_', self.camera_id)}"
+
+
+class ClipWriter:
+    def __init__(self, directory: str, preroll_sec: float, postroll_sec: float, queue_size: int = 16):
+        """
+        directory: thư mục gốc chứa clip (mỗi lượt gửi xe 1 thư mục con)
+        preroll_sec / postroll_sec: số giây trước / sau thời điểm ghi lượt
+        queue_size: số clip chờ ghi tối đa, đầy thì bỏ clip mới
+        """
+        self.directory = Path(directory)
+        self.preroll_sec = preroll_sec
+        self.postroll_sec = postroll_sec
+
+        self._queue: queue.Queue[ClipJob] = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+        self.written = 0
+        self.empty = 0
+        self.dropped = 0
+        self.skipped = 0
+        self.error: str | None = None
+
+    def submit(self, job: ClipJob) -> bool:
+        """Xếp 1 clip vào hàng đợi, không chặn. Hàng đợi đầy -> False."""
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            self.dropped += 1
+            print("❌ Hàng đợi clip đầy, bỏ clip", job.log_id, job.name)
+            return False
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="clip-writer", daemon=True)
+                self._thread.start()
+        return True
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            # chờ đủ phần sau thời điểm ghi lượt (job xếp theo thời gian -> chờ nối tiếp)
+            remaining = job.ts + self.postroll_sec - time.monotonic()
+            if remaining > 0:
+                time.sleep(remaining)
+            try:
+                self.write(job)
+            except Exception as e:
+                self.error = str(e)
+                print("❌ Lỗi ghi clip:", job.log_id, job.name, e)
+
+    def write(self, job: ClipJob) -> Path | None:
+        """Cắt frame quanh job.ts từ ring của camera ra file. Không có frame -> None."""
+        preroll = get_pipeline(job.camera_id).capture.preroll
+        frames = preroll.between(job.ts - self.preroll_sec, job.ts + self.postroll_sec) if preroll else []
+        if not frames:
+            self.empty += 1
+            return None
+
+        folder = self.directory / str(job.log_id)
+        folder.mkdir(parents=True, exist_ok=True)
+        path = folder / f"{job.name}.mjpeg"
+
+        index, offset = [], 0
+        tmp = path.with_suffix(".mjpeg.tmp")
+        with open(tmp, "wb") as f:
+            for ts, jpeg in frames:
+                f.write(jpeg)
+                index.append({"t": round(ts - job.ts, 3), "offset": offset, "size": len(jpeg)})
+                offset += len(jpeg)
+        os.replace(tmp, path)
+
+        meta = {
+            "log_id": job.log_id,
+            "event": job.event,
+            "camera_id": job.camera_id,
+            "name": job.name,
+            "time": datetime.fromtimestamp(job.wall).isoformat(timespec="milliseconds"),
+            "duration_sec": round(frames[-1][0] - frames[0][0], 3),
+            "bytes": offset,
+            # t: giây so với lúc ghi lượt (âm = trước)
+            "frames": index,
+        }
+        tmp = path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path.with_suffix(".json"))
+        self.written += 1
+        return path
+
+    def stats(self) -> dict:
+        return {
+            "directory": str(self.directory),
+            "pending": self._queue.qsize(),
+            "written": self.written,
+            "empty": self.empty,
+            "dropped": self.dropped,
+            "skipped": self.skipped,
+            "error": self.error,
+        }
+
+
+clip_writer = ClipWriter(config.CLIP_DIR, config.CLIP_PREROLL_SEC, config.CLIP_POSTROLL_SEC, config.CLIP_QUEUE_SIZE)
+
+
+def clip_cameras(event: str, camera_id: str | None = None, parking_area_id: int | None = None) -> list[str]:
+    """Camera quay lượt này: camera được chỉ định, hoặc mọi camera cùng vai trò ở bãi đó."""
+    if camera_id:
+        return [c.id for c in cameras if c.id == camera_id]
+    return [
+        c.id
+        for c in cameras
+        if c.role == event and (parking_area_id is None or c.parking_area_id in (None, parking_area_id))
+    ]
+
+
+def request_clips(
+    log_id: int,
+    event: str,
+    camera_id: str | None = None,
+    parking_area_id: int | None = None,
+) -> dict:
+    """
+    Xếp clip cho 1 lượt vào / ra (không chặn, không raise - lỗi clip không làm
+    hỏng lượt gửi xe). Trả về {"clips": tên các clip sẽ được ghi,
+    "skipped": id camera không quay được lượt này}.
+    """
+    result = {"clips": [], "skipped": []}
+    if not config.CLIP_ENABLED or event not in EVENTS:
+        return result
+    now, wall = time.monotonic(), time.time()
+    for cid in clip_cameras(event, camera_id, parking_area_id):
+        job = ClipJob(log_id=log_id, event=event, camera_id=cid, ts=now, wall=wall)
+        # camera đang tắt -> ring rỗng, không xếp clip nhưng báo lại (không bỏ im lặng)
+        if not get_pipeline(cid).capture.running:
+            clip_writer.skipped += 1
+            print("❌ Camera không chạy, lượt không có clip:", log_id, job.name)
+            result["skipped"].append(cid)
+        elif clip_writer.submit(job):
+            result["clips"].append(job.name)
+        else:
+            result["skipped"].append(cid)
+    return result
+
+
+# ============ ĐỌC CLIP ============
+
+def _clip_file(log_id: int, name: str, suffix: str) -> Path | None:
+    if not _NAME.match(name):
+        return None
+    path = clip_writer.directory / str(log_id) / f"{name}{suffix}"
+    return path if path.is_file() else None
+
+
+def list_clips(log_id: int) -> list[dict]:
+    """Thông tin các clip của 1 lượt gửi xe (không kèm danh sách frame)."""
+    folder = clip_writer.directory / str(log_id)
+    clips = []
+    for path in sorted(folder.glob("*.json")) if folder.is_dir() else []:
+        try:
+            meta = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        meta["frame_count"] = len(meta.pop("frames", []))
+        clips.append(meta)
+    return clips
+
+
+def clip_video(log_id: int, name: str) -> Path | None:
+    return _clip_file(log_id, name, ".mjpeg")
+
+
+def clip_frame(log_id: int, name: str, index: int) -> bytes | None:
+    """JPEG thứ index trong clip (đọc thẳng theo offset, không giải mã). Không có -> None."""
+    meta_path, video = _clip_file(log_id, name, ".json"), _clip_file(log_id, name, ".mjpeg")
+    if meta_path is None or video is None:
+        return None
+    frames = json.loads(meta_path.read_text(encoding="utf-8"))["frames"]
+    if not 0 <= index < len(frames):
+        return None
+    with open(video, "rb") as f:
+        f.seek(frames[index]["offset"])
+        return f.read(frames[index]["size"])
@@ -0,0 +1,356 @@
+# app/streaming/config.py
+"""
+Cấu hình cho pipeline camera / nhận diện biển số.
+Đọc từ biến môi trường (hoặc file .env) để mỗi máy cổng tự chỉnh.
+"""
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def parse_roi(value: str | None) -> tuple[float, float, float, float] | None:
+    """
+    "x,y,w,h" theo tỉ lệ 0..1 của frame, ví dụ "0.2,0.4,0.6,0.6".
+    Rỗng / sai định dạng -> None (toàn frame).
+    """
+    if not value:
+        return None
+    try:
+        x, y, w, h = (float(p) for p in value.split(","))
+    except ValueError:
+        return None
+    x, y = min(max(x, 0.0), 1.0), min(max(y, 0.0), 1.0)
+    w, h = min(max(w, 0.0), 1.0 - x), min(max(h, 0.0), 1.0 - y)
+    if w <= 0 or h <= 0:
+        return None
+    return (x, y, w, h)
+
+
+def parse_source(value: str):
+    """
+    "0", "1"... -> index webcam (int)
+    còn lại (đường dẫn file video, rtsp://...) giữ nguyên dạng chuỗi.
+    """
+    value = (value or "").strip()
+    if value.isdigit():
+        return int(value)
+    return value
+
+
+# ============ CAMERA ============
+
+# Nguồn camera: index webcam hoặc file / RTSP URL
+CAMERA_SOURCE = parse_source(os.getenv("CAMERA_SOURCE", "0"))
+
+# Số frame giữ lại trong ring buffer (mỗi frame kèm timestamp)
+CAMERA_RING_SIZE = max(1, _env_int("CAMERA_RING_SIZE", 4))
+
+# Không còn ai đọc frame trong N giây -> dừng thread capture, release camera
+CAMERA_IDLE_TIMEOUT_SEC = _env_float("CAMERA_IDLE_TIMEOUT_SEC", 10.0)
+
+# Thời gian tối đa chờ frame đầu tiên (lúc camera vừa mở)
+CAMERA_FRAME_TIMEOUT_SEC = _env_float("CAMERA_FRAME_TIMEOUT_SEC", 3.0)
+
+# Frame mới nhất cũ hơn N giây thì snap sẽ chờ frame kế tiếp
+CAMERA_MAX_FRAME_AGE_SEC = _env_float("CAMERA_MAX_FRAME_AGE_SEC", 0.5)
+
+# Số lần read() lỗi liên tiếp trước khi coi như mất camera
+CAMERA_MAX_READ_FAILURES = max(1, _env_int("CAMERA_MAX_READ_FAILURES", 30))
+
+# Camera luôn mở (CLIP_KEEP_ALIVE) mất kết nối -> mở lại sau N giây, lỗi tiếp thì
+# chờ gấp đôi, tối đa CAMERA_RESTART_MAX_SEC
+CAMERA_RESTART_DELAY_SEC = max(0.1, _env_float("CAMERA_RESTART_DELAY_SEC", 1.0))
+CAMERA_RESTART_MAX_SEC = max(CAMERA_RESTART_DELAY_SEC, _env_float("CAMERA_RESTART_MAX_SEC", 30.0))
+
+# Nguồn là file video / thư mục ảnh (phát lại): tốc độ so với FPS gốc,
+# 1 = như camera thật, 2 = nhanh gấp đôi, 0 = nhanh hết mức
+REPLAY_SPEED = max(0.0, _env_float("REPLAY_SPEED", 1.0))
+
+# Phát hết thì quay lại từ đầu (như camera chạy liên tục)
+REPLAY_LOOP = os.getenv("REPLAY_LOOP", "true").lower() in ("1", "true", "yes")
+
+# FPS khi phát thư mục ảnh (hoặc file video không ghi FPS)
+REPLAY_IMAGE_FPS = _env_float("REPLAY_IMAGE_FPS", 10.0)
+
+# Nguồn MJPEG (webcam MJPG, RTSP / HTTP MJPEG, .avi MJPG, thư mục .jpg): giữ bytes
+# JPEG gốc, chỉ giải mã frame khi cần nhận diện -> preview passthrough không encode lại
+CAMERA_PASSTHROUGH = os.getenv("CAMERA_PASSTHROUGH", "true").lower() in ("1", "true", "yes")
+
+# Danh sách camera (JSON) cho nhiều làn vào / ra, ví dụ:
+#   [{"id": "lane1-in", "source": "rtsp://...", "role": "entry", "parking_area_id": 1,
+#     "roi": "0,0.4,1,0.6"},
+#    {"id": "lane1-out", "source": "videos/out.mp4", "role": "exit", "parking_area_id": 1}]
+# CAMERAS_FILE: đường dẫn file JSON cùng định dạng (ưu tiên hơn CAMERAS).
+# Rỗng -> 1 camera vào "in" từ CAMERA_SOURCE / DETECT_ROI / MOTION_ROI như cũ.
+CAMERAS = os.getenv("CAMERAS", "")
+CAMERAS_FILE = os.getenv("CAMERAS_FILE", "")
+
+
+# ============ LIVESTREAM ============
+
+# Chỉ chạy YOLO + OCR mỗi N frame preview (1 = mọi frame, nếu CPU kịp)
+STREAM_DETECT_EVERY_N_FRAMES = max(1, _env_int("STREAM_DETECT_EVERY_N_FRAMES", 1))
+
+# Khoảng cách tối thiểu giữa 2 lần nhận diện (ms), 0 = không giới hạn
+STREAM_DETECT_MIN_INTERVAL_MS = max(0, _env_int("STREAM_DETECT_MIN_INTERVAL_MS", 0))
+
+# Kết quả nhận diện cũ hơn N giây thì không vẽ lên preview nữa
+STREAM_DETECT_MAX_AGE_SEC = _env_float("STREAM_DETECT_MAX_AGE_SEC", 2.0)
+
+# Kiểu preview khi viewer không chọn (?mode=):
+# "annotated"  : vẽ khung biển số lên frame rồi encode JPEG (như cũ)
+# "passthrough": gửi nguyên JPEG của camera, khung biển số gửi riêng qua
+#                /cameras/{id}/detections (JSON / WebSocket) để frontend tự vẽ
+STREAM_PREVIEW_MODE = os.getenv("STREAM_PREVIEW_MODE", "annotated").strip().lower()
+
+# Các mức chiều rộng preview (?width= làm tròn về mức gần nhất, viewer cùng mức dùng chung 1 luồng encode)
+STREAM_PREVIEW_WIDTHS = sorted(
+    {int(w) for w in os.getenv("STREAM_PREVIEW_WIDTHS", "320,480,640,960,1280").split(",") if w.strip().isdigit()}
+)
+
+# Chất lượng JPEG khi preview phải encode (annotated / thu nhỏ); ?quality= ghi đè
+STREAM_PREVIEW_QUALITY = min(95, max(30, _env_int("STREAM_PREVIEW_QUALITY", 80)))
+
+
+# ============ MOTION GATE ============
+
+# Chỉ chạy YOLO khi có chuyển động trong ROI (livestream; snap luôn chạy)
+MOTION_GATE_ENABLED = os.getenv("MOTION_GATE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Vùng làn xe theo tỉ lệ "x,y,w,h" (0..1), mặc định toàn frame
+MOTION_ROI = parse_roi(os.getenv("MOTION_ROI")) or (0.0, 0.0, 1.0, 1.0)
+
+# Chiều rộng ảnh xám thu nhỏ dùng để so sánh
+MOTION_DOWNSCALE_WIDTH = _env_int("MOTION_DOWNSCALE_WIDTH", 160)
+
+# Chênh lệch mức xám để 1 pixel tính là thay đổi
+MOTION_PIXEL_THRESHOLD = _env_int("MOTION_PIXEL_THRESHOLD", 25)
+
+# Tỉ lệ pixel thay đổi trong ROI để coi là có xe / có chuyển động
+MOTION_MIN_CHANGED_RATIO = _env_float("MOTION_MIN_CHANGED_RATIO", 0.01)
+
+# Tốc độ cập nhật ảnh nền
+MOTION_BG_ALPHA = _env_float("MOTION_BG_ALPHA", 0.05)
+
+# Vẫn chạy model thêm N giây sau chuyển động cuối (xe vừa dừng lại)
+MOTION_HOLD_SEC = _env_float("MOTION_HOLD_SEC", 1.0)
+
+# Không có chuyển động quá N giây vẫn chạy model 1 lần để kiểm tra (0 = tắt)
+MOTION_MAX_SKIP_SEC = _env_float("MOTION_MAX_SKIP_SEC", 5.0)
+
+
+# ============ OCR ============
+
+# Cửa sổ gom crop biển số từ nhiều thread thành 1 lô OCR (ms)
+OCR_BATCH_WINDOW_MS = max(0, _env_int("OCR_BATCH_WINDOW_MS", 5))
+
+# Số crop tối đa trong 1 lô OCR
+OCR_BATCH_MAX_SIZE = max(1, _env_int("OCR_BATCH_MAX_SIZE", 16))
+
+# "readtext": EasyOCR tự dò chữ (CRAFT) trong crop rồi đọc (mặc định, như cũ)
+# "recognize": bỏ CRAFT, đưa thẳng crop YOLO vào recognizer (nhanh hơn trên CPU)
+OCR_MODE = os.getenv("OCR_MODE", "readtext").strip().lower()
+
+# Chế độ recognize: tách biển 2 dòng (xe máy) thành 2 ảnh trước khi đọc
+OCR_TWO_LINE_SPLIT = os.getenv("OCR_TWO_LINE_SPLIT", "true").lower() in ("1", "true", "yes")
+
+# Tỉ lệ rộng/cao nhỏ hơn ngưỡng này thì coi là biển 2 dòng
+OCR_TWO_LINE_MAX_ASPECT = _env_float("OCR_TWO_LINE_MAX_ASPECT", 2.5)
+
+# Cắt bớt viền crop YOLO (tỉ lệ mỗi cạnh) trước khi nhận dạng
+OCR_CROP_MARGIN = _env_float("OCR_CROP_MARGIN", 0.04)
+
+# Recognizer EasyOCR chạy INT8 (dynamic quantization); false = float32
+OCR_QUANTIZE = os.getenv("OCR_QUANTIZE", "true").lower() in ("1", "true", "yes")
+
+# File cache recognizer INT8 (tạo lần đầu, các lần sau load thẳng)
+OCR_QUANTIZED_PATH = os.getenv("OCR_QUANTIZED_PATH", "easyocr_recognizer_int8.pt")
+
+# Cache kết quả OCR theo perceptual hash của crop (xe đứng yên ở cổng)
+OCR_CACHE_ENABLED = os.getenv("OCR_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Số crop tối đa giữ trong cache (LRU)
+OCR_CACHE_SIZE = max(1, _env_int("OCR_CACHE_SIZE", 256))
+
+# Kết quả cache quá N giây thì đọc lại
+OCR_CACHE_TTL_SEC = _env_float("OCR_CACHE_TTL_SEC", 30.0)
+
+# Số bit hash (trên 512) được phép khác nhau mà vẫn coi là cùng crop
+OCR_CACHE_MAX_DISTANCE = max(0, _env_int("OCR_CACHE_MAX_DISTANCE", 12))
+
+
+# ============ TRACKER ============
+
+# IoU tối thiểu để ghép box YOLO vào track cũ
+TRACK_IOU_THRESHOLD = _env_float("TRACK_IOU_THRESHOLD", 0.3)
+
+# Số lần nhận diện liên tiếp không thấy xe thì bỏ track
+TRACK_MAX_MISSES = max(0, _env_int("TRACK_MAX_MISSES", 5))
+
+# Track không xuất hiện quá N giây thì bỏ
+TRACK_MAX_IDLE_SEC = _env_float("TRACK_MAX_IDLE_SEC", 30.0)
+
+# Số lần OCR đọc ra chữ tối thiểu trước khi chốt biển số
+TRACK_MIN_VOTES = max(1, _env_int("TRACK_MIN_VOTES", 3))
+
+# Chuỗi dẫn đầu phải chiếm >= tỉ lệ điểm này mới chốt
+TRACK_CONVERGE_RATIO = _env_float("TRACK_CONVERGE_RATIO", 0.6)
+
+# OCR tối đa N lần cho 1 track
+TRACK_MAX_OCR = max(1, _env_int("TRACK_MAX_OCR", 8))
+
+
+# ============ INFERENCE PROCESS ============
+
+# "process": YOLO + OCR chạy ở process riêng (API không bị torch chiếm CPU)
+# "inline" : chạy ngay trong process API như cũ
+INFERENCE_MODE = os.getenv("INFERENCE_MODE", "process").lower()
+
+# Số process chạy model (mỗi process giữ 1 bản model trong RAM)
+INFERENCE_WORKERS = max(1, _env_int("INFERENCE_WORKERS", 1))
+
+# Số job tối đa đang chờ / đang chạy, quá thì trả 503 ngay
+INFERENCE_MAX_PENDING = max(1, _env_int("INFERENCE_MAX_PENDING", 4))
+
+# Hạn chót mỗi job (giây), quá hạn trả 504 và process con bỏ qua job
+INFERENCE_TIMEOUT_SEC = _env_float("INFERENCE_TIMEOUT_SEC", 5.0)
+
+# Gửi frame sang process nhận diện qua shared memory (không pickle)
+INFERENCE_SHARED_FRAMES = os.getenv("INFERENCE_SHARED_FRAMES", "true").lower() in ("1", "true", "yes")
+
+# Dung lượng mỗi slot shared memory (MB); 1080p BGR ~ 6 MB
+INFERENCE_SHM_SLOT_MB = _env_float("INFERENCE_SHM_SLOT_MB", 8.0)
+
+# Số slot shared memory; 0 = tự tính theo số frame 1 lô YOLO x số process nhận diện
+INFERENCE_SHM_SLOTS = max(0, _env_int("INFERENCE_SHM_SLOTS", 0))
+
+# Ảnh nhỏ hơn (KB) gửi kiểu pickle, không chiếm slot (crop biển số cho OCR)
+INFERENCE_SHM_MIN_KB = max(0, _env_int("INFERENCE_SHM_MIN_KB", 256))
+
+# Load sẵn trọng số YOLO + EasyOCR TRƯỚC khi fork để các process dùng chung (copy-on-write):
+#   process: các process nhận diện được fork từ 1 forkserver đã load model
+#   inline : load ngay lúc import app.main -> chạy gunicorn --preload, worker fork sau đó
+MODEL_PRELOAD = os.getenv("MODEL_PRELOAD", "false").lower() in ("1", "true", "yes")
+
+
+# ============ CPU / THREAD ============
+
+# Số thread intra-op của torch (và OpenCV, ONNX Runtime khi DETECTOR_ONNX_THREADS=0)
+# trong mỗi process giữ model. 0 = tự chia: số core / số process nhận diện, để
+# N process không cùng dùng hết mọi core (torch mặc định mỗi process = số core)
+TORCH_THREADS = max(0, _env_int("TORCH_THREADS", 0))
+
+# Số thread inter-op của torch (0 = mặc định torch)
+TORCH_INTEROP_THREADS = max(0, _env_int("TORCH_INTEROP_THREADS", 0))
+
+# Ghim mỗi process nhận diện vào 1 nhóm core (INFERENCE_MODE=process):
+#   rỗng     : không ghim
+#   "auto"   : chia đều các core được phép cho các process
+#   "0-1;2-3": nhóm core của process 0, 1, ... (phân cách bằng ;)
+INFERENCE_CPU_AFFINITY = os.getenv("INFERENCE_CPU_AFFINITY", "").strip().lower()
+
+
+# ============ DETECTOR ============
+
+# "torch": YOLO best.pt qua ultralytics; "onnx": export best.onnx 1 lần rồi chạy ONNX Runtime (CPU)
+DETECTOR_BACKEND = os.getenv("DETECTOR_BACKEND", "torch").lower()
+
+# Số thread ONNX Runtime (0 = theo TORCH_THREADS / chia core như torch)
+DETECTOR_ONNX_THREADS = max(0, _env_int("DETECTOR_ONNX_THREADS", 0))
+
+# Chỉ đưa vùng làn xe "x,y,w,h" (0..1) vào YOLO, bỏ trời / vỉa hè; rỗng = toàn frame
+DETECT_ROI = parse_roi(os.getenv("DETECT_ROI"))
+
+# Thu nhỏ vùng đưa vào YOLO để cạnh dài tối đa N pixel (0 = giữ nguyên);
+# OCR vẫn cắt biển số từ frame gốc độ phân giải đầy đủ
+DETECT_MAX_SIDE = max(0, _env_int("DETECT_MAX_SIDE", 640))
+
+# Gom frame của nhiều camera thành 1 lô YOLO: chờ tối đa N ms để camera khác
+# kịp gửi frame (chỉ có 1 camera thì không chờ)
+DETECT_BATCH_WINDOW_MS = max(0, _env_int("DETECT_BATCH_WINDOW_MS", 10))
+
+# Số frame tối đa trong 1 lô YOLO (không quá số camera)
+DETECT_BATCH_MAX_SIZE = max(1, _env_int("DETECT_BATCH_MAX_SIZE", 4))
+
+
+# ============ WARM-UP ============
+
+# Load YOLO + EasyOCR và chạy thử 1 frame giả ngay lúc khởi động (ở nền)
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "false").lower() in ("1", "true", "yes")
+
+
+# ============ TIMING ============
+
+# Đo thời gian từng bước snap / livestream (GET /streaming/metrics)
+TIMING_ENABLED = os.getenv("TIMING_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Số mẫu gần nhất giữ lại cho mỗi histogram
+TIMING_WINDOW = max(1, _env_int("TIMING_WINDOW", 512))
+
+
+# ============ ẢNH UPLOAD ============
+
+# Số ảnh tối đa trong 1 request /streaming/recognize/batch (cả lô chạy 1 lần model)
+RECOGNIZE_MAX_BATCH = max(1, _env_int("RECOGNIZE_MAX_BATCH", 16))
+
+# Dung lượng tối đa mỗi ảnh upload (MB)
+RECOGNIZE_MAX_IMAGE_MB = _env_float("RECOGNIZE_MAX_IMAGE_MB", 5.0)
+
+
+# ============ NHẬT KÝ NHẬN DIỆN ============
+
+# Ghi mọi biển số camera đọc được vào file segment mmap (GET /streaming/journal)
+JOURNAL_ENABLED = os.getenv("JOURNAL_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Thư mục chứa segment (tương đối với thư mục chạy server)
+JOURNAL_DIR = os.getenv("JOURNAL_DIR", "journal")
+
+# Số bản ghi mỗi segment (64 byte / bản ghi, 65536 = 4 MB)
+JOURNAL_SEGMENT_RECORDS = max(1, _env_int("JOURNAL_SEGMENT_RECORDS", 65536))
+
+# Số segment tối đa giữ lại, quá thì xoá segment cũ nhất (64 x 4 MB = 256 MB)
+JOURNAL_MAX_SEGMENTS = max(1, _env_int("JOURNAL_MAX_SEGMENTS", 64))
+
+
+# ============ CLIP BẰNG CHỨNG ============
+
+# Thread capture giữ JPEG N giây gần nhất; /inout/entry, /inout/exit cắt thành clip theo id lượt gửi xe
+CLIP_ENABLED = os.getenv("CLIP_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Số giây trước / sau lúc ghi lượt vào / ra có trong clip
+CLIP_PREROLL_SEC = max(0.0, _env_float("CLIP_PREROLL_SEC", 8.0))
+CLIP_POSTROLL_SEC = max(0.0, _env_float("CLIP_POSTROLL_SEC", 2.0))
+
+# Số frame / giây giữ lại cho clip (thưa hơn FPS camera, đỡ RAM)
+CLIP_FPS = max(0.1, _env_float("CLIP_FPS", 5.0))
+
+# Chất lượng JPEG khi nguồn không cho sẵn JPEG (phải encode)
+CLIP_QUALITY = min(100, max(1, _env_int("CLIP_QUALITY", 80)))
+
+# Thư mục lưu clip (tương đối với thư mục chạy server)
+CLIP_DIR = os.getenv("CLIP_DIR", "clips")
+
+# Số clip tối đa chờ ghi, quá thì bỏ clip mới (không chặn request)
+CLIP_QUEUE_SIZE = max(1, _env_int("CLIP_QUEUE_SIZE", 16))
+
+# true -> mở camera từ lúc khởi động, không tự dừng khi không ai xem (bỏ qua
+# CAMERA_IDLE_TIMEOUT_SEC) và tự mở lại khi mất camera: cổng chỉ snap vẫn có đủ
+# phần trước lúc ghi lượt, đổi lại mọi camera vào / ra luôn chạy.
+# false (mặc định) -> camera tắt khi rảnh, lượt vào / ra lúc đó không có clip.
+CLIP_KEEP_ALIVE = os.getenv("CLIP_KEEP_ALIVE", "false").lower() in ("1", "true", "yes")
@@ -0,0 +1,182 @@
+# app/streaming/detector.py
+"""
+Tách nhịp nhận diện khỏi nhịp livestream.
+
+Broadcaster gọi submit() cho mọi frame nhưng chỉ frame "đến lượt" (mỗi N frame
+và/hoặc cách nhau tối thiểu X ms) mới được giao cho thread nhận diện. Thread này
+luôn lấy frame MỚI NHẤT đang chờ, nên model chạy nhanh nhất CPU cho phép còn
+preview vẫn chạy theo FPS camera và vẽ lại kết quả gần nhất.
+"""
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+from .camera import Frame
+from .motion import MotionGate
+from .recognition import PlateDetection, plate_text_of
+
+
+@dataclass(frozen=True)
+class DetectionResult:
+    detections: list[PlateDetection] = field(default_factory=list)
+    plate_text: str | None = None
+    frame_seq: int = 0     # seq của frame đã chạy model
+    ts: float = 0.0        # time.monotonic() lúc có kết quả
+    duration: float = 0.0  # thời gian chạy model (giây)
+    size: tuple[int, int] = (0, 0)  # (rộng, cao) frame đã chạy model, để frontend đổi toạ độ box
+
+
+class CadencedDetector:
+    def __init__(
+        self,
+        detect: Callable[[Frame], list[PlateDetection]],
+        every_n_frames: int = 1,
+        min_interval: float = 0.0,
+        max_age: float = 2.0,
+        gate: MotionGate | None = None,
+    ):
+        self._detect = detect
+        self.gate = gate
+        self.every_n_frames = max(1, every_n_frames)
+        self.min_interval = max(0.0, min_interval)
+        self.max_age = max_age
+
+        self._cond = threading.Condition()
+        self._pending: Frame | None = None
+        self._busy = False
+        self._thread: threading.Thread | None = None
+
+        self._frames_since_submit = 0
+        self._last_submit_ts = 0.0
+        self._result = DetectionResult()
+        # lần gần nhất motion gate xác nhận cảnh không đổi -> kết quả cũ vẫn đúng
+        self._confirmed_ts = 0.0
+        self._avg_duration = 0.0
+
+        self.frames_seen = 0
+        self.frames_submitted = 0
+        self.inferences = 0
+        self.error: str | None = None
+
+    # ---------- phía broadcaster ----------
+
+    def due(self) -> bool:
+        """Frame hiện tại có đến lượt nhận diện không (đã tính frame này)."""
+        if self._frames_since_submit < self.every_n_frames:
+            return False
+        if self.min_interval and time.monotonic() - self._last_submit_ts < self.min_interval:
+            return False
+        return True
+
+    def submit(self, frame: Frame) -> bool:
+        """
+        Ghi nhận 1 frame preview; giao cho thread nhận diện nếu đến lượt.
+        detect(frame) không được sửa frame.image (chỉ đọc / crop).
+        """
+        self.frames_seen += 1
+        self._frames_since_submit += 1
+        if not self.due():
+            return False
+
+        # tính lượt ngay cả khi bị gate chặn -> mỗi frame bị chặn = 1 lần model được bỏ qua
+        self._frames_since_submit = 0
+        self._last_submit_ts = time.monotonic()
+
+        # gate chỉ cần ảnh xám nhỏ: frame JPEG chưa giải mã thì giải mã thẳng 1/2..1/8
+        if self.gate is not None and not self.gate.check(
+            frame.downscaled(self.gate.downscale_width, gray=True)
+        ):
+            # làn xe không có chuyển động: bỏ qua model, giữ nguyên kết quả cũ
+            self._confirmed_ts = time.monotonic()
+            return False
+
+        with self._cond:
+            # thread đang bận -> thay frame đang chờ bằng frame mới hơn
+            self._pending = frame
+            self.frames_submitted += 1
+            self._ensure_thread()
+            self._cond.notify_all()
+        return True
+
+    def latest(self) -> DetectionResult | None:
+        """
+        Kết quả gần nhất còn hạn (None nếu quá max_age giây).
+        Frame bị motion gate chặn (cảnh không đổi) cũng tính là còn hạn.
+        """
+        result = self._result
+        if not result.ts:
+            return None
+        fresh_ts = max(result.ts, self._confirmed_ts)
+        if time.monotonic() - fresh_ts > self.max_age:
+            return None
+        return result
+
+    def wait_result(self, after_ts: float, timeout: float) -> DetectionResult | None:
+        """Chờ kết quả mới hơn after_ts (ts của kết quả đã có), None nếu hết giờ."""
+        with self._cond:
+            if self._cond.wait_for(lambda: self._result.ts > after_ts, timeout):
+                return self._result
+        return None
+
+    # ---------- thread nhận diện ----------
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name="plate-detector", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None:
+                    self._cond.wait()
+                frame, self._pending = self._pending, None
+                self._busy = True
+
+            try:
+                started = time.monotonic()
+                detections = self._detect(frame)
+                finished = time.monotonic()
+                self._result = DetectionResult(
+                    detections=detections,
+                    plate_text=plate_text_of(detections),
+                    frame_seq=frame.seq,
+                    ts=finished,
+                    duration=finished - started,
+                    size=frame.size,
+                )
+                self.inferences += 1
+                self.error = None
+                # trung bình trượt thời gian chạy model, để ước lượng CPU tiết kiệm được
+                d = finished - started
+                self._avg_duration = d if self.inferences == 1 else 0.9 * self._avg_duration + 0.1 * d
+            except Exception as e:
+                self.error = str(e)
+                print("❌ Lỗi nhận diện (livestream):", e)
+                time.sleep(1.0)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    # báo kênh metadata (WebSocket) có kết quả mới
+                    self._cond.notify_all()
+
+    def stats(self) -> dict:
+        r = self._result
+        gated = self.gate.frames_gated if self.gate is not None else 0
+        return {
+            "every_n_frames": self.every_n_frames,
+            "min_interval_ms": round(self.min_interval * 1000),
+            "frames_seen": self.frames_seen,
+            "frames_submitted": self.frames_submitted,
+            "inferences": self.inferences,
+            "busy": self._busy,
+            "last_inference_ms": round(r.duration * 1000, 1) if r.ts else None,
+            "avg_inference_ms": round(self._avg_duration * 1000, 1),
+            # số frame motion gate chặn x thời gian model trung bình
+            "estimated_saved_sec": round(gated * self._avg_duration, 1),
+            "motion": self.gate.stats() if self.gate is not None else None,
+            "error": self.error,
+        }
@@ -0,0 +1,8 @@
+# app/streaming/forkserver_preload.py
+"""
+Import trong process forkserver của InferencePool (MODEL_PRELOAD=true, xem
+preload.py): load trọng số 1 lần, mọi process nhận diện fork ra dùng chung.
+"""
+from .preload import preload_models
+
+preload_models()
@@ -0,0 +1,477 @@
+# app/streaming/inference.py
+"""
+Chạy YOLO + EasyOCR ở process riêng, tách khỏi worker uvicorn.
+
+Torch chiếm hết CPU và giữ model dùng chung giữa các thread; để trong process
+API thì /inout, /reports... bị chậm theo mỗi lần nhận diện. Ở đây model nằm
+trong 1 (hoặc vài) process con, process API chỉ gửi job qua queue và chờ kết
+quả. Số job đang chờ bị giới hạn: đầy thì báo InferenceBusy ngay (route trả
+503), mỗi job có hạn chót, process con bỏ qua job đã quá hạn thay vì chạy.
+
+Mỗi process con có queue job + pipe kết quả riêng (job giao cho process đang ít
+job nhất): process chết (kể cả bị kill khi đang giữ lock của queue) chỉ làm
+hỏng queue / pipe của nó; process API biết chính xác job nào mất, trả slot
+shared memory của các job đó rồi tạo queue, pipe và process mới.
+
+preload=True (MODEL_PRELOAD): process con được fork từ 1 forkserver đã load
+sẵn trọng số thay vì spawn rồi tự load -> N process dùng chung 1 bản trọng số.
+"""
+import itertools
+import multiprocessing as mp
+import os
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from multiprocessing import connection
+
+import numpy as np
+
+from . import config
+from .cameras import cameras
+from .shared_frames import SharedFrame, SharedFramePool, open_frame
+from .threads import ThreadBudget, apply_budget, thread_plan
+from .warmup import all_ready
+
+
+class InferenceBusy(RuntimeError):
+    """Hàng đợi nhận diện đầy -> từ chối ngay, không xếp hàng thêm."""
+
+
+class InferenceTimeout(RuntimeError):
+    """Job không xong trước hạn chót."""
+
+
+# ============ PROCESS CON ============
+
+def _run_op(op: str, payload):
+    # import trong process con: chỉ process này load torch / model
+    if op == "locate":
+        from .recognition import locate_plates
+        return locate_plates(payload)
+    if op == "locate_batch":
+        from .recognition import locate_plates_batch
+        return locate_plates_batch(payload)
+    if op == "read":
+        from .ocr import read_plates
+        return read_plates(payload)
+    raise ValueError(f"Không có thao tác nhận diện '{op}'")
+
+
+def _worker_main(
+    requests,
+    results,
+    warmup: bool = False,
+    preload: bool = False,
+    budget: ThreadBudget | None = None,
+):
+    from .preload import report as preload_report
+
+    if preload and not preload_report:
+        # forkserver không import được app.streaming (chạy ngoài thư mục server/?)
+        print("❌ Forkserver chưa preload model, process nhận diện tự load riêng")
+    if budget is not None:
+        # ghim core + số thread của riêng process này, trước khi model chạy
+        apply_budget(budget)
+    if warmup:
+        # load model + chạy thử trước khi nhận job; báo cáo gửi với job_id None
+        from .warmup import warm_up_models
+
+        t0 = time.perf_counter()
+        models = warm_up_models()
+        results.send((None, True, {
+            "pid": os.getpid(),
+            "duration_ms": round((time.perf_counter() - t0) * 1000, 1),
+            "models": models,
+            # trọng số đã có sẵn từ forkserver (MODEL_PRELOAD)
+            "preloaded": dict(preload_report),
+        }))
+
+    while True:
+        job = requests.get()
+        if job is None:
+            break
+        job_id, op, payload, deadline = job
+        if isinstance(payload, SharedFrame):
+            # frame nằm trong shared memory của process API, đọc tại chỗ
+            payload = open_frame(payload)
+        elif isinstance(payload, list):
+            payload = [open_frame(p) if isinstance(p, SharedFrame) else p for p in payload]
+        if time.time() > deadline:
+            # người gọi đã bỏ cuộc -> không tốn CPU cho job này
+            results.send((job_id, False, "expired"))
+            continue
+        try:
+            results.send((job_id, True, _run_op(op, payload)))
+        except Exception as e:
+            results.send((job_id, False, str(e)))
+
+
+# ============ PHÍA API ============
+
+class InferencePool:
+    # chu kỳ kiểm tra process con còn sống / job quá hạn (kể cả khi kết quả về liên tục)
+    check_interval = 0.5
+
+    def __init__(
+        self,
+        workers: int = 1,
+        max_pending: int = 4,
+        timeout: float = 5.0,
+        shared_frames: SharedFramePool | None = None,
+        warmup: bool = False,
+        preload: bool = False,
+        threads: int = 0,
+        interop_threads: int = 0,
+        affinity: str = "",
+    ):
+        """
+        workers: số process chạy model (mỗi process 1 bản YOLO + EasyOCR)
+        max_pending: số job tối đa đang chờ/đang chạy, quá thì InferenceBusy
+        timeout: hạn chót mặc định của 1 job (giây)
+        shared_frames: gửi frame qua shared memory thay vì pickle (None = pickle)
+        warmup: mỗi process con load model + chạy thử ngay khi khởi động
+        preload: fork process con từ forkserver đã load trọng số (dùng chung RAM)
+        threads / interop_threads / affinity: ngân sách CPU mỗi process (xem threads.py)
+        """
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self.timeout = timeout
+        self.shared_frames = shared_frames
+        self.warmup = warmup
+        self.preload = preload
+        # ngân sách thread + nhóm core của process thứ i
+        self.plan = thread_plan(self.workers, threads, interop_threads, affinity)
+
+        self._lock = threading.Lock()
+        if preload:
+            # forkserver: process sạch (không thread của API) load model 1 lần rồi fork process con
+            self._ctx = mp.get_context("forkserver")
+            self._ctx.set_forkserver_preload([__package__ + ".forkserver_preload"])
+        else:
+            self._ctx = mp.get_context("spawn")  # không fork process đang giữ thread / torch
+        self._requests: list = []   # queue job riêng của từng process con
+        self._results: list = []    # đầu đọc pipe kết quả của từng process con (None = đã đóng)
+        self._procs: list = []
+        self._collector: threading.Thread | None = None
+        self._running = False
+        self._last_restart = 0.0
+        self._dead: set[int] = set()    # process con đã chết, chờ khởi động lại
+
+        self._ids = itertools.count(1)
+        # job_id -> (future, hạn chót, các slot shared memory đang giữ, process con nhận job)
+        self._jobs: dict[int, tuple[Future, float, list[SharedFrame], int]] = {}
+        # job đã báo timeout cho người gọi nhưng process con có thể vẫn đang đọc
+        # frame: giữ slot tới khi process con báo kết quả hoặc chết
+        self._held: dict[int, tuple[list[SharedFrame], int]] = {}
+        # pid process con -> báo cáo warm-up
+        self._warmups: dict[int, dict] = {}
+
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.expired = 0
+        self.restarts = 0
+
+    def _spawn(self, index: int):
+        reader, writer = self._ctx.Pipe(duplex=False)
+        p = self._ctx.Process(
+            target=_worker_main,
+            args=(self._requests[index], writer, self.warmup, self.preload, self.plan[index]),
+            name="plate-inference",
+            daemon=True,
+        )
+        p.start()
+        # chỉ process con giữ đầu ghi -> process chết thì đầu đọc báo EOF
+        writer.close()
+        self._results[index] = reader
+        return p
+
+    def start(self):
+        with self._lock:
+            if self._running:
+                return
+            self._requests = [self._ctx.Queue() for _ in range(self.workers)]
+            self._results = [None] * self.workers
+            self._procs = [self._spawn(i) for i in range(self.workers)]
+            self._dead = set()
+            self._running = True
+            self._collector = threading.Thread(
+                target=self._collect, name="inference-results", daemon=True
+            )
+            self._collector.start()
+            print(f"✅ Inference pool started ({self.workers} process).")
+
+    def stop(self):
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+            procs, self._procs = self._procs, []
+            for requests in self._requests:
+                requests.put(None)
+            jobs, self._jobs = self._jobs, {}
+            self._held = {}
+
+        for fut, _, _, _ in jobs.values():
+            fut.set_exception(RuntimeError("Inference pool đã dừng"))
+        for p in procs:
+            p.join(timeout=2)
+            if p.is_alive():
+                p.terminate()
+        if self.shared_frames is not None:
+            self.shared_frames.close()
+
+    def call(self, op: str, payload, timeout: float | None = None):
+        """Gửi 1 job cho process con và chờ kết quả (tối đa timeout giây)."""
+        if not self._running:
+            self.start()
+
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.time() + timeout
+        fut: Future = Future()
+        with self._lock:
+            if len(self._jobs) >= self.max_pending:
+                self.rejected += 1
+                raise InferenceBusy("Hệ thống nhận diện đang quá tải, thử lại sau")
+            job_id = next(self._ids)
+            worker = self._pick_worker()
+            self._jobs[job_id] = (fut, deadline, [], worker)
+
+        refs = []
+        if self.shared_frames is not None:
+            payload, refs = self._share(payload)
+        with self._lock:
+            # job còn đó (process nhận job chưa chết) -> gửi vào queue hiện tại của process đó
+            queued = job_id in self._jobs
+            if queued:
+                self._jobs[job_id] = (fut, deadline, refs, worker)
+                self._requests[worker].put((job_id, op, payload, deadline))
+        if not queued:
+            # job đã bị huỷ cùng process -> trả slot luôn, fut đã có lỗi
+            for ref in refs:
+                self.shared_frames.release(ref)
+
+        try:
+            return fut.result(timeout=timeout)
+        except FutureTimeout:
+            with self._lock:
+                self.timeouts += 1
+            raise InferenceTimeout("Nhận diện quá thời gian cho phép") from None
+
+    def _pick_worker(self) -> int:
+        """Process con còn sống đang giữ ít job nhất (gọi khi đã giữ self._lock)."""
+        load = [0] * len(self._procs)
+        for _, _, _, worker in self._jobs.values():
+            load[worker] += 1
+        alive = [i for i, p in enumerate(self._procs) if p.is_alive()] or list(range(len(self._procs)))
+        return min(alive, key=lambda i: load[i])
+
+    def _share(self, payload):
+        """Đưa frame (hoặc list frame của 1 lô) vào shared memory; hết slot thì pickle như cũ."""
+        if isinstance(payload, np.ndarray):
+            ref = self.shared_frames.put(payload)
+            return (payload, []) if ref is None else (ref, [ref])
+        if isinstance(payload, list) and payload and isinstance(payload[0], np.ndarray):
+            shared, refs = [], []
+            for image in payload:
+                ref = self.shared_frames.put(image)
+                if ref is not None:
+                    refs.append(ref)
+                shared.append(image if ref is None else ref)
+            return shared, refs
+        return payload, []
+
+    def _finish(self, job_id: int) -> Future | None:
+        """Bỏ job khỏi hàng đợi, trả slot shared memory (process con đã báo kết quả / đã chết)."""
+        with self._lock:
+            entry = self._jobs.pop(job_id, None)
+            held = self._held.pop(job_id, None)
+        refs = held[0] if held is not None else entry[2] if entry is not None else []
+        for ref in refs:
+            self.shared_frames.release(ref)
+        return entry[0] if entry is not None else None
+
+    def _abandon(self, job_id: int) -> Future | None:
+        """Bỏ job khỏi hàng đợi (trả chỗ cho job mới) nhưng giữ slot shared memory."""
+        with self._lock:
+            entry = self._jobs.pop(job_id, None)
+            if entry is None:
+                return None
+            fut, _, refs, worker = entry
+            if refs:
+                self._held[job_id] = (refs, worker)
+        return fut
+
+    def _collect(self):
+        next_check = 0.0
+        while self._running:
+            # kiểm tra theo giờ, không chỉ lúc rảnh: tải đều thì queue kết quả không bao giờ trống
+            now = time.monotonic()
+            if now >= next_check:
+                self._check_workers()
+                next_check = now + self.check_interval
+            readers = [r for r in self._results if r is not None]
+            try:
+                ready = connection.wait(readers, timeout=self.check_interval)
+            except (OSError, ValueError):
+                # pool đã dừng, pipe đã đóng
+                break
+            for reader in ready:
+                try:
+                    job_id, ok, value = reader.recv()
+                except (EOFError, OSError):
+                    # process con đã chết: không đọc pipe này nữa, _check_workers dọn job + khởi động lại
+                    self._close_results(reader)
+                    continue
+                self._handle(job_id, ok, value)
+
+    def _close_results(self, reader):
+        for i, r in enumerate(self._results):
+            if r is reader:
+                self._results[i] = None
+        reader.close()
+
+    def _handle(self, job_id: int | None, ok: bool, value):
+        if job_id is None:
+            with self._lock:
+                self._warmups[value["pid"]] = value
+            return
+
+        fut = self._finish(job_id)
+        if ok:
+            self.completed += 1
+            if fut is not None:
+                fut.set_result(value)
+        elif value == "expired":
+            self.expired += 1
+            if fut is not None and not fut.done():
+                fut.set_exception(InferenceTimeout("Nhận diện quá thời gian cho phép"))
+        elif fut is not None:
+            fut.set_exception(RuntimeError(value))
+
+    def _check_workers(self):
+        now = time.time()
+        dead = set()
+        with self._lock:
+            if not self._running:
+                return
+            for i, p in enumerate(self._procs):
+                if p.is_alive() or i in self._dead:
+                    continue
+                # queue của process chết có thể kẹt lock (bị kill lúc đang chờ job) -> bỏ luôn
+                dead.add(i)
+                self._dead.add(i)
+                self._requests[i].cancel_join_thread()
+                self._requests[i].close()
+                self._requests[i] = self._ctx.Queue()
+            for i in sorted(self._dead):
+                # process chết ngay khi khởi động (thiếu model...) -> không restart liên tục
+                if now - self._last_restart > 5:
+                    if self._results[i] is not None:
+                        self._close_results(self._results[i])
+                    print("❌ Process nhận diện đã dừng, khởi động lại:", self._procs[i].exitcode)
+                    self._warmups.pop(self._procs[i].pid, None)
+                    self._procs[i] = self._spawn(i)
+                    self._dead.discard(i)
+                    self._last_restart = now
+                    self.restarts += 1
+
+            # job của process chết: không ai báo kết quả nữa -> huỷ + trả slot ngay
+            dead_jobs = [jid for jid, entry in self._jobs.items() if entry[3] in dead]
+            dead_jobs += [jid for jid, (_, worker) in self._held.items() if worker in dead]
+            # job quá hạn lâu (process con treo?) -> trả chỗ trong hàng đợi
+            lost = [jid for jid, entry in self._jobs.items() if now > entry[1] + self.timeout and entry[3] not in dead]
+
+        for jid in dead_jobs:
+            fut = self._finish(jid)
+            if fut is not None and not fut.done():
+                fut.set_exception(RuntimeError("Process nhận diện đã dừng giữa chừng"))
+        for jid in lost:
+            # process con có thể vẫn đang đọc frame -> slot chỉ trả khi nó báo lại / chết
+            fut = self._abandon(jid)
+            if fut is not None and not fut.done():
+                fut.set_exception(InferenceTimeout("Nhận diện quá thời gian cho phép"))
+
+    def worker_pids(self) -> list[int]:
+        with self._lock:
+            return [p.pid for p in self._procs if p.pid is not None]
+
+    def warmup_status(self) -> dict:
+        """Trạng thái warm-up từng process con, ready khi mọi process đã nóng."""
+        with self._lock:
+            procs, reports = list(self._procs), dict(self._warmups)
+
+        workers = []
+        for p in procs:
+            report = reports.get(p.pid)
+            if report is not None:
+                state = "ready" if all_ready(report["models"]) else "error"
+                workers.append({"pid": p.pid, "alive": p.is_alive(), "state": state, **report})
+            else:
+                workers.append({"pid": p.pid, "alive": p.is_alive(), "state": "warming" if self.warmup else "cold"})
+
+        states = {w["state"] for w in workers}
+        if not workers:
+            state = "cold"
+        elif states == {"ready"}:
+            state = "ready"
+        elif "error" in states:
+            state = "error"
+        else:
+            state = "warming" if self.warmup else "cold"
+        return {"state": state, "workers": workers}
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "preload": self.preload,
+            "threads": [
+                {"threads": b.threads, "interop_threads": b.interop_threads, "cpus": b.cpus}
+                for b in self.plan
+            ],
+            "alive": sum(p.is_alive() for p in self._procs),
+            "pending": len(self._jobs),
+            "held_slots": sum(len(refs) for refs, _ in list(self._held.values())),
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "expired": self.expired,
+            "restarts": self.restarts,
+            "shared_frames": self.shared_frames.stats() if self.shared_frames is not None else None,
+        }
+
+
+# None = chạy model ngay trong process API (như cũ)
+inference_pool = (
+    InferencePool(
+        workers=config.INFERENCE_WORKERS,
+        max_pending=config.INFERENCE_MAX_PENDING,
+        timeout=config.INFERENCE_TIMEOUT_SEC,
+        shared_frames=(
+            SharedFramePool(
+                # mỗi process nhận diện chạy 1 lô YOLO cùng lúc, mỗi lô tối đa 1 frame / camera
+                # (crop OCR không vào slot); thiếu slot thì frame đó pickle như cũ
+                slots=config.INFERENCE_SHM_SLOTS
+                or config.INFERENCE_WORKERS * min(config.DETECT_BATCH_MAX_SIZE, len(cameras)),
+                slot_bytes=int(config.INFERENCE_SHM_SLOT_MB * 1024 * 1024),
+                min_bytes=config.INFERENCE_SHM_MIN_KB * 1024,
+            )
+            if config.INFERENCE_SHARED_FRAMES
+            else None
+        ),
+        warmup=config.MODEL_WARMUP,
+        preload=config.MODEL_PRELOAD,
+        threads=config.TORCH_THREADS,
+        interop_threads=config.TORCH_INTEROP_THREADS,
+        affinity=config.INFERENCE_CPU_AFFINITY,
+    )
+    if config.INFERENCE_MODE == "process"
+    else None
+)
+
+
+def stop_inference():
+    if inference_pool is not None:
+        inference_pool.stop()
@@ -0,0 +1,384 @@
+# app/streaming/journal.py
+"""
+Nhật ký nhận diện: mỗi lần camera OCR ra biển số (livestream + snap) được ghi
+nối vào file segment map vào bộ nhớ (mmap), không ghi DB mỗi frame. Track đã
+chốt không đọc lại (xe đứng chờ) không sinh bản ghi trùng.
+
+Mỗi segment: header 32 byte + N bản ghi cố định 64 byte (RECORD). Ghi 1 bản
+ghi = copy 64 byte vào mmap rồi tăng bộ đếm trong header (bản ghi chỉ "có"
+khi bộ đếm đã tăng), OS tự đẩy trang xuống đĩa. Segment đầy thì mở segment
+mới, giữ tối đa JOURNAL_MAX_SEGMENTS file, xoá file cũ nhất.
+
+Tên file "events-<ms lúc tạo>-<pid>.jrn": mỗi process API ghi segment của
+riêng nó (gunicorn -w N không tranh nhau 1 file), sắp theo tên = theo thời gian.
+
+Đọc: query() map từng segment read-only, xem bản ghi như mảng numpy có cấu
+trúc (RECORD_DTYPE) và lọc cả segment 1 lần (camera, biển số, track, khoảng
+thời gian), không parse từng bản ghi.
+"""
+import mmap
+import os
+import struct
+import threading
+import time
+from dataclasses import dataclass, replace
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from . import config
+from .cameras import MAX_ID_BYTES
+
+MAGIC = b"PLJ1"
+VERSION = 1
+
+# magic, version, record_size, capacity, count, created (epoch)
+HEADER = struct.Struct("<4sHHIId8x")
+_COUNT_OFFSET = 12
+
+# ts (epoch), frame seq, track id, camera id, biển số, độ tin cậy OCR, score YOLO,
+# box crop x1 y1 x2 y2 trên frame gốc, nguồn, đã chốt.
+# Chuỗi dài hơn cột không được ghi (không cắt): id camera kiểm tra lúc đọc
+# cấu hình camera (cameras.MAX_ID_BYTES), biển số dài bị bỏ và đếm lại.
+CAMERA_BYTES = MAX_ID_BYTES
+PLATE_BYTES = 16
+RECORD = struct.Struct(f"<dII{CAMERA_BYTES}s{PLATE_BYTES}sffHHHHBB2x")
+RECORD_DTYPE = np.dtype([
+    ("ts", "<f8"),
+    ("seq", "<u4"),
+    ("track_id", "<u4"),
+    ("camera", f"S{CAMERA_BYTES}"),
+    ("plate", f"S{PLATE_BYTES}"),
+    ("confidence", "<f4"),
+    ("score", "<f4"),
+    ("x1", "<u2"),
+    ("y1", "<u2"),
+    ("x2", "<u2"),
+    ("y2", "<u2"),
+    ("source", "u1"),
+    ("stable", "u1"),
+    ("_pad", "V2"),
+])
+
+# nguồn của bản ghi
+STREAM = 0
+SNAP = 1
+SOURCES = {STREAM: "stream", SNAP: "snap"}
+
+SUFFIX = ".jrn"
+
+
+@dataclass(frozen=True)
+class JournalQuery:
+    camera: str | None = None
+    plate: str | None = None        # khớp 1 phần, bỏ qua "-", ".", dấu cách, hoa / thường
+    track_id: int | None = None
+    source: int | None = None
+    since: float | None = None      # epoch
+    until: float | None = None
+    limit: int = 100
+
+
+def _u16(value) -> int:
+    return min(max(int(value), 0), 0xFFFF)
+
+
+def _plate_key(text: bytes | str) -> bytes:
+    if isinstance(text, str):
+        text = text.encode("utf-8", "ignore")
+    return text.upper().replace(b"-", b"").replace(b".", b"").replace(b" ", b"")
+
+
+class EventJournal:
+    def __init__(self, directory: str, segment_records: int = 65536, max_segments: int = 64):
+        """
+        directory: thư mục chứa segment (tạo khi ghi bản ghi đầu tiên)
+        segment_records: số bản ghi mỗi segment (x 64 byte)
+        max_segments: số segment tối đa giữ lại (của mọi process), quá thì xoá file cũ nhất
+        """
+        self.directory = Path(directory)
+        self.segment_records = max(1, segment_records)
+        self.max_segments = max(1, max_segments)
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._mm: mmap.mmap | None = None
+        self._path: Path | None = None
+        self._count = 0
+        self._pid = 0
+
+        self.written = 0
+        self.rejected = 0
+        self.rotations = 0
+        self.error: str | None = None
+
+    # ---------- ghi ----------
+
+    def _open_segment(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        created = time.time()
+        self._pid = os.getpid()
+        path = self.directory / f"events-{int(created * 1000):013d}-{self._pid}{SUFFIX}"
+        f = open(path, "w+b")
+        # cấp sẵn cả segment: ghi chỉ là copy vào mmap, không đổi kích thước file
+        f.truncate(HEADER.size + self.segment_records * RECORD.size)
+        mm = mmap.mmap(f.fileno(), 0)
+        HEADER.pack_into(mm, 0, MAGIC, VERSION, RECORD.size, self.segment_records, 0, created)
+        self._file, self._mm, self._path, self._count = f, mm, path, 0
+
+    def _close_segment(self):
+        if self._mm is not None:
+            self._mm.flush()
+            self._mm.close()
+            self._file.close()
+        self._file = self._mm = self._path = None
+
+    def _rotate(self):
+        self._close_segment()
+        self._open_segment()
+        self.rotations += 1
+        self._prune()
+
+    def _prune(self):
+        for path in segment_paths(self.directory)[:-self.max_segments]:
+            try:
+                path.unlink()
+            except OSError:
+                # process khác vừa xoá
+                pass
+
+    def append(self, camera: str, detections, source: int = STREAM, seq: int = 0, ts: float | None = None) -> int:
+        """
+        Ghi các PlateDetection có biển số vừa OCR (fresh), trả về số bản ghi đã ghi.
+        Track đã chốt không đọc lại (xe đứng chờ) không ghi thêm bản ghi trùng.
+        Id camera / biển số dài hơn cột -> không ghi (không cắt). Lỗi ghi không làm hỏng nhận diện.
+        """
+        camera_id = camera.encode("utf-8")
+        if len(camera_id) > CAMERA_BYTES:
+            self._reject(f"id camera dài quá {CAMERA_BYTES} byte: {camera}", len(detections))
+            return 0
+        readable = []
+        for d in detections:
+            if not d.text or not d.fresh:
+                continue
+            plate = d.text.encode("utf-8")
+            if len(plate) > PLATE_BYTES:
+                self._reject(f"biển số dài quá {PLATE_BYTES} byte: {d.text}")
+                continue
+            readable.append((d, plate))
+        if not readable:
+            return 0
+        ts = ts if ts is not None else time.time()
+
+        with self._lock:
+            try:
+                # process con fork từ process đã mở segment: mở segment riêng
+                if self._mm is None or self._pid != os.getpid():
+                    self._mm = None
+                    self._open_segment()
+                for d, plate in readable:
+                    if self._count >= self.segment_records:
+                        self._rotate()
+                    x1, y1, x2, y2 = d.box
+                    RECORD.pack_into(
+                        self._mm,
+                        HEADER.size + self._count * RECORD.size,
+                        ts,
+                        seq & 0xFFFFFFFF,
+                        (d.track_id or 0) & 0xFFFFFFFF,
+                        camera_id,
+                        plate,
+                        d.confidence,
+                        d.score,
+                        _u16(x1), _u16(y1), _u16(x2), _u16(y2),
+                        source,
+                        1 if d.stable else 0,
+                    )
+                    # tăng bộ đếm sau cùng: người đọc không thấy bản ghi ghi dở
+                    self._count += 1
+                    struct.pack_into("<I", self._mm, _COUNT_OFFSET, self._count)
+                    self.written += 1
+                self.error = None
+            except (OSError, ValueError) as e:
+                if self.error is None:
+                    print("❌ Không ghi được nhật ký nhận diện:", e)
+                self.error = str(e)
+                self._close_segment()
+                return 0
+        return len(readable)
+
+    def _reject(self, reason: str, count: int = 1):
+        self.rejected += count
+        print("❌ Bỏ bản ghi nhật ký nhận diện:", reason)
+
+    def flush(self):
+        with self._lock:
+            if self._mm is not None:
+                self._mm.flush()
+
+    def close(self):
+        with self._lock:
+            self._close_segment()
+
+    # ---------- đọc ----------
+
+    def query(self, q: JournalQuery = JournalQuery()) -> list[dict]:
+        return query(self.directory, q)
+
+    def stats(self) -> dict:
+        paths = segment_paths(self.directory)
+        return {
+            "directory": str(self.directory),
+            "segments": len(paths),
+            "bytes": sum(_size(p) for p in paths),
+            "records": sum(segment_count(p) for p in paths),
+            "segment_records": self.segment_records,
+            "max_segments": self.max_segments,
+            "active": self._path.name if self._path is not None else None,
+            "written": self.written,
+            "rejected": self.rejected,
+            "rotations": self.rotations,
+            "error": self.error,
+        }
+
+
+# ============ SCANNER ============
+
+def _size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except OSError:
+        return 0
+
+
+def segment_paths(directory) -> list[Path]:
+    """Các segment trong thư mục, cũ trước mới sau."""
+    directory = Path(directory)
+    if not directory.is_dir():
+        return []
+    return sorted(directory.glob(f"events-*{SUFFIX}"))
+
+
+def _header(buf, size: int) -> tuple[int, int] | None:
+    """(capacity, count) của segment hợp lệ (size = kích thước file), sai định dạng -> None."""
+    if len(buf) < HEADER.size:
+        return None
+    magic, version, record_size, capacity, count, _ = HEADER.unpack_from(buf, 0)
+    if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+        return None
+    # bộ đếm không vượt quá phần file thực có
+    return capacity, min(count, capacity, (size - HEADER.size) // RECORD.size)
+
+
+def segment_count(path: Path) -> int:
+    try:
+        with open(path, "rb") as f:
+            header = _header(f.read(HEADER.size), _size(path))
+    except OSError:
+        return 0
+    return header[1] if header else 0
+
+
+def _match(records: np.ndarray, q: JournalQuery) -> np.ndarray:
+    # bản ghi theo thời gian: cả segment nằm ngoài khoảng -> bỏ qua, không lọc
+    if (q.since is not None and records["ts"][-1] < q.since) or (
+        q.until is not None and records["ts"][0] > q.until
+    ):
+        return np.empty(0, RECORD_DTYPE)
+
+    mask = np.ones(len(records), dtype=bool)
+    if q.since is not None:
+        mask &= records["ts"] >= q.since
+    if q.until is not None:
+        mask &= records["ts"] <= q.until
+    if q.camera is not None:
+        camera = q.camera.encode("utf-8")
+        # id dài hơn cột không bao giờ được ghi -> không khớp (không cắt rồi khớp nhầm camera khác)
+        if len(camera) > CAMERA_BYTES:
+            return np.empty(0, RECORD_DTYPE)
+        mask &= records["camera"] == camera
+    if q.track_id is not None:
+        mask &= records["track_id"] == q.track_id
+    if q.source is not None:
+        mask &= records["source"] == q.source
+    if q.plate:
+        # so khớp chuỗi trên các biển số khác nhau (ít hơn nhiều số bản ghi) rồi trải lại
+        plates, inverse = np.unique(records["plate"][mask], return_inverse=True)
+        for ch in (b"-", b".", b" "):
+            plates = np.char.replace(plates, ch, b"")
+        hit = (np.char.find(np.char.upper(plates), _plate_key(q.plate)) >= 0)[inverse]
+        mask[np.flatnonzero(mask)[~hit]] = False
+    # fancy index -> copy, không còn tham chiếu tới mmap
+    return records[mask]
+
+
+def scan_segment(path: Path, q: JournalQuery = JournalQuery()) -> np.ndarray:
+    """Bản ghi khớp q trong 1 segment (mảng RECORD_DTYPE, đã copy khỏi mmap)."""
+    try:
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        # segment vừa bị xoá / file rỗng
+        return np.empty(0, RECORD_DTYPE)
+
+    try:
+        header = _header(mm, len(mm))
+        if not header or not header[1]:
+            return np.empty(0, RECORD_DTYPE)
+        return _match(np.frombuffer(mm, RECORD_DTYPE, count=header[1], offset=HEADER.size), q)
+    finally:
+        mm.close()
+
+
+def to_dict(record) -> dict:
+    return {
+        "ts": round(float(record["ts"]), 3),
+        "time": datetime.fromtimestamp(float(record["ts"])).isoformat(timespec="milliseconds"),
+        "camera_id": record["camera"].decode("utf-8", "ignore"),
+        "plate_number": record["plate"].decode("utf-8", "ignore"),
+        "confidence": round(float(record["confidence"]), 4),
+        "score": round(float(record["score"]), 4),
+        "track_id": int(record["track_id"]) or None,
+        "frame_seq": int(record["seq"]),
+        "box": [int(record["x1"]), int(record["y1"]), int(record["x2"]), int(record["y2"])],
+        "source": SOURCES.get(int(record["source"]), "unknown"),
+        "stable": bool(record["stable"]),
+    }
+
+
+def query(directory, q: JournalQuery = JournalQuery()) -> list[dict]:
+    """Bản ghi khớp q, mới nhất trước, tối đa q.limit."""
+    newest = np.empty(0, RECORD_DTYPE)
+    scan = q
+    # segment mới trước; segment của các process khác có thể xen kẽ thời gian nên
+    # không dừng sớm, nhưng khi đã đủ limit thì chỉ lấy bản ghi mới hơn bản ghi
+    # thứ limit -> segment cũ bị bỏ qua chỉ nhờ đọc ts cuối
+    for path in reversed(segment_paths(directory)):
+        matched = scan_segment(path, scan)
+        if not len(matched):
+            continue
+        records = np.concatenate([newest, matched])
+        newest = records[np.argsort(records["ts"], kind="stable")[::-1][: q.limit]]
+        if len(newest) >= q.limit:
+            scan = replace(q, since=max(q.since or 0.0, float(newest["ts"][-1])))
+    return [to_dict(r) for r in newest]
+
+
+# ============ NHẬT KÝ CỦA PROCESS ============
+
+journal: EventJournal | None = (
+    EventJournal(config.JOURNAL_DIR, config.JOURNAL_SEGMENT_RECORDS, config.JOURNAL_MAX_SEGMENTS)
+    if config.JOURNAL_ENABLED
+    else None
+)
+
+
+def record(camera: str, detections, source: int = STREAM, seq: int = 0):
+    if journal is not None:
+        journal.append(camera, detections, source=source, seq=seq)
+
+
+def close_journal():
+    if journal is not None:
+        journal.close()
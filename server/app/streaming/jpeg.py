@@ -0,0 +1,73 @@
+# app/streaming/jpeg.py
+"""
+Tiện ích JPEG cho preview passthrough.
+
+Camera MJPEG (và file .avi MJPG, thư mục .jpg) đã gửi sẵn từng frame dạng
+JPEG: giữ nguyên bytes đó để phát preview thay vì giải mã rồi encode lại.
+Khi cần ảnh nhỏ (motion gate, preview độ phân giải thấp) thì giải mã kiểu
+"reduced" của libjpeg (1/2, 1/4, 1/8) - nhanh hơn nhiều so với giải mã đủ
+cỡ rồi resize.
+"""
+import cv2
+import numpy as np
+
+# marker SOF (Start Of Frame) chứa kích thước ảnh; C4 / C8 / CC không phải SOF
+_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+_REDUCED_COLOR = {1: cv2.IMREAD_COLOR, 2: cv2.IMREAD_REDUCED_COLOR_2,
+                  4: cv2.IMREAD_REDUCED_COLOR_4, 8: cv2.IMREAD_REDUCED_COLOR_8}
+_REDUCED_GRAY = {1: cv2.IMREAD_GRAYSCALE, 2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+                 4: cv2.IMREAD_REDUCED_GRAYSCALE_4, 8: cv2.IMREAD_REDUCED_GRAYSCALE_8}
+
+
+def is_jpeg(data) -> bool:
+    return len(data) > 4 and data[0] == 0xFF and data[1] == 0xD8
+
+
+def as_jpeg(packet) -> bytes | None:
+    """Gói raw từ cv2.VideoCapture (mảng uint8 1 x N) -> bytes JPEG, None nếu không phải JPEG."""
+    if packet is None or packet.dtype != np.uint8 or packet.ndim > 2 or (packet.ndim == 2 and packet.shape[0] != 1):
+        return None
+    data = packet.tobytes()
+    return data if is_jpeg(data) else None
+
+
+def jpeg_size(data: bytes) -> tuple[int, int] | None:
+    """(rộng, cao) đọc từ header JPEG, không giải mã. Header lỗi -> None."""
+    i, n = 2, len(data)
+    while i + 9 < n:
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:  # byte đệm
+            i += 1
+            continue
+        if marker in _SOF_MARKERS:
+            h = int.from_bytes(data[i + 5:i + 7], "big")
+            w = int.from_bytes(data[i + 7:i + 9], "big")
+            return (w, h) if w and h else None
+        if marker == 0xD9 or marker == 0xDA:  # hết ảnh / bắt đầu dữ liệu nén mà chưa có SOF
+            return None
+        i += 2 + int.from_bytes(data[i + 2:i + 4], "big")
+    return None
+
+
+def reduce_factor(width: int, min_width: int) -> int:
+    """Hệ số thu nhỏ lớn nhất (1, 2, 4, 8) mà ảnh vẫn rộng >= min_width."""
+    factor = 1
+    while factor < 8 and width // (factor * 2) >= min_width:
+        factor *= 2
+    return factor
+
+
+def decode_jpeg(data: bytes, reduce: int = 1, gray: bool = False) -> np.ndarray | None:
+    """Giải mã JPEG (thu nhỏ 1/reduce ngay lúc giải mã). Lỗi -> None."""
+    flags = (_REDUCED_GRAY if gray else _REDUCED_COLOR)[reduce]
+    return cv2.imdecode(np.frombuffer(data, np.uint8), flags)
+
+
+def encode_jpeg(image: np.ndarray, quality: int | None = None) -> bytes | None:
+    """Encode JPEG; quality None = mặc định OpenCV (95)."""
+    params = [cv2.IMWRITE_JPEG_QUALITY, quality] if quality else []
+    ok, buffer = cv2.imencode(".jpg", image, params)
+    return buffer.tobytes() if ok else None
@@ -0,0 +1,114 @@
+# app/streaming/memory.py
+"""
+Báo cáo RAM từng process: phần riêng (unique, USS) và phần dùng chung với
+process khác (shared), đọc từ /proc/<pid>/smaps_rollup (Linux).
+
+RSS cộng dồn của nhiều worker đếm trang dùng chung nhiều lần; PSS chia đều
+trang dùng chung cho các process đang giữ nó -> tổng RSS - tổng PSS là phần
+RAM tiết kiệm được nhờ preload model trước khi fork (MODEL_PRELOAD).
+"""
+import os
+
+_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty", "Swap")
+
+
+def parse_smaps(text: str) -> dict[str, int]:
+    """Cộng các trường "Tên: N kB" (smaps_rollup có 1 khối, smaps có 1 khối / vùng nhớ)."""
+    kb = dict.fromkeys(_FIELDS, 0)
+    for line in text.splitlines():
+        name, sep, rest = line.partition(":")
+        if sep and name in kb:
+            kb[name] += int(rest.split()[0])
+    return kb
+
+
+def process_memory(pid: int) -> dict | None:
+    """RAM của 1 process (MB). Không đọc được (process đã chết / không phải Linux) -> None."""
+    text = None
+    for name in ("smaps_rollup", "smaps"):
+        try:
+            with open(f"/proc/{pid}/{name}") as f:
+                text = f.read()
+            break
+        except OSError:
+            continue
+    if text is None:
+        return None
+
+    kb = parse_smaps(text)
+
+    def mb(value: int) -> float:
+        return round(value / 1024, 1)
+
+    return {
+        "pid": pid,
+        "rss_mb": mb(kb["Rss"]),
+        "pss_mb": mb(kb["Pss"]),
+        "unique_mb": mb(kb["Private_Clean"] + kb["Private_Dirty"]),
+        "shared_mb": mb(kb["Shared_Clean"] + kb["Shared_Dirty"]),
+        "swap_mb": mb(kb["Swap"]),
+    }
+
+
+def _read(path: str) -> bytes:
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return b""
+
+
+def parent_pid(pid: int) -> int | None:
+    """pid process cha (vd. forkserver đã fork ra process nhận diện)."""
+    # "pid (tên) trạng thái ppid ..." - tên có thể chứa dấu cách
+    fields = _read(f"/proc/{pid}/stat").rsplit(b")", 1)[-1].split()
+    return int(fields[1]) if len(fields) > 1 else None
+
+
+def sibling_workers(pid: int | None = None) -> list[int]:
+    """
+    Các worker cùng cha, cùng lệnh chạy với process này (gunicorn -w N):
+    worker fork từ master giữ nguyên cmdline của master.
+    """
+    pid = pid or os.getpid()
+    ppid = parent_pid(pid)
+    cmdline = _read(f"/proc/{pid}/cmdline")
+    if not cmdline:
+        return []
+
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        # không có /proc (không phải Linux / sandbox): như process_memory, coi như không đọc được
+        return []
+
+    siblings = []
+    for entry in entries:
+        if not entry.isdigit() or int(entry) == pid:
+            continue
+        if parent_pid(int(entry)) == ppid and _read(f"/proc/{entry}/cmdline") == cmdline:
+            siblings.append(int(entry))
+    return sorted(siblings)
+
+
+def memory_report(workers: dict[str, list[int]]) -> dict:
+    """{vai trò: [pid]} -> RAM từng process + tổng."""
+    processes = []
+    for role, pids in workers.items():
+        for pid in pids:
+            usage = process_memory(pid)
+            if usage is not None:
+                processes.append({"role": role, **usage})
+
+    rss = sum(p["rss_mb"] for p in processes)
+    pss = sum(p["pss_mb"] for p in processes)
+    return {
+        "processes": processes,
+        "total": {
+            "rss_mb": round(rss, 1),
+            "pss_mb": round(pss, 1),
+            "unique_mb": round(sum(p["unique_mb"] for p in processes), 1),
+            # RAM thật dùng ít hơn tổng RSS bao nhiêu nhờ trang nhớ dùng chung
+            "shared_saving_mb": round(rss - pss, 1),
+        },
+    }
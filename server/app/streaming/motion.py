@@ -0,0 +1,121 @@
+# app/streaming/motion.py
+"""
+Cổng chuyển động (motion gate) đặt trước bước YOLO + OCR.
+
+Làn xe phần lớn thời gian trống nên không cần chạy model. Mỗi frame được thu nhỏ,
+chuyển xám, cắt theo ROI rồi so với ảnh nền (trung bình trượt). Chỉ khi tỉ lệ
+pixel thay đổi trong ROI vượt ngưỡng thì mới cho chạy nhận diện.
+"""
+import threading
+import time
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    def __init__(
+        self,
+        roi: tuple[float, float, float, float] = (0.0, 0.0, 1.0, 1.0),
+        downscale_width: int = 160,
+        pixel_threshold: int = 25,
+        min_changed_ratio: float = 0.01,
+        bg_alpha: float = 0.05,
+        hold_sec: float = 1.0,
+        max_skip_sec: float = 5.0,
+    ):
+        """
+        roi: (x, y, w, h) theo tỉ lệ 0..1 của frame
+        pixel_threshold: chênh lệch mức xám (0..255) để tính 1 pixel là "thay đổi"
+        min_changed_ratio: tỉ lệ pixel thay đổi trong ROI để coi là có chuyển động
+        bg_alpha: tốc độ cập nhật ảnh nền (0..1)
+        hold_sec: vẫn cho chạy model thêm N giây sau chuyển động cuối
+        max_skip_sec: quá N giây không chạy model thì vẫn cho chạy 1 lần (0 = tắt)
+        """
+        self.roi = roi
+        self.downscale_width = max(16, downscale_width)
+        self.pixel_threshold = pixel_threshold
+        self.min_changed_ratio = min_changed_ratio
+        self.bg_alpha = bg_alpha
+        self.hold_sec = hold_sec
+        self.max_skip_sec = max_skip_sec
+
+        self._lock = threading.Lock()
+        self._background: np.ndarray | None = None
+        self._last_motion_ts = 0.0
+        self._last_pass_ts = 0.0
+
+        self.frames_checked = 0
+        self.frames_passed = 0
+        self.frames_gated = 0
+        self.last_changed_ratio = 0.0
+
+    def _prepare(self, image: np.ndarray) -> np.ndarray:
+        h, w = image.shape[:2]
+        small_w = min(self.downscale_width, w)
+        small_h = max(1, round(h * small_w / w))
+        small = cv2.resize(image, (small_w, small_h), interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+        x, y, rw, rh = self.roi
+        x1, y1 = int(x * small_w), int(y * small_h)
+        x2 = max(x1 + 1, int((x + rw) * small_w))
+        y2 = max(y1 + 1, int((y + rh) * small_h))
+        roi = small[y1:y2, x1:x2]
+
+        # làm mờ nhẹ để nhiễu cảm biến không bị tính là chuyển động
+        return cv2.GaussianBlur(roi, (5, 5), 0)
+
+    def changed_ratio(self, image: np.ndarray) -> float:
+        """Tỉ lệ pixel ROI khác ảnh nền; đồng thời cập nhật ảnh nền."""
+        gray = self._prepare(image)
+
+        if self._background is None or self._background.shape != gray.shape:
+            self._background = gray.astype(np.float32)
+            # frame đầu tiên: chưa có nền để so -> coi như có chuyển động
+            return 1.0
+
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self._background))
+        ratio = np.count_nonzero(diff > self.pixel_threshold) / diff.size
+        cv2.accumulateWeighted(gray, self._background, self.bg_alpha)
+        return float(ratio)
+
+    def check(self, image: np.ndarray) -> bool:
+        """True nếu nên chạy nhận diện cho frame này."""
+        with self._lock:
+            now = time.monotonic()
+            ratio = self.changed_ratio(image)
+            self.last_changed_ratio = ratio
+            self.frames_checked += 1
+
+            if ratio >= self.min_changed_ratio:
+                self._last_motion_ts = now
+
+            allow = (
+                now - self._last_motion_ts <= self.hold_sec
+                or (self.max_skip_sec > 0 and now - self._last_pass_ts >= self.max_skip_sec)
+            )
+            if allow:
+                self._last_pass_ts = now
+                self.frames_passed += 1
+            else:
+                self.frames_gated += 1
+            return allow
+
+    def reset(self):
+        with self._lock:
+            self._background = None
+
+    def stats(self) -> dict:
+        checked = self.frames_checked
+        return {
+            "roi": list(self.roi),
+            "min_changed_ratio": self.min_changed_ratio,
+            "pixel_threshold": self.pixel_threshold,
+            "frames_checked": checked,
+            "frames_passed": self.frames_passed,
+            "frames_gated": self.frames_gated,
+            "gated_ratio": round(self.frames_gated / checked, 3) if checked else 0.0,
+            "last_changed_ratio": round(self.last_changed_ratio, 4),
+        }
@@ -0,0 +1,367 @@
+# app/streaming/ocr.py
+"""
+OCR biển số theo lô (batch).
+
+Mọi vùng biển số YOLO cắt ra trong 1 frame (và từ nhiều luồng gọi cùng lúc:
+livestream, API snap, camera khác...) được gom lại và đọc bằng 1 lần gọi
+EasyOCR, kết quả trả về riêng cho từng box kèm độ tin cậy.
+"""
+import math
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from . import config
+from .batcher import MicroBatcher
+from .inference import inference_pool
+from .ocr_cache import OcrCache, plate_hash
+from .threads import configure_torch
+
+# ============ READER (lazy load) ============
+
+OCR_LANGS = ["en"]
+
+# chiều cao ảnh vào recognizer EasyOCR (= easyocr.config.imgH); ghi cứng để
+# import module này không kéo theo easyocr / torch
+RECOGNIZER_HEIGHT = 64
+
+_reader = None
+_reader_lock = threading.Lock()
+
+
+def _load_reader():
+    # import lúc cần: process API (INFERENCE_MODE=process) không bao giờ load torch
+    import easyocr
+
+    from .ocr_quantize import load_cached, quantize_recognizer, save_cached
+
+    # chế độ recognize không cần detector CRAFT -> không load cho nhẹ
+    detector = config.OCR_MODE != "recognize"
+    if not config.OCR_QUANTIZE:
+        return easyocr.Reader(OCR_LANGS, gpu=False, detector=detector, quantize=False)
+
+    path = Path(config.OCR_QUANTIZED_PATH)
+    cached = load_cached(path, OCR_LANGS)
+    if cached is not None:
+        # có sẵn bản INT8 -> bỏ qua load trọng số float32 của recognizer
+        reader = easyocr.Reader(OCR_LANGS, gpu=False, detector=detector, recognizer=False)
+        reader.recognizer, reader.converter = cached
+        print("✅ EasyOCR recognizer INT8 (cache):", path)
+        return reader
+
+    reader = easyocr.Reader(OCR_LANGS, gpu=False, detector=detector, quantize=False)
+    reader.recognizer = quantize_recognizer(reader.recognizer)
+    try:
+        save_cached(path, OCR_LANGS, reader.recognizer, reader.converter)
+        print("✅ Đã lưu recognizer INT8:", path)
+    except Exception as e:
+        print("❌ Không lưu được recognizer INT8:", e)
+    return reader
+
+
+def get_reader():
+
+  global _reader
+  if _reader is None:
+      with _reader_lock:
+          if _reader is None:
+              try:
+                  configure_torch()
+                  _reader = _load_reader()
+                  print("✅ EasyOCR reader loaded.")
+              except Exception as e:
+                  print("❌ Lỗi khởi tạo EasyOCR:", e)
+                  raise RuntimeError("Không thể khởi tạo EasyOCR") from e
+  return _reader
+
+
+# ============ KẾT QUẢ ============
+
+@dataclass(frozen=True)
+class PlateRead:
+    text: str | None       # biển số đã chuẩn hóa, None nếu không đọc được
+    confidence: float      # 0..1
+    fragments: tuple[str, ...] = ()  # các cụm chữ thô theo thứ tự dòng
+
+
+EMPTY_READ = PlateRead(text=None, confidence=0.0)
+
+
+def normalize_plate_text(fragments) -> str | None:
+    """
+    Ghép các dòng/cụm lại với 1 dấu cách giữa các phần
+    Ví dụ: ["73-K9", "9999"] -> "73-K9 9999"
+    """
+    raw_text = " ".join(t.strip() for t in fragments if t and t.strip())
+
+    # Chuẩn hóa lại khoảng trắng (phòng khi OCR trả nhiều khoảng trắng)
+    plate_text = re.sub(r"\s+", " ", raw_text).strip().upper()
+    return plate_text or None
+
+
+def _order_fragments(items):
+    """
+    items: [(box 4 điểm, text, conf)] của EasyOCR trong 1 crop.
+    Sắp theo dòng (trên -> dưới) rồi trái -> phải, cho biển 2 dòng xe máy.
+    """
+    rows = []
+    for box, text, conf in items:
+        ys = [p[1] for p in box]
+        xs = [p[0] for p in box]
+        rows.append((min(ys), max(ys), min(xs), text, conf))
+    rows.sort(key=lambda r: r[0])
+
+    lines: list[list] = []
+    for top, bottom, left, text, conf in rows:
+        center = (top + bottom) / 2
+        if lines:
+            l_top, l_bottom = lines[-1][0][0], lines[-1][0][1]
+            if l_top <= center <= l_bottom:
+                lines[-1].append((top, bottom, left, text, conf))
+                continue
+        lines.append([(top, bottom, left, text, conf)])
+
+    ordered = []
+    for line in lines:
+        ordered.extend(sorted(line, key=lambda r: r[2]))
+    return [(r[3], r[4]) for r in ordered]
+
+
+def to_plate_read(items) -> PlateRead:
+    """Gộp kết quả EasyOCR (detail=1) của 1 crop thành 1 PlateRead."""
+    fragments = [(t.strip(), float(c)) for t, c in _order_fragments(items) if t and t.strip()]
+    if not fragments:
+        return EMPTY_READ
+
+    text = normalize_plate_text(t for t, _ in fragments)
+    # độ tin cậy trung bình, trọng số theo số ký tự của mỗi cụm
+    total_chars = sum(len(t) for t, _ in fragments)
+    confidence = sum(len(t) * c for t, c in fragments) / total_chars
+    return PlateRead(
+        text=text,
+        confidence=round(confidence, 4),
+        fragments=tuple(t for t, _ in fragments),
+    )
+
+
+# ============ READTEXT (CRAFT + recognizer) ============
+
+def _pad_to(crop: np.ndarray, width: int, height: int) -> np.ndarray:
+    """
+    Pad (không resize) crop về cùng kích thước để đưa vào 1 batch. Phần pad là
+    màu trung vị của crop (gần màu nền biển): pad kiểu lặp mép sẽ kéo nét chữ
+    chạm mép thành vệt dài, CRAFT đọc thêm chữ -> kết quả lô khác đọc lẻ.
+    """
+    h, w = crop.shape[:2]
+    channels = crop.shape[2] if crop.ndim == 3 else 1
+    background = np.median(crop.reshape(-1, channels), axis=0)
+    return cv2.copyMakeBorder(
+        crop, 0, height - h, 0, width - w, cv2.BORDER_CONSTANT, value=[float(v) for v in background]
+    )
+
+
+def readtext_plates(crops: list[np.ndarray]) -> list[PlateRead]:
+    """
+    Đường cũ: EasyOCR tự chạy detector CRAFT trên từng crop rồi mới nhận dạng.
+    Nhiều crop -> 1 lần readtext_batched.
+    """
+    if not crops:
+        return []
+
+    reader = get_reader()
+
+    if len(crops) == 1:
+        return [to_plate_read(reader.readtext(crops[0], detail=1))]
+
+    # readtext_batched cần ảnh cùng kích thước: pad lên crop lớn nhất, giữ nguyên tỉ lệ chữ
+    width = max(c.shape[1] for c in crops)
+    height = max(c.shape[0] for c in crops)
+    batch = [_pad_to(c, width, height) for c in crops]
+
+    results = reader.readtext_batched(batch, detail=1, batch_size=len(crops))
+    return [to_plate_read(items) for items in results]
+
+
+# ============ RECOGNIZE-ONLY (bỏ qua CRAFT) ============
+
+# Ký tự có thể xuất hiện trên biển số VN; ký tự khác bị bỏ khi decode
+PLATE_ALLOWLIST = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ-."
+
+
+def normalize_crop(crop: np.ndarray) -> np.ndarray:
+    """Crop biển số -> ảnh xám, bỏ viền YOLO để sát khung chữ hơn."""
+    gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY) if crop.ndim == 3 else crop
+    h, w = gray.shape[:2]
+    pad_y, pad_x = int(h * config.OCR_CROP_MARGIN), int(w * config.OCR_CROP_MARGIN)
+    if h - 2 * pad_y >= 8 and w - 2 * pad_x >= 8:
+        gray = gray[pad_y:h - pad_y, pad_x:w - pad_x]
+    return gray
+
+
+def split_two_line(gray: np.ndarray) -> list[tuple[int, int]]:
+    """
+    Biển xe máy / biển vuông ô tô có 2 dòng. Trả về các khoảng hàng (y1, y2)
+    cần đọc: 1 dòng nếu biển dài, 2 dòng nếu biển gần vuông.
+    Điểm cắt là hàng ít pixel chữ nhất trong khoảng giữa biển.
+    """
+    h, w = gray.shape[:2]
+    if w / max(h, 1) >= config.OCR_TWO_LINE_MAX_ASPECT:
+        return [(0, h)]
+
+    # chữ tối trên nền sáng (hoặc ngược lại) -> Otsu rồi đếm pixel chữ theo từng hàng
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    if np.count_nonzero(binary) > binary.size / 2:
+        binary = cv2.bitwise_not(binary)
+    profile = np.count_nonzero(binary, axis=1)
+
+    lo, hi = int(h * 0.35), int(h * 0.65)
+    if hi <= lo:
+        return [(0, h)]
+    band = profile[lo:hi]
+    # nhiều hàng cùng ít chữ nhất (khe trống giữa 2 dòng) -> cắt ở giữa khe
+    candidates = np.flatnonzero(band == band.min())
+    cut = lo + int(candidates[len(candidates) // 2])
+    return [(0, cut), (cut, h)]
+
+
+def _resize_line(line: np.ndarray) -> np.ndarray:
+    h, w = line.shape[:2]
+    width = max(RECOGNIZER_HEIGHT, math.ceil(RECOGNIZER_HEIGHT * w / max(h, 1)))
+    return cv2.resize(line, (width, RECOGNIZER_HEIGHT), interpolation=cv2.INTER_LINEAR)
+
+
+def recognize_plates(crops: list[np.ndarray], two_line: bool | None = None) -> list[PlateRead]:
+    """
+    YOLO đã khoanh biển số nên không cần detector CRAFT nữa: mỗi crop (hoặc
+    mỗi dòng của biển 2 dòng) đi thẳng vào mạng recognizer của EasyOCR.
+    Mọi dòng của mọi crop chạy trong 1 batch duy nhất.
+    """
+    if not crops:
+        return []
+
+    from easyocr.recognition import get_text
+
+    reader = get_reader()
+    if two_line is None:
+        two_line = config.OCR_TWO_LINE_SPLIT
+
+    image_list, owners = [], []
+    for idx, crop in enumerate(crops):
+        gray = normalize_crop(crop)
+        rows = split_two_line(gray) if two_line else [(0, gray.shape[0])]
+        w = gray.shape[1]
+        for y1, y2 in rows:
+            if y2 - y1 < 4:
+                continue
+            box = [[0, y1], [w, y1], [w, y2], [0, y2]]
+            image_list.append((box, _resize_line(gray[y1:y2])))
+            owners.append(idx)
+
+    if not image_list:
+        return [EMPTY_READ] * len(crops)
+
+    max_width = max(img.shape[1] for _, img in image_list)
+    max_width = math.ceil(max_width / RECOGNIZER_HEIGHT) * RECOGNIZER_HEIGHT
+    ignore_char = "".join(set(reader.character) - set(PLATE_ALLOWLIST))
+
+    results = get_text(
+        reader.character,
+        RECOGNIZER_HEIGHT,
+        int(max_width),
+        reader.recognizer,
+        reader.converter,
+        image_list,
+        ignore_char,
+        "greedy",
+        5,
+        len(image_list),  # batch_size: cả lô 1 lần
+        0.1,
+        0.5,
+        0.003,
+        0,
+        reader.device,
+    )
+
+    per_crop: list[list] = [[] for _ in crops]
+    for owner, item in zip(owners, results):
+        per_crop[owner].append(item)
+    return [to_plate_read(items) for items in per_crop]
+
+
+def read_plates(crops: list[np.ndarray]) -> list[PlateRead]:
+    """Đọc nhiều crop biển số bằng 1 lần gọi OCR. Kết quả theo đúng thứ tự crops."""
+    if config.OCR_MODE == "recognize":
+        return recognize_plates(crops)
+    return readtext_plates(crops)
+
+
+def run_read(crops: list[np.ndarray]) -> list[PlateRead]:
+    """read_plates() ở process nhận diện (hoặc ngay tại chỗ nếu INFERENCE_MODE=inline)."""
+    if inference_pool is None:
+        return read_plates(crops)
+    return inference_pool.call("read", crops)
+
+
+# ============ GOM LÔ GIỮA CÁC THREAD ============
+
+
+class OcrBatcher(MicroBatcher):
+    """
+    Gom crop từ nhiều thread (livestream, snap, nhiều camera) trong 1 cửa sổ
+    ngắn rồi chạy read_plates() 1 lần cho cả lô (ở process nhận diện).
+    Có cache: crop gần giống crop đã đọc gần đây thì trả luôn, không vào lô.
+    """
+
+    def __init__(self, window_ms: int = 5, max_batch: int = 16, cache: OcrCache | None = None):
+        super().__init__(
+            run_read,
+            window_ms=window_ms,
+            max_batch=max_batch,
+            # như locate_batcher: mỗi process nhận diện chạy 1 lô cùng lúc
+            threads=config.INFERENCE_WORKERS if inference_pool is not None else 1,
+            name="ocr-batcher",
+        )
+        self.cache = cache
+
+    def read(self, crops: list[np.ndarray]) -> list[PlateRead]:
+        if not crops:
+            return []
+
+        if self.cache is None:
+            return self.submit(crops)
+
+        keys = [plate_hash(c) for c in crops]
+        reads: list[PlateRead | None] = [self.cache.get(k) for k in keys]
+        missing = [i for i, r in enumerate(reads) if r is None]
+        if missing:
+            fresh = self.submit([crops[i] for i in missing])
+            for i, read in zip(missing, fresh):
+                self.cache.put(keys[i], read)
+                reads[i] = read
+        return reads
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "crops": self.items,
+            "avg_batch": round(self.items / self.calls, 2) if self.calls else 0.0,
+        }
+
+
+ocr_batcher = OcrBatcher(
+    window_ms=config.OCR_BATCH_WINDOW_MS,
+    max_batch=config.OCR_BATCH_MAX_SIZE,
+    cache=(
+        OcrCache(
+            max_size=config.OCR_CACHE_SIZE,
+            ttl_sec=config.OCR_CACHE_TTL_SEC,
+            max_distance=config.OCR_CACHE_MAX_DISTANCE,
+        )
+        if config.OCR_CACHE_ENABLED
+        else None
+    ),
+)
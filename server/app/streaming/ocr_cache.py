@@ -0,0 +1,105 @@
+# app/streaming/ocr_cache.py
+"""
+Cache kết quả OCR theo perceptual hash của crop biển số.
+
+Xe đứng ở cổng cho ra hàng chục crop gần như giống hệt nhau. Crop được chuẩn
+hóa (xám, thu nhỏ cố định) rồi băm dHash; crop mới có hash trùng hoặc lệch rất
+ít bit so với 1 mục còn hạn trong cache thì dùng lại kết quả, bỏ qua EasyOCR.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+import cv2
+import numpy as np
+
+if TYPE_CHECKING:
+    from .ocr import PlateRead
+
+
+def plate_hash(crop: np.ndarray, width: int = 32, height: int = 16, margin: int = 2) -> int:
+    """
+    dHash width x height bit: so sánh từng cặp pixel kề nhau theo chiều ngang
+    trên ảnh xám đã thu nhỏ. Hash lớn (512 bit) để 2 biển khác nhau ở cùng vị
+    trí không bị trùng như dHash 64 bit thông thường.
+    margin: chênh lệch tối thiểu mới bật bit, vùng nền phẳng không bị nhiễu
+    cảm biến làm lật bit ngẫu nhiên.
+    """
+    gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY) if crop.ndim == 3 else crop
+    small = cv2.resize(gray, (width + 1, height), interpolation=cv2.INTER_AREA).astype(np.int16)
+    bits = (small[:, 1:] - small[:, :-1] > margin).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+class OcrCache:
+    def __init__(self, max_size: int = 256, ttl_sec: float = 30.0, max_distance: int = 12):
+        """
+        max_size: số mục tối đa (LRU)
+        ttl_sec: mục cũ hơn N giây coi như hết hạn
+        max_distance: số bit khác nhau tối đa để coi 2 crop là 1 (0 = chỉ khớp đúng)
+        """
+        self.max_size = max(1, max_size)
+        self.ttl_sec = ttl_sec
+        self.max_distance = max(0, max_distance)
+
+        self._lock = threading.Lock()
+        # hash -> (thời điểm lưu, kết quả)
+        self._entries: OrderedDict[int, tuple[float, "PlateRead"]] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+
+    def _purge_expired(self, now: float):
+        # OrderedDict giữ thứ tự dùng gần nhất, nhưng TTL tính theo lúc lưu -> duyệt hết
+        for key in [k for k, (ts, _) in self._entries.items() if now - ts > self.ttl_sec]:
+            del self._entries[key]
+            self.expired += 1
+
+    def get(self, key: int) -> "PlateRead | None":
+        now = time.monotonic()
+        with self._lock:
+            self._purge_expired(now)
+
+            found = key if key in self._entries else None
+            if found is None and self.max_distance:
+                best = self.max_distance + 1
+                for k in self._entries:
+                    dist = (k ^ key).bit_count()
+                    if dist < best:
+                        found, best = k, dist
+
+            if found is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(found)
+            self.hits += 1
+            return self._entries[found][1]
+
+    def put(self, key: int, read: "PlateRead"):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), read)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_sec": self.ttl_sec,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expired": self.expired,
+        }
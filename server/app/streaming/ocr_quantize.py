@@ -0,0 +1,52 @@
+# app/streaming/ocr_quantize.py
+"""
+Lượng tử hóa INT8 (torch dynamic quantization) cho mạng nhận dạng chữ EasyOCR.
+
+Trọng số LSTM / Linear của recognizer chuyển sang int8, activation vẫn float
+và được lượng tử hóa lúc chạy -> nhẹ hơn, nhanh hơn trên CPU cổng. Model đã
+lượng tử hóa được lưu ra đĩa (kèm converter); lần khởi động sau load thẳng
+file này, không phải load lại trọng số float32 của EasyOCR.
+"""
+import copy
+from pathlib import Path
+
+import easyocr
+import torch
+
+
+def quantize_recognizer(model: torch.nn.Module) -> torch.nn.Module:
+    """Bản INT8 của recognizer (không sửa model gốc)."""
+    model = copy.deepcopy(model).eval()
+    return torch.quantization.quantize_dynamic(model, dtype=torch.qint8)
+
+
+def cache_key(langs: list[str]) -> dict:
+    # đổi bản easyocr / torch / backend lượng tử hóa -> file cache không dùng được nữa
+    return {
+        "easyocr": easyocr.__version__,
+        "torch": torch.__version__,
+        "engine": torch.backends.quantized.engine,
+        "langs": list(langs),
+    }
+
+
+def load_cached(path: Path, langs: list[str]):
+    """(recognizer, converter) từ file cache, None nếu chưa có / không khớp phiên bản."""
+    if not path.exists():
+        return None
+    try:
+        data = torch.load(path, map_location="cpu", weights_only=False)
+    except Exception as e:
+        print("❌ Lỗi đọc cache recognizer INT8:", e)
+        return None
+    if data.get("key") != cache_key(langs):
+        return None
+    return data["recognizer"], data["converter"]
+
+
+def save_cached(path: Path, langs: list[str], recognizer: torch.nn.Module, converter):
+    # ghi file tạm rồi rename: process khác không đọc phải file ghi dở
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    torch.save({"key": cache_key(langs), "recognizer": recognizer, "converter": converter}, tmp)
+    tmp.replace(path)
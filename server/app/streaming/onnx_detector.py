@@ -0,0 +1,136 @@
+# app/streaming/onnx_detector.py
+"""
+Chạy detector biển số bằng ONNX Runtime trên CPU (không cần torch lúc chạy).
+
+best.pt được export sang best.onnx 1 lần (qua ultralytics) rồi dùng lại;
+file .pt mới hơn file .onnx thì export lại. Tiền xử lý (letterbox) và hậu xử
+lý (lọc theo conf + NMS) viết bằng numpy / OpenCV, kết quả cùng dạng
+[(box, score)] như locate_plates() bản torch.
+"""
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+
+def export_onnx(pt_path: Path, imgsz: int = 640) -> Path:
+    """Export best.pt -> best.onnx (cạnh file .pt). Đã có bản mới hơn .pt thì bỏ qua."""
+    onnx_path = pt_path.with_suffix(".onnx")
+    if onnx_path.exists() and onnx_path.stat().st_mtime >= pt_path.stat().st_mtime:
+        return onnx_path
+
+    from ultralytics import YOLO
+
+    print("⏳ Export", pt_path, "-> ONNX ...")
+    # dynamic: trục batch không cố định -> chạy nhiều ảnh (nhiều camera / upload) 1 lần
+    exported = YOLO(str(pt_path)).export(format="onnx", imgsz=imgsz, simplify=True, dynamic=True)
+    return Path(exported)
+
+
+def letterbox(image: np.ndarray, size: int) -> tuple[np.ndarray, float, tuple[float, float]]:
+    """Resize giữ tỉ lệ + viền xám 114 về size x size (giống ultralytics)."""
+    h, w = image.shape[:2]
+    ratio = min(size / h, size / w)
+    new_w, new_h = round(w * ratio), round(h * ratio)
+    pad_w, pad_h = (size - new_w) / 2, (size - new_h) / 2
+
+    if (new_w, new_h) != (w, h):
+        image = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    top, bottom = round(pad_h - 0.1), round(pad_h + 0.1)
+    left, right = round(pad_w - 0.1), round(pad_w + 0.1)
+    image = cv2.copyMakeBorder(image, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(114, 114, 114))
+    return image, ratio, (left, top)
+
+
+class OnnxPlateDetector:
+    def __init__(
+        self,
+        onnx_path: Path,
+        imgsz: int = 640,
+        conf: float = 0.3,
+        iou: float = 0.7,
+        threads: int = 0,
+    ):
+        """
+        imgsz: kích thước ảnh vào model (phải trùng lúc export)
+        conf: ngưỡng độ tin cậy, iou: ngưỡng NMS (như mặc định ultralytics)
+        threads: số thread ONNX Runtime (0 = để runtime tự chọn)
+        """
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            str(onnx_path), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        # file export cũ (dynamic=False) có batch cố định = 1
+        self.dynamic_batch = not isinstance(model_input.shape[0], int)
+        self.imgsz = imgsz
+        self.conf = conf
+        self.iou = iou
+
+    def preprocess(self, frame: np.ndarray) -> tuple[np.ndarray, float, tuple[float, float]]:
+        image, ratio, pad = letterbox(frame, self.imgsz)
+        # BGR HWC uint8 -> RGB NCHW float32 0..1
+        blob = image[:, :, ::-1].transpose(2, 0, 1)
+        blob = np.ascontiguousarray(blob, dtype=np.float32)[None] / 255.0
+        return blob, ratio, pad
+
+    def postprocess(
+        self, output: np.ndarray, ratio: float, pad: tuple[float, float], shape: tuple[int, int]
+    ) -> list[tuple[tuple[int, int, int, int], float]]:
+        # YOLOv8: (1, 4 + số lớp, số anchor) -> (số anchor, 4 + số lớp)
+        preds = output[0].T
+        class_scores = preds[:, 4:]
+        class_ids = class_scores.argmax(axis=1)
+        scores = class_scores[np.arange(len(preds)), class_ids]
+
+        keep = scores > self.conf
+        if not keep.any():
+            return []
+        boxes, scores, class_ids = preds[keep, :4], scores[keep], class_ids[keep]
+
+        # cx, cy, w, h (ảnh letterbox) -> x, y, w, h (ảnh gốc)
+        xywh = boxes.copy()
+        xywh[:, 0] = (boxes[:, 0] - boxes[:, 2] / 2 - pad[0]) / ratio
+        xywh[:, 1] = (boxes[:, 1] - boxes[:, 3] / 2 - pad[1]) / ratio
+        xywh[:, 2:] = boxes[:, 2:] / ratio
+
+        idx = cv2.dnn.NMSBoxesBatched(
+            xywh.tolist(), scores.tolist(), class_ids.tolist(), self.conf, self.iou
+        )
+
+        idx = np.array(idx, dtype=int).flatten()
+        idx = idx[np.argsort(-scores[idx])]  # điểm cao trước, giống ultralytics
+
+        h, w = shape
+        located = []
+        for i in idx:
+            x, y, bw, bh = xywh[i]
+            x1, y1 = int(np.clip(x, 0, w)), int(np.clip(y, 0, h))
+            x2, y2 = int(np.clip(x + bw, 0, w)), int(np.clip(y + bh, 0, h))
+            if x2 <= x1 or y2 <= y1:  # bỏ box rỗng
+                continue
+            located.append(((x1, y1, x2, y2), float(scores[i])))
+        return located
+
+    def __call__(self, frame: np.ndarray) -> list[tuple[tuple[int, int, int, int], float]]:
+        blob, ratio, pad = self.preprocess(frame)
+        output = self.session.run(None, {self.input_name: blob})[0]
+        return self.postprocess(output, ratio, pad, frame.shape[:2])
+
+    def batch(self, frames: list[np.ndarray]) -> list[list[tuple[tuple[int, int, int, int], float]]]:
+        """Nhiều frame trong 1 lần session.run (model export với batch động)."""
+        if not self.dynamic_batch or len(frames) == 1:
+            return [self(f) for f in frames]
+        prepared = [self.preprocess(f) for f in frames]
+        blob = np.concatenate([blob for blob, _, _ in prepared])
+        output = self.session.run(None, {self.input_name: blob})[0]
+        return [
+            self.postprocess(output[i:i + 1], ratio, pad, frame.shape[:2])
+            for i, ((_, ratio, pad), frame) in enumerate(zip(prepared, frames))
+        ]
@@ -0,0 +1,228 @@
+# app/streaming/pipeline.py
+"""
+Pipeline nhận diện riêng cho từng camera.
+
+Mỗi camera có thread capture, motion gate, nhịp nhận diện, tracker và
+broadcaster MJPEG của riêng nó; YOLO + OCR thì dùng chung: frame và crop của
+mọi camera được gom lô (locate_batcher, ocr_batcher) rồi chạy ở cùng các
+process nhận diện.
+
+Preview có thể có nhiều cấu hình (annotated / passthrough, chiều rộng, chất
+lượng, xem preview.py): mỗi cấu hình 1 broadcaster, nhưng mỗi frame chỉ được
+đưa vào nhịp nhận diện 1 lần.
+"""
+import threading
+from functools import partial
+
+from . import config
+from .broadcaster import MjpegBroadcaster
+from .camera import CaptureWorker, Frame, PrerollRing
+from .cameras import CameraConfig, cameras
+from .detector import CadencedDetector
+from .jpeg import encode_jpeg
+from .journal import SNAP, STREAM, record
+from .motion import MotionGate
+from .preview import PASSTHROUGH, PreviewProfile, preview_profile, render_passthrough, scale_detections, scaled_image
+from .recognition import PlateDetection, detect_plates, draw_detections
+from .timing import NO_TIMINGS, Timings, metrics
+from .tracker import PlateTracker
+
+
+class CameraPipeline:
+    def __init__(self, camera: CameraConfig):
+        self.camera = camera
+        # giữ JPEG vài giây gần nhất để cắt clip bằng chứng lúc ghi lượt vào / ra (clips.py)
+        preroll = (
+            PrerollRing(config.CLIP_PREROLL_SEC + config.CLIP_POSTROLL_SEC, config.CLIP_FPS, config.CLIP_QUALITY)
+            if config.CLIP_ENABLED
+            else None
+        )
+        # cổng chỉ snap (không ai xem preview): giữ camera chạy để clip có phần trước lúc ghi lượt
+        self.capture = CaptureWorker(
+            camera.source,
+            preroll=preroll,
+            keep_alive=preroll is not None and config.CLIP_KEEP_ALIVE,
+        )
+
+        # Track biển số dùng chung cho livestream + snap của camera này:
+        # mỗi xe chỉ OCR vài lần, kết quả bỏ phiếu qua nhiều frame
+        self.tracker = PlateTracker(
+            iou_threshold=config.TRACK_IOU_THRESHOLD,
+            max_misses=config.TRACK_MAX_MISSES,
+            max_idle_sec=config.TRACK_MAX_IDLE_SEC,
+            min_votes=config.TRACK_MIN_VOTES,
+            converge_ratio=config.TRACK_CONVERGE_RATIO,
+            max_ocr=config.TRACK_MAX_OCR,
+        )
+
+        # Chặn frame làn xe trống trước khi tới YOLO
+        self.gate = (
+            MotionGate(
+                roi=camera.motion_roi,
+                downscale_width=config.MOTION_DOWNSCALE_WIDTH,
+                pixel_threshold=config.MOTION_PIXEL_THRESHOLD,
+                min_changed_ratio=config.MOTION_MIN_CHANGED_RATIO,
+                bg_alpha=config.MOTION_BG_ALPHA,
+                hold_sec=config.MOTION_HOLD_SEC,
+                max_skip_sec=config.MOTION_MAX_SKIP_SEC,
+            )
+            if config.MOTION_GATE_ENABLED
+            else None
+        )
+
+        # YOLO + OCR chạy ở thread riêng theo nhịp cấu hình, preview vẽ lại kết quả gần nhất
+        self.detector = CadencedDetector(
+            self._detect_stream,
+            every_n_frames=config.STREAM_DETECT_EVERY_N_FRAMES,
+            min_interval=config.STREAM_DETECT_MIN_INTERVAL_MS / 1000,
+            max_age=config.STREAM_DETECT_MAX_AGE_SEC,
+            gate=self.gate,
+        )
+
+        # 1 broadcaster / cấu hình preview: mỗi frame chỉ encode 1 lần cho mọi viewer cùng cấu hình
+        self._previews: dict[PreviewProfile, MjpegBroadcaster] = {}
+        self._previews_lock = threading.Lock()
+        # seq frame cuối đã đưa vào detector (nhiều broadcaster cùng đọc 1 camera)
+        self._fed_seq = 0
+        self._fed_lock = threading.Lock()
+
+    def get_capture(self) -> CaptureWorker:
+        """CaptureWorker của camera (đã start). Lỗi mở camera -> RuntimeError."""
+        self.capture._ensure_running()
+        return self.capture
+
+    def detect(self, frame: Frame, timings: Timings = NO_TIMINGS, source: int = SNAP) -> list[PlateDetection]:
+        """
+        YOLO + OCR (qua tracker của camera), ghi biển số đọc được vào nhật ký nhận diện.
+        Snap luôn đọc lại track đã chốt (có thể là xe khác dừng đúng chỗ xe trước).
+        """
+        detections = detect_plates(
+            frame.image,
+            tracker=self.tracker,
+            roi=self.camera.roi,
+            timings=timings,
+            verify=source == SNAP,
+        )
+        record(self.camera.id, detections, source=source, seq=frame.seq)
+        return detections
+
+    def _detect_stream(self, frame: Frame) -> list[PlateDetection]:
+        # thread nhận diện của livestream: đo riêng luồng "stream_detect"
+        timings = metrics.start("stream_detect", self.camera.id)
+        detections = self.detect(frame, timings, source=STREAM)
+        timings.finish()
+        return detections
+
+    def preview(self, profile: PreviewProfile | None = None) -> MjpegBroadcaster:
+        """Broadcaster cho 1 cấu hình preview (tạo khi có viewer đầu tiên)."""
+        profile = profile or preview_profile()
+        with self._previews_lock:
+            broadcaster = self._previews.get(profile)
+            if broadcaster is None:
+                # bỏ broadcaster của các cấu hình không còn ai xem
+                for key, other in list(self._previews.items()):
+                    if not other.viewers and not other.running:
+                        del self._previews[key]
+                broadcaster = MjpegBroadcaster(self.get_capture, partial(self.render_preview, profile=profile))
+                self._previews[profile] = broadcaster
+            return broadcaster
+
+    def _feed_detector(self, frame: Frame):
+        with self._fed_lock:
+            if frame.seq <= self._fed_seq:
+                return
+            self._fed_seq = frame.seq
+        self.detector.submit(frame)
+
+    def render_preview(self, frame: Frame, profile: PreviewProfile = PreviewProfile()) -> bytes | None:
+        """
+        JPEG cho 1 frame livestream theo cấu hình preview. annotated: vẽ khung
+        (kết quả nhận diện gần nhất) rồi encode; passthrough: gửi JPEG gốc của camera.
+        """
+        passthrough = profile.mode == PASSTHROUGH
+        timings = metrics.start("stream_passthrough" if passthrough else "stream", self.camera.id)
+        with timings.stage("gate"):
+            self._feed_detector(frame)
+
+        if passthrough:
+            with timings.stage("encode"):
+                jpg_bytes = render_passthrough(frame, profile)
+            timings.finish()
+            return jpg_bytes
+
+        with timings.stage("annotate"):
+            image = scaled_image(frame, profile.width)
+            # frame trong ring dùng chung -> copy trước khi vẽ khung
+            annotated = image.copy() if frame.decoded and image is frame.image else image
+            result = self.detector.latest()
+            if result is not None:
+                scale = annotated.shape[1] / frame.size[0]
+                draw_detections(annotated, scale_detections(result.detections, scale), result.plate_text)
+
+        with timings.stage("encode"):
+            jpg_bytes = encode_jpeg(annotated, profile.quality or config.STREAM_PREVIEW_QUALITY)
+        timings.finish()
+        return jpg_bytes
+
+    def stop(self):
+        self.capture.stop()
+
+    def stats(self) -> dict:
+        return {
+            "camera": self.camera.public(),
+            "capture": {
+                "running": self.capture.running,
+                "passthrough": self.capture.passthrough,
+                "error": self.capture.error,
+                "keep_alive": self.capture.keep_alive,
+                "restarts": self.capture.restarts,
+                "preroll": self.capture.preroll.stats() if self.capture.preroll is not None else None,
+            },
+            "previews": {p.name: b.stats() for p, b in list(self._previews.items())},
+            "detector": self.detector.stats(),
+            "tracker": self.tracker.stats(),
+        }
+
+
+# ============ REGISTRY ============
+
+# tạo sẵn (chưa mở camera / chưa chạy thread nào cho tới khi có người xem / snap)
+_pipelines: dict[str, CameraPipeline] = {c.id: CameraPipeline(c) for c in cameras}
+
+
+def get_pipeline(camera_id: str) -> CameraPipeline:
+    """Pipeline theo id camera. Không có -> KeyError."""
+    return _pipelines[camera_id]
+
+
+def default_pipeline() -> CameraPipeline:
+    """Camera cho các API cũ không có id (/capture_in...): camera vào đầu tiên."""
+    for camera in cameras:
+        if camera.role == "entry":
+            return _pipelines[camera.id]
+    return _pipelines[cameras[0].id]
+
+
+def all_pipelines() -> list[CameraPipeline]:
+    return list(_pipelines.values())
+
+
+def start_clip_cameras():
+    """
+    Mở sẵn camera giữ clip (CLIP_KEEP_ALIVE) lúc app startup. Lỗi mở camera
+    chỉ báo, không chặn; camera đó được thử mở lại ở nền.
+    """
+    for pipeline in _pipelines.values():
+        if not pipeline.capture.keep_alive:
+            continue
+        try:
+            pipeline.capture.start()
+        except RuntimeError as e:
+            print("❌ Không mở được camera cho clip:", pipeline.camera.id, e)
+            pipeline.capture.schedule_restart()
+
+
+def stop_cameras():
+    """Release mọi camera còn đang mở (lúc app shutdown)."""
+    for pipeline in _pipelines.values():
+        pipeline.stop()
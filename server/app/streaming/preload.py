@@ -0,0 +1,74 @@
+# app/streaming/preload.py
+"""
+Load sẵn trọng số model TRƯỚC khi fork (MODEL_PRELOAD=true).
+
+Mỗi process tự load YOLO + EasyOCR thì mỗi process giữ 1 bản trọng số riêng
+(vài trăm MB). Load 1 lần ở process cha rồi fork: các process con đọc chung
+các trang nhớ chứa trọng số (copy-on-write, chỉ đọc nên không bị chép).
+
+- INFERENCE_MODE=process: InferencePool fork process nhận diện từ 1 forkserver
+  đã import forkserver_preload (load model ở đó). Forkserver phải import được
+  package app (chạy từ thư mục server/ hoặc đặt PYTHONPATH), nếu không process
+  con tự load model như cũ.
+- INFERENCE_MODE=inline : app.main gọi preload_inline() lúc import; chạy
+  `gunicorn app.main:app -k uvicorn.workers.UvicornWorker -w N --preload`
+  để master load model rồi mới fork worker.
+
+Chỉ load trọng số, KHÔNG chạy thử ở process cha: thread pool OpenMP của torch
+không dùng lại được sau fork. Warm-up (MODEL_WARMUP) chạy riêng trong từng
+process con.
+"""
+import gc
+import time
+
+from . import config
+from .threads import configure_torch
+
+# kết quả preload của process này (process con fork ra thấy luôn kết quả của cha)
+report: dict[str, dict] = {}
+
+
+def _load(load) -> dict:
+    try:
+        t0 = time.perf_counter()
+        load()
+    except Exception as e:
+        print("❌ Preload model lỗi:", e)
+        return {"state": "error", "error": str(e)}
+    return {"state": "loaded", "load_ms": round((time.perf_counter() - t0) * 1000, 1)}
+
+
+def _load_detector():
+    import torch
+
+    from .recognition import get_model
+
+    # fuse Conv + BN ngay ở đây: ultralytics fuse lúc predict đầu tiên sẽ tạo
+    # trọng số mới trong từng process con, mất phần dùng chung
+    with torch.no_grad():
+        get_model().model.fuse(verbose=False)
+
+
+def preload_models() -> dict[str, dict]:
+    """Load trọng số YOLO + EasyOCR vào process này (không chạy thử)."""
+    configure_torch()
+    if config.DETECTOR_BACKEND == "onnx":
+        # session ONNX Runtime giữ thread pool riêng, không dùng được sau fork
+        report["detector"] = {"state": "skipped", "reason": "onnx"}
+    else:
+        report["detector"] = _load(_load_detector)
+
+    from .ocr import get_reader
+
+    report["ocr"] = _load(get_reader)
+    # đưa object đã load vào thế hệ "permanent" của GC: GC ở process con không
+    # ghi vào header các object này nữa -> trang nhớ không bị chép ra
+    gc.freeze()
+    print("✅ Preload model trước khi fork:", report)
+    return report
+
+
+def preload_inline():
+    """Gọi lúc import app.main: chế độ inline + MODEL_PRELOAD thì load model ngay."""
+    if config.MODEL_PRELOAD and config.INFERENCE_MODE != "process":
+        preload_models()
@@ -0,0 +1,86 @@
+# app/streaming/preview.py
+"""
+Cấu hình preview theo từng viewer: kiểu (annotated / passthrough), chiều rộng,
+chất lượng JPEG.
+
+- annotated  : vẽ khung biển số lên frame rồi encode JPEG (như trước)
+- passthrough: gửi nguyên bytes JPEG của camera MJPEG (không giải mã, không
+               encode lại); khung biển số đi riêng qua kênh JSON / WebSocket.
+               Chỉ khi viewer xin ảnh nhỏ hơn / chất lượng thấp hơn mới phải
+               giải mã (kiểu reduced, nhanh) + encode.
+
+Mỗi cấu hình khác nhau có 1 broadcaster riêng, viewer cùng cấu hình dùng chung.
+Chiều rộng được làm tròn về các mức STREAM_PREVIEW_WIDTHS để số luồng encode
+không tăng theo số viewer.
+"""
+from dataclasses import dataclass, replace
+
+import cv2
+import numpy as np
+
+from . import config
+from .camera import Frame
+from .jpeg import encode_jpeg
+from .recognition import PlateDetection
+
+ANNOTATED = "annotated"
+PASSTHROUGH = "passthrough"
+MODES = (ANNOTATED, PASSTHROUGH)
+
+
+@dataclass(frozen=True)
+class PreviewProfile:
+    mode: str = ANNOTATED
+    width: int | None = None    # None = cỡ gốc của camera
+    quality: int | None = None  # None = STREAM_PREVIEW_QUALITY (passthrough cỡ gốc: giữ JPEG camera)
+
+    @property
+    def name(self) -> str:
+        return self.mode + (f"@{self.width}" if self.width else "") + (f"q{self.quality}" if self.quality else "")
+
+
+def preview_profile(mode: str | None = None, width: int | None = None, quality: int | None = None) -> PreviewProfile:
+    """Cấu hình preview từ query của viewer. Sai kiểu -> ValueError."""
+    mode = (mode or config.STREAM_PREVIEW_MODE).strip().lower()
+    if mode not in MODES:
+        raise ValueError(f"mode phải là một trong: {', '.join(MODES)}")
+    if width and config.STREAM_PREVIEW_WIDTHS:
+        width = min(config.STREAM_PREVIEW_WIDTHS, key=lambda w: abs(w - width))
+    if quality:
+        # bước 5 để viewer xin 78 / 80 dùng chung 1 luồng encode
+        quality = min(95, max(30, round(quality / 5) * 5))
+    return PreviewProfile(mode=mode, width=width or None, quality=quality or None)
+
+
+def scaled_image(frame: Frame, width: int | None) -> np.ndarray:
+    """
+    Ảnh của frame thu về rộng width (không phóng to). Có thể trả về chính ảnh
+    dùng chung của frame -> phải copy trước khi vẽ.
+    """
+    frame_w, _ = frame.size
+    if not width or width >= frame_w:
+        return frame.image
+    image = frame.downscaled(width)
+    h, w = image.shape[:2]
+    if w != width:
+        image = cv2.resize(image, (width, max(1, round(h * width / w))), interpolation=cv2.INTER_AREA)
+    return image
+
+
+def scale_detections(detections: list[PlateDetection], scale: float) -> list[PlateDetection]:
+    """Đổi box sang toạ độ ảnh preview đã thu nhỏ."""
+    if scale == 1.0:
+        return detections
+    return [replace(d, box=tuple(round(v * scale) for v in d.box)) for d in detections]
+
+
+def render_passthrough(frame: Frame, profile: PreviewProfile) -> bytes | None:
+    """
+    JPEG cho viewer passthrough: cỡ gốc + không đổi chất lượng -> bytes gốc của
+    camera; còn lại (hoặc nguồn không phải MJPEG) thì thu nhỏ + encode, không vẽ gì.
+    """
+    full_size = not profile.width or profile.width >= frame.size[0]
+    if frame.jpeg and full_size and not profile.quality:
+        return frame.jpeg
+    image = scaled_image(frame, profile.width)
+    return encode_jpeg(image, profile.quality or config.STREAM_PREVIEW_QUALITY)
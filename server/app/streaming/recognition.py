@@ -0,0 +1,352 @@
+# app/streaming/recognition.py
+"""
+Nhận diện biển số: YOLO tìm vùng biển số, EasyOCR đọc chữ (theo lô, xem ocr.py).
+Tách riêng bước nhận diện (detect_plates) và bước vẽ (draw_detections)
+để livestream có thể vẽ lại kết quả cũ lên frame mới mà không chạy lại model.
+"""
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from . import config
+from .batcher import MicroBatcher
+from .cameras import cameras
+from .inference import inference_pool
+from .ocr import ocr_batcher
+from .threads import configure_torch
+from .timing import NO_TIMINGS, Timings
+from .tracker import PlateTracker
+
+# ============ MODEL (lazy load) ============
+
+MODEL_PATH = Path("best.pt")
+DETECT_IMGSZ = 640
+DETECT_CONF = 0.3
+
+_model = None
+_model_lock = threading.Lock() # để tránh trường hợp nhiều request cùng load model lúc đầu
+
+
+def get_model():
+  
+  global _model
+  if _model is None:
+      with _model_lock:
+          if _model is None:  # double-check
+              try:
+                  # số thread torch theo ngân sách CPU trước khi load (xem threads.py)
+                  configure_torch()
+                  # import lúc cần: ultralytics kéo theo torch (vài giây, vài trăm MB)
+                  from ultralytics import YOLO
+
+                  _model = YOLO(str(MODEL_PATH))
+                  print("✅ YOLO model loaded.")
+              except Exception as e:
+                  print("❌ Lỗi load YOLO model best.pt:", e)
+                  raise RuntimeError("Không thể load YOLO model") from e
+  return _model
+
+
+_onnx_detector = None
+
+
+def get_onnx_detector():
+    """Detector ONNX Runtime (DETECTOR_BACKEND=onnx), export best.pt nếu chưa có best.onnx."""
+    global _onnx_detector
+    if _onnx_detector is None:
+        with _model_lock:
+            if _onnx_detector is None:
+                try:
+                    from .onnx_detector import OnnxPlateDetector, export_onnx
+
+                    onnx_path = export_onnx(MODEL_PATH, imgsz=DETECT_IMGSZ)
+                    _onnx_detector = OnnxPlateDetector(
+                        onnx_path,
+                        imgsz=DETECT_IMGSZ,
+                        conf=DETECT_CONF,
+                        threads=config.DETECTOR_ONNX_THREADS or configure_torch().threads,
+                    )
+                    print("✅ ONNX detector loaded:", onnx_path)
+                except Exception as e:
+                    print("❌ Lỗi load detector ONNX:", e)
+                    raise RuntimeError("Không thể load detector ONNX") from e
+    return _onnx_detector
+
+
+# ============ DETECT ============
+
+@dataclass(frozen=True)
+class PlateDetection:
+    box: tuple[int, int, int, int]  # x1, y1, x2, y2 trên frame gốc
+    score: float                    # độ tin cậy YOLO
+    text: str | None = None         # biển số OCR đọc được trong box (đã chuẩn hóa)
+    confidence: float = 0.0         # độ tin cậy OCR 0..1 (có tracker: tỉ lệ phiếu bầu)
+    track_id: int | None = None     # id track (khi chạy kèm PlateTracker)
+    stable: bool = False            # track đã chốt biển số, không OCR nữa
+    fresh: bool = True              # text vừa OCR ở lần nhận diện này (False: kết quả bỏ phiếu cũ của track)
+
+
+@dataclass(frozen=True)
+class DetectionRegion:
+    """Ảnh đưa vào YOLO (đã cắt ROI / thu nhỏ) + cách đổi box về toạ độ frame gốc."""
+    image: np.ndarray
+    offset: tuple[int, int]      # góc trên-trái vùng ROI trên frame gốc
+    scale: float                 # kích thước ảnh đưa vào / kích thước vùng ROI
+    frame_size: tuple[int, int]  # (w, h) frame gốc
+
+    def to_frame(self, box: tuple[int, int, int, int]) -> tuple[int, int, int, int]:
+        ox, oy = self.offset
+        w, h = self.frame_size
+        x1, y1, x2, y2 = (round(v / self.scale) for v in box)
+        return (
+            min(max(ox + x1, 0), w),
+            min(max(oy + y1, 0), h),
+            min(max(ox + x2, 0), w),
+            min(max(oy + y2, 0), h),
+        )
+
+
+def detection_region(frame, roi=None, max_side: int = 0) -> DetectionRegion:
+    """
+    Cắt ROI (x, y, w, h theo tỉ lệ 0..1) rồi thu nhỏ để cạnh dài <= max_side.
+    Camera cổng thấy nhiều trời / mặt đường: YOLO chỉ cần xử lý làn xe.
+    """
+    h, w = frame.shape[:2]
+    x1, y1, x2, y2 = 0, 0, w, h
+    if roi is not None:
+        rx, ry, rw, rh = roi
+        x1, y1 = int(rx * w), int(ry * h)
+        x2 = min(w, max(x1 + 1, int((rx + rw) * w)))
+        y2 = min(h, max(y1 + 1, int((ry + rh) * h)))
+    image = frame[y1:y2, x1:x2]
+
+    scale = 1.0
+    long_side = max(x2 - x1, y2 - y1)
+    if max_side and long_side > max_side:
+        scale = max_side / long_side
+        size = (max(1, round((x2 - x1) * scale)), max(1, round((y2 - y1) * scale)))
+        image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+    return DetectionRegion(image=image, offset=(x1, y1), scale=scale, frame_size=(w, h))
+
+
+def locate_plates(frame) -> list[tuple[tuple[int, int, int, int], float]]:
+    """Chỉ chạy YOLO: [(box, score)] các vùng nghi biển số (bỏ box rỗng)."""
+    if config.DETECTOR_BACKEND == "onnx":
+        return get_onnx_detector()(frame)
+    return locate_plates_torch(frame)
+
+
+def locate_plates_torch(frame) -> list[tuple[tuple[int, int, int, int], float]]:
+    model = get_model()
+
+    results = model(frame, imgsz=DETECT_IMGSZ, conf=DETECT_CONF)
+    located = []
+
+    for r in results:
+        located.extend(_boxes_of(frame, r))
+
+    return located
+
+
+def _boxes_of(frame, result) -> list[tuple[tuple[int, int, int, int], float]]:
+    located = []
+    for box in result.boxes:
+        x1, y1, x2, y2 = map(int, box.xyxy[0].tolist()) # Cắt vùng nghi biển số từ ảnh gốc
+        if frame[y1:y2, x1:x2].size == 0: # bỏ qua nếu vùng cắt rỗng
+            continue
+        located.append(((x1, y1, x2, y2), float(box.conf[0])))
+    return located
+
+
+def locate_plates_batch(frames: list) -> list[list[tuple[tuple[int, int, int, int], float]]]:
+    """locate_plates() cho nhiều frame (nhiều camera) trong 1 lần chạy model."""
+    if config.DETECTOR_BACKEND == "onnx":
+        return get_onnx_detector().batch(frames)
+    if len(frames) == 1:
+        return [locate_plates_torch(frames[0])]
+
+    # ultralytics letterbox từng ảnh rồi chạy cả lô 1 lần
+    results = get_model()(frames, imgsz=DETECT_IMGSZ, conf=DETECT_CONF)
+    return [_boxes_of(frame, r) for frame, r in zip(frames, results)]
+
+
+def run_locate(frame) -> list[tuple[tuple[int, int, int, int], float]]:
+    """locate_plates() ở process nhận diện (hoặc ngay tại chỗ nếu INFERENCE_MODE=inline)."""
+    if inference_pool is None:
+        return locate_plates(frame)
+    return inference_pool.call("locate", frame)
+
+
+def run_locate_batch(frames: list) -> list[list[tuple[tuple[int, int, int, int], float]]]:
+    if inference_pool is None:
+        return locate_plates_batch(frames)
+    return inference_pool.call("locate_batch", frames)
+
+
+# Frame từ mọi camera (livestream + snap) gom thành lô YOLO, dùng chung process nhận diện
+locate_batcher = MicroBatcher(
+    run_locate_batch,
+    window_ms=config.DETECT_BATCH_WINDOW_MS,
+    # đủ 1 frame / camera thì chạy luôn, không chờ hết cửa sổ
+    max_batch=min(config.DETECT_BATCH_MAX_SIZE, len(cameras)),
+    # mỗi process nhận diện chạy 1 lô cùng lúc
+    threads=config.INFERENCE_WORKERS if inference_pool is not None else 1,
+    name="locate-batcher",
+)
+
+
+def _boxes_in_frame(region: DetectionRegion, boxes) -> list[tuple[tuple[int, int, int, int], float]]:
+    """Box YOLO trên ảnh region -> toạ độ frame gốc (bỏ box rỗng sau khi kẹp)."""
+    located = []
+    for box, score in boxes:
+        box = region.to_frame(box)
+        if box[2] > box[0] and box[3] > box[1]:
+            located.append((box, score))
+    return located
+
+
+def detect_plates(
+    frame,
+    tracker: PlateTracker | None = None,
+    roi=config.DETECT_ROI,
+    max_side: int = config.DETECT_MAX_SIDE,
+    timings: Timings = NO_TIMINGS,
+    verify: bool = False,
+) -> list[PlateDetection]:
+    """
+    Chạy YOLO + OCR trên frame, KHÔNG vẽ gì lên frame
+    (frame có thể là ảnh dùng chung trong ring buffer).
+    Mỗi box 1 kết quả riêng -> 2 xe trong khung hình không bị ghép thành 1 biển.
+
+    YOLO chỉ chạy trên vùng ROI (đã thu nhỏ), box được đổi về toạ độ frame gốc;
+    crop cho OCR cắt từ frame gốc nên không mất độ phân giải.
+
+    Có tracker: chỉ OCR những track chưa chốt biển số, text trả về là kết quả
+    bỏ phiếu qua nhiều frame của track đó. verify (snap): OCR lại cả track đã
+    chốt, chữ khác thì tách track (PlateTracker.add_read).
+
+    timings: bấm giờ bước region / detect / ocr (xem timing.py).
+    """
+    with timings.stage("region"):
+        region = detection_region(frame, roi, max_side)
+    with timings.stage("detect"):
+        located = _boxes_in_frame(region, locate_batcher.submit([region.image])[0])
+
+    def crop(box):
+        x1, y1, x2, y2 = box
+        return frame[y1:y2, x1:x2]
+
+    if tracker is None:
+        # OCR mọi crop trong 1 lần gọi (gộp chung lô với thread / camera khác)
+        with timings.stage("ocr"):
+            reads = ocr_batcher.read([crop(b) for b, _ in located])
+        return [
+            PlateDetection(box=b, score=score, text=read.text, confidence=read.confidence)
+            for (b, score), read in zip(located, reads)
+        ]
+
+    tracks = tracker.update(located)
+    pending = [t for t in tracks if tracker.needs_ocr(t, verify)]
+    with timings.stage("ocr"):
+        reads = ocr_batcher.read([crop(t.box) for t in pending])
+    voted = {}
+    for track, read in zip(pending, reads):
+        voted[track.id] = tracker.add_read(track, read.text, read.confidence)
+    tracks = [voted.get(t.id, t) for t in tracks]
+
+    return [
+        PlateDetection(
+            box=track.box,
+            score=track.score,
+            text=track.text,
+            confidence=track.confidence,
+            track_id=track.id,
+            stable=tracker.is_stable(track),
+            fresh=track.id in voted,
+        )
+        for track in tracks
+    ]
+
+
+def detect_plates_batch(
+    frames: list,
+    roi=None,
+    max_side: int = config.DETECT_MAX_SIDE,
+    timings: Timings = NO_TIMINGS,
+) -> list[list[PlateDetection]]:
+    """
+    Nhận diện nhiều ảnh độc lập (ảnh upload từ thiết bị cổng, không tracker):
+    cả request chạy 1 lô YOLO rồi 1 lô OCR cho mọi crop, không lặp từng ảnh.
+    """
+    if not frames:
+        return []
+    with timings.stage("region"):
+        regions = [detection_region(f, roi, max_side) for f in frames]
+    with timings.stage("detect"):
+        located = [
+            _boxes_in_frame(region, boxes)
+            for region, boxes in zip(regions, locate_batcher.submit([r.image for r in regions]))
+        ]
+
+    crops = [f[y1:y2, x1:x2] for f, boxes in zip(frames, located) for (x1, y1, x2, y2), _ in boxes]
+    with timings.stage("ocr"):
+        reads = iter(ocr_batcher.read(crops))
+
+    return [
+        [
+            PlateDetection(box=b, score=score, text=read.text, confidence=read.confidence)
+            for (b, score), read in zip(boxes, reads)
+        ]
+        for boxes in located
+    ]
+
+
+def plate_text_of(detections: list[PlateDetection]) -> str | None:
+    """Biển số chính của frame: ưu tiên track đã chốt, rồi tới độ tin cậy OCR cao nhất."""
+    readable = [d for d in detections if d.text]
+    if not readable:
+        return None
+    return max(readable, key=lambda d: (d.stable, d.confidence, d.score)).text
+
+
+def draw_detections(frame, detections: list[PlateDetection], plate_text: str | None):
+    """Vẽ khung + text lên frame (frame phải là bản copy)."""
+    for d in detections:
+        x1, y1, x2, y2 = d.box
+        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+        if d.text:
+            cv2.putText(
+                frame,
+                d.text,
+                (x1, max(15, y1 - 8)),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                0.6,
+                (0, 255, 0),
+                2,
+                cv2.LINE_AA,
+            )
+
+    if plate_text:
+        cv2.putText(
+            frame,
+            plate_text,
+            (20, 40),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            1.2,
+            (0, 255, 0),
+            2,
+            cv2.LINE_AA,
+        )
+
+    return frame
+
+
+def detect_plate_in_frame(frame):
+    """Nhận diện + vẽ trực tiếp lên frame. Trả về (plate_text, frame)."""
+    detections = detect_plates(frame)
+    plate_text = plate_text_of(detections)
+    return plate_text, draw_detections(frame, detections, plate_text)
@@ -1,232 +1,461 @@
-
-
+# app/streaming/routes.py
+import asyncio
 import base64
-import threading
-from pathlib import Path
-import re
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
 
 import cv2
-import easyocr
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import StreamingResponse
-from ultralytics import YOLO
+import numpy as np
+from fastapi import APIRouter, Body, File, HTTPException, Query, UploadFile, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from . import config
+
+from .clips import clip_frame, clip_video, clip_writer, list_clips
+from .detector import DetectionResult
+from .inference import InferenceBusy, InferenceTimeout, inference_pool
+from .journal import SOURCES as JOURNAL_SOURCES, JournalQuery, journal
+from .memory import memory_report, parent_pid, sibling_workers
+from .ocr import ocr_batcher
+from .pipeline import CameraPipeline, all_pipelines, default_pipeline, get_pipeline
+from .preview import PreviewProfile, preview_profile
+from .recognition import (
+    PlateDetection,
+    detect_plates_batch,
+    draw_detections,
+    locate_batcher,
+    plate_text_of,
+)
+from .timing import metrics
+from .warmup import readiness
 
 router = APIRouter(prefix="/streaming", tags=["Parking - Capture"])
 
-# ============ MODEL & OCR (lazy load) ============
-
-MODEL_PATH = Path("best.pt")
-
-_model = None
-_reader = None
-_model_lock = threading.Lock() # để tránh trường hợp nhiều request cùng load model lúc đầu
-
-_reader_lock = threading.Lock()
-
-
-def get_model():
-  
-  global _model
-  if _model is None:
-      with _model_lock:
-          if _model is None:  # double-check
-              try:
-                  _model = YOLO(str(MODEL_PATH))
-                  print("✅ YOLO model loaded.")
-              except Exception as e:
-                  print("❌ Lỗi load YOLO model best.pt:", e)
-                  raise RuntimeError("Không thể load YOLO model") from e
-  return _model
 
+def _pipeline(camera_id: str) -> CameraPipeline:
+    try:
+        return get_pipeline(camera_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Không có camera '{camera_id}'")
 
-def get_reader():
- 
-  global _reader
-  if _reader is None:
-      with _reader_lock:
-          if _reader is None:
-              try:
-                  _reader = easyocr.Reader(["en"], gpu=False)
-                  print("✅ EasyOCR reader loaded.")
-              except Exception as e:
-                  print("❌ Lỗi khởi tạo EasyOCR:", e)
-                  raise RuntimeError("Không thể khởi tạo EasyOCR") from e
-  return _reader
 
+# ============ LIVESTREAM ============
 
+def _profile(mode: str | None, width: int | None, quality: int | None) -> PreviewProfile:
+    try:
+        return preview_profile(mode, width, quality)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
-cap = None  # đối tượng VideoCapture dùng chung
-cam_lock = threading.Lock()  # lock để tránh 2 thread đọc camera cùng lúc
+def _stream(pipeline: CameraPipeline, profile: PreviewProfile):
+    """
+    Stream MJPEG cho 1 viewer từ broadcaster của camera (theo cấu hình preview).
+    Viewer ngắt kết nối chỉ giảm refcount, không release camera của người khác;
+    camera được release khi thread capture hết người dùng (idle).
+    """
+    try:
+        # mở camera ngay tại đây để lỗi trả về 500 thay vì stream rỗng
+        pipeline.get_capture()
+        return StreamingResponse(
+            pipeline.preview(profile).stream(),
+            media_type="multipart/x-mixed-replace; boundary=frame",
+        )
+    except RuntimeError as e:
+        # lỗi mở camera / lỗi load model / ocr
+        raise HTTPException(status_code=500, detail=str(e))
+    except Exception as e:
+        print("Lỗi stream:", e)
+        raise HTTPException(
+            status_code=500,
+            detail="Lỗi không xác định khi livestream camera",
+        )
 
 
-def get_camera():
-    
-    global cap
-    if cap is None or not cap.isOpened():
-        cap = cv2.VideoCapture(0)
-        if not cap.isOpened():
-            cap.release()
-            cap = None
-            raise RuntimeError("Không mở được camera")
-    return cap
+@router.get("/cameras")
+def list_cameras():
+    """Danh sách camera (id, vai trò vào / ra, bãi xe) để frontend chọn làn."""
+    return [p.camera.public() | {"running": p.capture.running} for p in all_pipelines()]
 
 
+@router.get("/cameras/{camera_id}/stream")
+def camera_stream(
+    camera_id: str,
+    mode: str | None = None,
+    width: int | None = None,
+    quality: int | None = None,
+):
+    """
+    Livestream 1 camera để hiển thị ở frontend (thẻ <img>).
+    mode: "annotated" (vẽ khung trên server) / "passthrough" (JPEG gốc của camera,
+    khung lấy ở /cameras/{id}/detections); width: chiều rộng preview; quality: JPEG 30..95.
+    """
+    return _stream(_pipeline(camera_id), _profile(mode, width, quality))
 
 
-def detect_plate_in_frame(frame):
-    model = get_model()
-    reader = get_reader()
+@router.get("/capture_in")
+def capture_in_stream(mode: str | None = None, width: int | None = None, quality: int | None = None):
+    """Livestream camera vào mặc định (API cũ, trước khi có nhiều camera)."""
+    return _stream(default_pipeline(), _profile(mode, width, quality))
 
-    results = model(frame, imgsz=640, conf=0.3)
-    all_texts = []
 
-    for r in results:
-        for box in r.boxes:
-            x1, y1, x2, y2 = map(int, box.xyxy[0].tolist()) # Cắt vùng nghi biển số từ ảnh gốc
-            plate = frame[y1:y2, x1:x2]
+def _detections_json(pipeline: CameraPipeline, result: DetectionResult | None) -> dict:
+    """Khung biển số gần nhất cho frontend tự vẽ lên preview passthrough."""
+    if result is None:
+        # chưa có / kết quả đã quá hạn -> frontend xoá khung
+        return {"camera_id": pipeline.camera.id, "frame_seq": None, "plate_number": None, "plates": []}
+    width, height = result.size
+    return {
+        "camera_id": pipeline.camera.id,
+        "frame_seq": result.frame_seq,
+        "age_ms": round((time.monotonic() - result.ts) * 1000),
+        # box theo toạ độ frame gốc width x height, frontend tự đổi theo cỡ hiển thị
+        "width": width,
+        "height": height,
+        "plate_number": result.plate_text,
+        "plates": [_plate_json(d) for d in result.detections],
+    }
 
-            if plate.size == 0: # bỏ qua nếu vùng cắt rỗng
-                continue
 
-            # texts: list các chuỗi OCR (thường theo từng dòng / cụm chữ)
-            texts = reader.readtext(plate, detail=0)
-            if texts:
-                all_texts.extend(texts)
+@router.get("/cameras/{camera_id}/detections")
+def camera_detections(camera_id: str):
+    """Kết quả nhận diện gần nhất của livestream (JSON, cho client polling)."""
+    pipeline = _pipeline(camera_id)
+    return _detections_json(pipeline, pipeline.detector.latest())
 
-            # vẽ khung
-            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
 
-    if all_texts:
-        # Ghép các dòng/cụm lại với 1 dấu cách giữa các phần
-        # Ví dụ: ["73-K9", "9999"] -> "73-K9 9999"
-        raw_text = " ".join(t.strip() for t in all_texts if t.strip())
+@router.websocket("/cameras/{camera_id}/detections/ws")
+async def camera_detections_ws(websocket: WebSocket, camera_id: str):
+    """
+    Đẩy kết quả nhận diện mỗi khi có (cùng dạng JSON với GET .../detections)
+    để frontend vẽ khung lên preview passthrough. Kết quả chỉ có khi camera
+    đang được xem (preview chạy nhịp nhận diện).
+    """
+    try:
+        pipeline = get_pipeline(camera_id)
+    except KeyError:
+        await websocket.close(code=1008, reason=f"Không có camera '{camera_id}'")
+        return
+    await websocket.accept()
+
+    detector = pipeline.detector
+    # client không gửi gì, chỉ chờ để biết lúc client đóng kết nối
+    closed = asyncio.ensure_future(websocket.receive())
+    latest = detector.latest()
+    last_ts, showing = (latest.ts, True) if latest is not None else (0.0, False)
+    try:
+        await websocket.send_json(_detections_json(pipeline, latest))
+        while not closed.done():
+            result = await run_in_threadpool(detector.wait_result, last_ts, 1.0)
+            if result is not None:
+                last_ts, showing = result.ts, True
+                await websocket.send_json(_detections_json(pipeline, result))
+            elif showing and detector.latest() is None:
+                showing = False
+                await websocket.send_json(_detections_json(pipeline, None))
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        closed.cancel()
 
-        # Chuẩn hóa lại khoảng trắng (phòng khi OCR trả nhiều khoảng trắng)
-        plate_text = re.sub(r"\s+", " ", raw_text).strip()
-        
-        plate_text = plate_text.upper()
 
-        if plate_text == "":
-            plate_text = None
-    else:
-        plate_text = None
+@router.get("/stats")
+def streaming_stats():
+    """Số liệu livestream từng camera: viewer, nhịp nhận diện, frame bị motion gate chặn."""
+    return {
+        "cameras": {p.camera.id: p.stats() for p in all_pipelines()},
+        "locate": locate_batcher.stats(),
+        "ocr": ocr_batcher.stats(),
+        "ocr_cache": ocr_batcher.cache.stats() if ocr_batcher.cache is not None else None,
+        "inference": inference_pool.stats() if inference_pool is not None else None,
+        "clips": clip_writer.stats(),
+    }
 
-    if plate_text:
-        cv2.putText(
-            frame,
-            plate_text,
-            (20, 40),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            1.2,
-            (0, 255, 0),
-            2,
-            cv2.LINE_AA,
-        )
 
-    return plate_text, frame
+@router.get("/metrics")
+def streaming_metrics():
+    """
+    Histogram thời gian từng bước (N mẫu gần nhất) theo luồng / camera:
+    snap (API chụp), stream / stream_passthrough (mỗi frame preview theo kiểu),
+    stream_detect (YOLO + OCR của livestream).
+    """
+    return metrics.snapshot()
 
 
+@router.get("/memory")
+def streaming_memory():
+    """
+    RAM từng process (riêng / dùng chung): process API này, các worker API cùng
+    master (gunicorn) và các process nhận diện - để xem MODEL_PRELOAD tiết kiệm bao nhiêu.
+    """
+    workers = {"api": [os.getpid()], "api_sibling": sibling_workers()}
+    if inference_pool is not None:
+        workers["inference"] = inference_pool.worker_pids()
+        if inference_pool.preload and workers["inference"]:
+            # forkserver giữ bản trọng số mà các process nhận diện dùng chung
+            workers["forkserver"] = [parent_pid(workers["inference"][0])]
+    return {
+        "preload": config.MODEL_PRELOAD,
+        "mode": config.INFERENCE_MODE,
+        **memory_report(workers),
+    }
 
-# ============ LIVESTREAM ============
 
-def gen_frames():
+@router.get("/ready")
+def streaming_ready():
     """
-    Đọc camera liên tục, stream MJPEG.
-    Camera được mở khi có client, và sẽ được release khi stream kết thúc.
+    Model nhận diện đã load + chạy thử xong chưa (MODEL_WARMUP=true).
+    200 khi sẵn sàng (hoặc tắt warm-up), 503 khi đang warm-up / lỗi; body có thời gian từng model.
     """
-    global cap
+    status = readiness()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
 
-    cam = get_camera()
-
-    try:
-        while True:
-            # đọc frame dưới lock để tránh xung đột với API snap
-            with cam_lock:
-                ok, frame = cam.read()
-            if not ok or frame is None:
-                break
-
-            # YOLO + OCR + vẽ khung
-            _, annotated = detect_plate_in_frame(frame)
-
-            ret, buffer = cv2.imencode(".jpg", annotated)
-            if not ret:
-                continue
-            jpg_bytes = buffer.tobytes()
-
-            yield (
-                b"--frame\r\n"
-                b"Content-Type: image/jpeg\r\n\r\n" + jpg_bytes + b"\r\n"
-            )
-    finally:
-        # Khi client đóng kết nối → vòng while thoát → giải phóng camera
-        with cam_lock:
-            if cap is not None and cap.isOpened():
-                cap.release()
-                cap = None
-                print("✅ Camera released (stream ended)")
 
+# ============ SNAP + OCR ============
 
-@router.get("/capture_in")
-def capture_in_stream():
-    """Livestream camera để hiển thị ở frontend (thẻ <img>)."""
+@contextmanager
+def _model_errors():
+    """Lỗi chạy YOLO / OCR -> mã HTTP."""
     try:
-        return StreamingResponse(
-            gen_frames(),
-            media_type="multipart/x-mixed-replace; boundary=frame",
-        )
+        yield
+    except InferenceBusy as e:
+        # hàng đợi model đầy -> trả lỗi ngay để client thử lại, không xếp hàng thêm
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except InferenceTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except RuntimeError as e:
-        # lỗi mở camera / lỗi load model / ocr
+        # lỗi load model / ocr
         raise HTTPException(status_code=500, detail=str(e))
-    except Exception as e:
-        print("Lỗi stream:", e)
-        raise HTTPException(
-            status_code=500,
-            detail="Lỗi không xác định khi livestream camera",
-        )
 
 
-# ============ SNAP + OCR ============
+def _plate_json(d: PlateDetection, image=None) -> dict:
+    """1 biển trong khung hình; có image thì kèm crop biển số (JPEG base64)."""
+    plate = {
+        "plate_number": d.text,
+        "confidence": d.confidence,
+        "box": list(d.box),
+        "track_id": d.track_id,
+        "stable": d.stable,
+    }
+    if image is not None:
+        x1, y1, x2, y2 = d.box
+        ok, buffer = cv2.imencode(".jpg", image[y1:y2, x1:x2])
+        plate["score"] = d.score
+        plate["crop_base64"] = base64.b64encode(buffer.tobytes()).decode("utf-8") if ok else None
+    return plate
 
-@router.post("/capture_in_snap")
-def capture_in_snap():
+
+def _snap(pipeline: CameraPipeline, with_timings: bool = False):
     """
-    Chụp 1 frame từ camera chung, đọc biển số, trả về text + ảnh base64.
+    Lấy frame mới nhất từ thread capture của camera, đọc biển số,
+    trả về text + ảnh base64 (+ thời gian từng bước nếu with_timings).
     """
-    global cap
-
+    timings = metrics.start("snap", pipeline.camera.id, force=with_timings)
     try:
-        cam = get_camera()
+        with timings.stage("read"):
+            frame = pipeline.get_capture().latest_frame()
     except RuntimeError as e:
+        # lỗi mở camera / không có frame
         raise HTTPException(status_code=500, detail=str(e))
 
-    # đọc 1 frame dưới lock
-    with cam_lock:
-        ok, frame = cam.read()
-
-    if not ok or frame is None:
-        raise HTTPException(
-            status_code=500,
-            detail="Không đọc được frame từ camera",
-        )
-
-    try:
-        plate_text, annotated = detect_plate_in_frame(frame)
-    except RuntimeError as e:
-        # lỗi load model / ocr
-        raise HTTPException(status_code=500, detail=str(e))
+    with _model_errors():
+        detections = pipeline.detect(frame, timings)
 
+    plate_text = plate_text_of(detections)
     if not plate_text:
+        # snap không thấy biển vẫn tính vào histogram (thường là lần chậm cần soi)
+        timings.finish()
         raise HTTPException(status_code=404, detail="Không tìm thấy biển số")
 
-    ok, buffer = cv2.imencode(".jpg", annotated)
+    with timings.stage("annotate"):
+        annotated = draw_detections(frame.image.copy(), detections, plate_text)
+    with timings.stage("encode"):
+        ok, buffer = cv2.imencode(".jpg", annotated)
     if not ok:
         raise HTTPException(status_code=500, detail="Không encode được ảnh")
 
-    img_b64 = base64.b64encode(buffer.tobytes()).decode("utf-8")
+    with timings.stage("base64"):
+        img_b64 = base64.b64encode(buffer.tobytes()).decode("utf-8")
+    timings.finish()
+    camera = pipeline.camera
 
-    return {
+    response = {
         "plate_number": plate_text,
         "image_base64": img_b64,
+        # làn chụp: frontend biết ghi lượt vào hay ra, ở bãi nào
+        "camera_id": camera.id,
+        "role": camera.role,
+        "parking_area_id": camera.parking_area_id,
+        # từng xe trong khung hình (biển chính = plate_number)
+        "plates": [_plate_json(d) for d in detections if d.text],
     }
+    if with_timings:
+        # ms từng bước: read / region / detect / ocr / annotate / encode / base64 / total
+        response["timings"] = timings.as_dict()
+    return response
+
+
+@router.post("/cameras/{camera_id}/snap")
+def camera_snap(camera_id: str, timings: bool = False):
+    """Chụp + đọc biển số ở 1 camera. ?timings=true: kèm thời gian từng bước."""
+    return _snap(_pipeline(camera_id), timings)
+
+
+@router.post("/capture_in_snap")
+def capture_in_snap(timings: bool = False):
+    """Chụp + đọc biển số ở camera vào mặc định (API cũ)."""
+    return _snap(default_pipeline(), timings)
+
+
+# ============ NHẬN DIỆN ẢNH UPLOAD ============
+
+def _decode_upload(data: bytes):
+    """Bytes JPEG / PNG -> ảnh BGR. Lỗi -> HTTPException (400 / 413)."""
+    if len(data) > config.RECOGNIZE_MAX_IMAGE_MB * 1024 * 1024:
+        raise HTTPException(status_code=413, detail="Ảnh quá lớn")
+    image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR) if data else None
+    if image is None:
+        raise HTTPException(status_code=400, detail="Ảnh không hợp lệ (cần JPEG / PNG)")
+    return image
+
+
+def _recognize(images: list, roi: str | None, with_crops: bool, timings) -> list[dict]:
+    with _model_errors():
+        results = detect_plates_batch(images, roi=config.parse_roi(roi), timings=timings)
+    return [
+        {
+            "plate_number": plate_text_of(detections),
+            "plates": [_plate_json(d, image if with_crops else None) for d in detections if d.text],
+        }
+        for image, detections in zip(images, results)
+    ]
+
+
+@router.post("/recognize")
+def recognize_image(
+    data: bytes = Body(..., media_type="image/jpeg"),
+    roi: str | None = None,
+    crops: bool = True,
+    timings: bool = False,
+):
+    """
+    Đọc biển số trên 1 ảnh do thiết bị cổng gửi lên (body = bytes JPEG),
+    không cần camera gắn vào server. roi: "x,y,w,h" (0..1) vùng làn xe.
+    """
+    t = metrics.start("upload", "", force=timings)
+    image = _decode_upload(data)
+    result = _recognize([image], roi, crops, t)[0]
+    t.finish()
+    if timings:
+        result["timings"] = t.as_dict()
+    return result
+
+
+@router.post("/recognize/batch")
+def recognize_batch(
+    files: list[UploadFile] = File(...),
+    roi: str | None = None,
+    crops: bool = True,
+    timings: bool = False,
+):
+    """
+    Nhiều ảnh trong 1 request multipart (field "files"): cả lô chạy 1 lần YOLO
+    + 1 lần OCR. Ảnh lỗi chỉ báo lỗi ở phần tử đó, các ảnh khác vẫn đọc.
+    """
+    if len(files) > config.RECOGNIZE_MAX_BATCH:
+        raise HTTPException(
+            status_code=413, detail=f"Tối đa {config.RECOGNIZE_MAX_BATCH} ảnh mỗi request"
+        )
+
+    t = metrics.start("upload_batch", "", force=timings)
+    items: list[dict] = []
+    images = []
+    for f in files:
+        item = {"filename": f.filename}
+        try:
+            images.append(_decode_upload(f.file.read()))
+        except HTTPException as e:
+            item["error"] = e.detail
+        items.append(item)
+
+    results = iter(_recognize(images, roi, crops, t))
+    for item in items:
+        if "error" not in item:
+            item.update(next(results))
+    t.finish()
+
+    response = {"count": len(items), "results": items}
+    if timings:
+        response["timings"] = t.as_dict()
+    return response
+
+
+# ============ NHẬT KÝ NHẬN DIỆN ============
+
+@router.get("/journal")
+def journal_events(
+    camera_id: str | None = None,
+    plate: str | None = None,
+    track_id: int | None = None,
+    source: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    limit: int = Query(100, ge=1, le=5000),
+):
+    """
+    Biển số camera đã đọc (mới nhất trước), để đối chiếu với lượt vào / ra nhân
+    viên đã ghi. plate: khớp 1 phần, không phân biệt "-", ".", dấu cách;
+    source: stream / snap; since / until: ISO 8601.
+    """
+    if journal is None:
+        raise HTTPException(status_code=404, detail="Nhật ký nhận diện đang tắt (JOURNAL_ENABLED)")
+    codes = {name: code for code, name in JOURNAL_SOURCES.items()}
+    if source is not None and source not in codes:
+        raise HTTPException(status_code=400, detail=f"source phải là: {', '.join(codes)}")
+
+    q = JournalQuery(
+        camera=camera_id,
+        plate=plate,
+        track_id=track_id,
+        source=codes.get(source),
+        since=since.timestamp() if since else None,
+        until=until.timestamp() if until else None,
+        limit=limit,
+    )
+    events = journal.query(q)
+    return {"count": len(events), "events": events}
+
+
+@router.get("/journal/stats")
+def journal_stats():
+    """Số segment / bản ghi / dung lượng nhật ký, segment process này đang ghi."""
+    return journal.stats() if journal is not None else {"enabled": False}
+
+
+# ============ CLIP BẰNG CHỨNG ============
+
+@router.get("/clips/{log_id}")
+def log_clips(log_id: int):
+    """Clip camera quay lúc xe vào / ra của 1 lượt gửi xe (Log.id)."""
+    return {"log_id": log_id, "clips": list_clips(log_id)}
+
+
+@router.get("/clips/{log_id}/{name}")
+def log_clip_video(log_id: int, name: str):
+    """File clip (JPEG nối liền, MJPEG) để tải về / mở bằng ffplay, VLC."""
+    path = clip_video(log_id, name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Không có clip")
+    return FileResponse(path, media_type="video/x-motion-jpeg", filename=f"{log_id}-{name}.mjpeg")
+
+
+@router.get("/clips/{log_id}/{name}/frames/{index}")
+def log_clip_frame(log_id: int, name: str, index: int):
+    """1 ảnh trong clip, index 0 .. frame_count - 1 (theo GET /clips/{log_id})."""
+    jpeg = clip_frame(log_id, name, index)
+    if jpeg is None:
+        raise HTTPException(status_code=404, detail="Không có frame")
+    return Response(content=jpeg, media_type="image/jpeg")
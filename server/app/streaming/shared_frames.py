@@ -0,0 +1,143 @@
+# app/streaming/shared_frames.py
+"""
+Chuyển frame sang process nhận diện qua shared memory thay vì pickle.
+
+Pickle 1 frame 1080p (~6 MB) qua pipe tốn vài ms mỗi chiều. Ở đây process API
+giữ sẵn vài slot SharedMemory: frame được chép 1 lần vào slot, qua queue chỉ
+gửi SharedFrame (tên slot + shape), process con dựng numpy view trên chính
+vùng nhớ đó (không copy). Slot được trả lại khi job xong.
+
+Chỉ frame lớn (>= min_bytes) mới vào slot; crop biển số vài chục KB pickle còn
+rẻ hơn giữ 1 slot vài MB. Số slot bị kẹp theo dung lượng trống của /dev/shm
+(Docker mặc định 64 MB): vượt quá thì process bị SIGBUS khi ghi vào slot.
+"""
+import os
+import threading
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class SharedFrame:
+    name: str                # tên SharedMemory của slot
+    shape: tuple[int, ...]
+    dtype: str
+
+
+def shm_free_bytes(path: str = "/dev/shm") -> int | None:
+    """Dung lượng trống của /dev/shm; không đọc được (không phải Linux) -> None."""
+    try:
+        st = os.statvfs(path)
+    except OSError:
+        return None
+    return st.f_bavail * st.f_frsize
+
+
+class SharedFramePool:
+    def __init__(
+        self,
+        slots: int = 4,
+        slot_bytes: int = 8 * 1024 * 1024,
+        min_bytes: int = 256 * 1024,
+        shm_budget: float = 0.5,
+    ):
+        """
+        slots: số frame có thể đang nằm ở process con cùng lúc
+        slot_bytes: dung lượng mỗi slot, frame lớn hơn thì gửi kiểu pickle như cũ
+        min_bytes: frame nhỏ hơn (crop biển số) gửi kiểu pickle, không chiếm slot
+        shm_budget: tỉ lệ tối đa dung lượng trống của /dev/shm các slot được dùng
+        """
+        self.slots = max(1, slots)
+        self.slot_bytes = slot_bytes
+        self.min_bytes = min_bytes
+        self.shm_budget = shm_budget
+
+        self._cond = threading.Condition()
+        self._created = False
+        self._blocks: list[shared_memory.SharedMemory] = []
+        self._free: list[int] = []
+        self._index: dict[str, int] = {}
+
+        self.frames = 0
+        self.small = 0
+        self.fallbacks = 0
+
+    def _ensure_blocks(self):
+        # tạo lúc cần: chế độ inline / test không chiếm RAM
+        if self._created:
+            return
+        self._created = True
+        free = shm_free_bytes()
+        if free is not None and free * self.shm_budget < self.slots * self.slot_bytes:
+            slots = int(free * self.shm_budget // self.slot_bytes)
+            print(f"❌ /dev/shm chỉ còn {free // 1024 // 1024} MB: dùng {slots}/{self.slots} slot shared memory")
+            self.slots = slots
+        for i in range(self.slots):
+            block = shared_memory.SharedMemory(create=True, size=self.slot_bytes)
+            self._blocks.append(block)
+            self._index[block.name] = i
+        self._free = list(range(self.slots))
+
+    def put(self, image: np.ndarray, timeout: float = 0.0) -> SharedFrame | None:
+        """Chép image vào 1 slot trống. None nếu frame quá nhỏ / quá lớn hoặc hết slot."""
+        if image.nbytes < self.min_bytes:
+            # pickle crop nhỏ nhanh hơn chép vào slot, không tính là fallback
+            self.small += 1
+            return None
+        if image.nbytes > self.slot_bytes:
+            self.fallbacks += 1
+            return None
+
+        with self._cond:
+            self._ensure_blocks()
+            if not self._free and not self._cond.wait_for(lambda: self._free, timeout):
+                self.fallbacks += 1
+                return None
+            block = self._blocks[self._free.pop()]
+
+        view = np.ndarray(image.shape, dtype=image.dtype, buffer=block.buf)
+        view[...] = image
+        self.frames += 1
+        return SharedFrame(name=block.name, shape=image.shape, dtype=image.dtype.str)
+
+    def release(self, ref: SharedFrame):
+        with self._cond:
+            i = self._index.get(ref.name)
+            if i is not None and i not in self._free:
+                self._free.append(i)
+                self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            for block in self._blocks:
+                block.close()
+                block.unlink()
+            self._blocks, self._free, self._index = [], [], {}
+            self._created = False
+
+    def stats(self) -> dict:
+        return {
+            "slots": self.slots,
+            "slot_mb": round(self.slot_bytes / 1024 / 1024, 1),
+            "min_kb": self.min_bytes // 1024,
+            "free": len(self._free) if self._created else self.slots,
+            "frames": self.frames,
+            "small": self.small,
+            "fallbacks": self.fallbacks,
+        }
+
+
+# ============ PHÍA PROCESS CON ============
+
+_attached: dict[str, shared_memory.SharedMemory] = {}
+
+
+def open_frame(ref: SharedFrame) -> np.ndarray:
+    """numpy view (không copy) trên slot; chỉ dùng tới khi job xong."""
+    block = _attached.get(ref.name)
+    if block is None:
+        block = shared_memory.SharedMemory(name=ref.name)
+        _attached[ref.name] = block
+    return np.ndarray(ref.shape, dtype=np.dtype(ref.dtype), buffer=block.buf)
@@ -0,0 +1,216 @@
+# app/streaming/sources.py
+"""
+Nguồn frame cho CaptureWorker.
+
+- DeviceSource     : webcam / RTSP (cv2.VideoCapture), frame live
+- VideoFileSource  : phát lại file video đã quay
+- ImageFolderSource: phát lại thư mục ảnh (sắp theo tên file)
+
+Nguồn phát lại chạy theo FPS gốc (speed=1), nhanh / chậm hơn (speed=2, 0.5)
+hoặc nhanh hết mức (speed=0), có thể lặp lại khi hết -> đo hiệu năng và test
+nhiều làn mà không cần camera thật.
+
+passthrough=True (CAMERA_PASSTHROUGH): nguồn MJPEG (webcam USB MJPG, RTSP /
+HTTP MJPEG, file .avi MJPG, thư mục .jpg) trả thẳng bytes JPEG gốc, không
+giải mã -> preview gửi nguyên bytes, chỉ giải mã khi cần nhận diện.
+"""
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from . import config
+from .jpeg import as_jpeg, decode_jpeg, is_jpeg
+
+IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".bmp"}
+JPEG_EXTS = {".jpg", ".jpeg"}
+
+
+def _fourcc(cap: cv2.VideoCapture) -> str:
+    code = int(cap.get(cv2.CAP_PROP_FOURCC))
+    return code.to_bytes(4, "little").decode("ascii", errors="ignore").upper()
+
+
+def enable_raw_jpeg(cap: cv2.VideoCapture) -> bool:
+    """
+    Chuyển VideoCapture sang trả gói JPEG gốc (không giải mã), chỉ khi nguồn là MJPEG.
+    FFmpeg (file / RTSP / HTTP): CAP_PROP_FORMAT=-1 trả từng packet nén.
+    V4L2 (webcam USB): xin định dạng MJPG + tắt chuyển sang BGR -> buffer JPEG của driver.
+    """
+    backend = cap.getBackendName()
+    if backend == "FFMPEG":
+        return _fourcc(cap) == "MJPG" and cap.set(cv2.CAP_PROP_FORMAT, -1)
+    if backend == "V4L2":
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*"MJPG"))
+        return _fourcc(cap) == "MJPG" and cap.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+    return False
+
+
+class FrameSource:
+    """
+    read_frame() -> (ok, ảnh BGR | None, bytes JPEG | None): nguồn passthrough
+    chỉ trả JPEG; read() luôn trả ảnh BGR (giải mã nếu cần).
+    """
+
+    ended = False
+    passthrough = False
+
+    def read_frame(self) -> tuple[bool, np.ndarray | None, bytes | None]:
+        raise NotImplementedError
+
+    def read(self) -> tuple[bool, np.ndarray | None]:
+        ok, image, jpeg = self.read_frame()
+        if ok and image is None:
+            image = decode_jpeg(jpeg)
+            ok = image is not None
+        return ok, image
+
+    def release(self):
+        pass
+
+
+class DeviceSource(FrameSource):
+    """Webcam / RTSP: đọc frame mới nhất, không điều nhịp."""
+
+    def __init__(self, source, passthrough: bool = False):
+        self.source = source
+        self.cap = cv2.VideoCapture(source)
+        if not self.cap.isOpened():
+            self.cap.release()
+            raise RuntimeError("Không mở được camera")
+        # giữ buffer driver nhỏ nhất có thể -> frame luôn "tươi"
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 0.0
+        self.passthrough = passthrough and enable_raw_jpeg(self.cap)
+
+    def read_frame(self):
+        ok, data = self.cap.read()
+        if not ok or not self.passthrough:
+            return ok, data, None
+        jpeg = as_jpeg(data)
+        return jpeg is not None, None, jpeg
+
+    def release(self):
+        self.cap.release()
+
+
+class ReplaySource(FrameSource):
+    """Phát lại frame đã ghi: điều nhịp theo fps * speed, lặp lại khi hết nếu loop."""
+
+    def __init__(self, fps: float, speed: float = 1.0, loop: bool = True):
+        self.fps = fps
+        self.speed = max(0.0, speed)
+        self.loop = loop
+        self.ended = False
+        self.frames_read = 0
+
+        self._interval = 1.0 / (fps * self.speed) if fps > 0 and self.speed > 0 else 0.0
+        self._next_ts = time.monotonic()
+
+    def _next(self) -> tuple[np.ndarray | None, bytes | None] | None:
+        """(ảnh, jpeg) của frame kế tiếp, None khi hết."""
+        raise NotImplementedError
+
+    def _rewind(self):
+        raise NotImplementedError
+
+    def read_frame(self):
+        item = self._next()
+        if item is None and self.loop and self.frames_read:
+            self._rewind()
+            item = self._next()
+        if item is None:
+            self.ended = True
+            return False, None, None
+
+        if self._interval:
+            # chậm hơn nhịp (CPU bận) thì không dồn frame để đuổi kịp
+            self._next_ts = max(self._next_ts + self._interval, time.monotonic() - self._interval)
+            delay = self._next_ts - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        self.frames_read += 1
+        return True, *item
+
+
+class VideoFileSource(ReplaySource):
+    def __init__(self, path: str, speed: float = 1.0, loop: bool = True, passthrough: bool = False):
+        self.source = path
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            self.cap.release()
+            raise RuntimeError(f"Không mở được file video: {path}")
+        self.passthrough = passthrough and enable_raw_jpeg(self.cap)
+        super().__init__(self.cap.get(cv2.CAP_PROP_FPS) or config.REPLAY_IMAGE_FPS, speed, loop)
+
+    def _next(self):
+        ok, data = self.cap.read()
+        if not ok:
+            return None
+        if not self.passthrough:
+            return data, None
+        jpeg = as_jpeg(data)
+        return (None, jpeg) if jpeg is not None else None
+
+    def _rewind(self):
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+    def release(self):
+        self.cap.release()
+
+
+class ImageFolderSource(ReplaySource):
+    def __init__(
+        self,
+        folder: str,
+        fps: float = 10.0,
+        speed: float = 1.0,
+        loop: bool = True,
+        passthrough: bool = False,
+    ):
+        self.source = folder
+        self.passthrough = passthrough
+        self.paths = sorted(p for p in Path(folder).iterdir() if p.suffix.lower() in IMAGE_EXTS)
+        if not self.paths:
+            raise RuntimeError(f"Thư mục không có ảnh: {folder}")
+        self._pos = 0
+        super().__init__(fps, speed, loop)
+
+    def _next(self):
+        while self._pos < len(self.paths):
+            path = self.paths[self._pos]
+            self._pos += 1
+            if self.passthrough and path.suffix.lower() in JPEG_EXTS:
+                data = path.read_bytes()
+                if is_jpeg(data):
+                    return None, data
+                continue
+            image = cv2.imread(str(path))
+            if image is not None:
+                return image, None
+        return None
+
+    def _rewind(self):
+        self._pos = 0
+
+
+def open_source(
+    source,
+    speed: float = config.REPLAY_SPEED,
+    loop: bool = config.REPLAY_LOOP,
+    passthrough: bool = config.CAMERA_PASSTHROUGH,
+) -> FrameSource:
+    """
+    Mở nguồn frame theo dạng của source: index / URL -> camera,
+    file -> phát lại video, thư mục -> phát lại ảnh. Lỗi mở -> RuntimeError.
+    """
+    if isinstance(source, str):
+        path = Path(source)
+        if path.is_dir():
+            return ImageFolderSource(
+                source, fps=config.REPLAY_IMAGE_FPS, speed=speed, loop=loop, passthrough=passthrough
+            )
+        if path.is_file():
+            return VideoFileSource(source, speed=speed, loop=loop, passthrough=passthrough)
+    return DeviceSource(source, passthrough=passthrough)
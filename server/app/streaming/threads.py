@@ -0,0 +1,139 @@
+# app/streaming/threads.py
+"""
+Chia CPU cho các process giữ model.
+
+Torch (và OpenCV, ONNX Runtime) mặc định dùng mọi core trong MỖI process: N
+process nhận diện cùng chạy YOLO thì có N x số core thread tranh nhau CPU,
+độ trễ snap tăng vọt khi nhiều làn chụp cùng lúc. Ở đây mỗi process nhận 1
+"ngân sách" thread (mặc định số core / số process) và có thể được ghim vào
+1 nhóm core riêng (INFERENCE_CPU_AFFINITY).
+
+InferencePool tính kế hoạch cho từng process (thread_plan) rồi process con
+gọi apply_budget() trước khi load model; get_model() / get_reader() gọi
+configure_torch() để chế độ inline cũng được chia thread như vậy.
+"""
+import os
+from dataclasses import dataclass
+
+from . import config
+
+
+@dataclass(frozen=True)
+class ThreadBudget:
+    threads: int                      # thread intra-op (torch / OpenCV / ONNX Runtime)
+    interop_threads: int = 0          # thread inter-op torch, 0 = mặc định
+    cpus: tuple[int, ...] | None = None  # core được ghim, None = không ghim
+
+
+def available_cpus() -> list[int]:
+    """Các core process này được phép chạy (theo cgroup / taskset nếu có)."""
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:  # không phải Linux
+        return list(range(os.cpu_count() or 1))
+
+
+def parse_cpu_list(value: str) -> tuple[int, ...]:
+    """"0-2,5" -> (0, 1, 2, 5). Sai định dạng -> ValueError."""
+    cpus: set[int] = set()
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        start, _, end = part.partition("-")
+        cpus.update(range(int(start), int(end or start) + 1))
+    if not cpus:
+        raise ValueError(f"Danh sách core rỗng: '{value}'")
+    return tuple(sorted(cpus))
+
+
+def affinity_groups(spec: str, workers: int, cpus: list[int]) -> list[tuple[int, ...] | None]:
+    """Nhóm core cho từng process theo INFERENCE_CPU_AFFINITY ("", "auto", "0-1;2-3")."""
+    if not spec or spec in ("none", "off", "false"):
+        return [None] * workers
+    if spec == "auto":
+        # chia đều, core lẻ dồn cho các process đầu; ít core hơn process thì dùng chung
+        if len(cpus) < workers:
+            return [(cpus[i % len(cpus)],) for i in range(workers)]
+        size, extra = divmod(len(cpus), workers)
+        groups, start = [], 0
+        for i in range(workers):
+            end = start + size + (1 if i < extra else 0)
+            groups.append(tuple(cpus[start:end]))
+            start = end
+        return groups
+    groups = [parse_cpu_list(g) for g in spec.split(";") if g.strip()]
+    return [groups[i % len(groups)] for i in range(workers)]
+
+
+def thread_plan(
+    workers: int,
+    threads: int = 0,
+    interop_threads: int = 0,
+    affinity: str = "",
+) -> list[ThreadBudget]:
+    """
+    Ngân sách thread cho từng process nhận diện.
+    threads=0: số core của nhóm được ghim, hoặc số core / số process nếu không ghim.
+    """
+    cpus = available_cpus()
+    try:
+        groups = affinity_groups(affinity, workers, cpus)
+    except ValueError as e:
+        print("❌ INFERENCE_CPU_AFFINITY sai định dạng, không ghim core:", e)
+        groups = [None] * workers
+
+    plan = []
+    for group in groups:
+        n = threads or (len(group) if group else max(1, len(cpus) // workers))
+        plan.append(ThreadBudget(threads=n, interop_threads=interop_threads, cpus=group))
+    return plan
+
+
+def default_budget() -> ThreadBudget:
+    """Ngân sách của process hiện tại theo config (inline: 1 process dùng hết các core)."""
+    workers = config.INFERENCE_WORKERS if config.INFERENCE_MODE == "process" else 1
+    # chỉ process nhận diện mới bị ghim core (apply_budget trong process con)
+    return thread_plan(workers, config.TORCH_THREADS, config.TORCH_INTEROP_THREADS)[0]
+
+
+# ngân sách đã áp dụng cho process này (None = chưa)
+_applied: ThreadBudget | None = None
+
+
+def apply_budget(budget: ThreadBudget) -> ThreadBudget:
+    """Ghim core + đặt số thread torch / OpenCV cho process này."""
+    global _applied
+    if budget.cpus:
+        try:
+            os.sched_setaffinity(0, budget.cpus)
+        except (AttributeError, OSError) as e:
+            print("❌ Không ghim được core", budget.cpus, e)
+
+    import cv2
+
+    cv2.setNumThreads(budget.threads)
+    try:
+        import torch
+    except ImportError:
+        # chỉ dùng ONNX Runtime
+        torch = None
+    if torch is not None:
+        torch.set_num_threads(budget.threads)
+        if budget.interop_threads:
+            try:
+                torch.set_num_interop_threads(budget.interop_threads)
+            except RuntimeError:
+                # chỉ đặt được 1 lần / process (fork từ forkserver đã đặt sẵn)
+                pass
+    _applied = budget
+    return budget
+
+
+def configure_torch() -> ThreadBudget:
+    """Áp ngân sách mặc định nếu process này chưa được áp (gọi trước khi load model)."""
+    return _applied or apply_budget(default_budget())
+
+
+def current_budget() -> ThreadBudget | None:
+    return _applied
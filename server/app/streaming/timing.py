@@ -0,0 +1,151 @@
+# app/streaming/timing.py
+"""
+Đo thời gian từng bước của luồng nhận diện (đọc camera, YOLO, OCR, vẽ khung,
+encode JPEG, base64...) để biết 1 lần snap chậm là do đâu.
+
+Mỗi lần snap / mỗi frame livestream có 1 đối tượng Timings bấm giờ từng bước
+bằng perf_counter; khi xong, thời gian được cộng vào histogram cuộn (N mẫu
+gần nhất) theo (luồng, camera, bước) -> GET /streaming/metrics.
+Tắt (TIMING_ENABLED=false) thì mọi bước dùng chung 1 context rỗng, gần như
+không tốn gì.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+from . import config
+
+# ngưỡng bucket histogram (ms), kiểu "le" của Prometheus
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class RollingHistogram:
+    """Giữ N mẫu gần nhất (ms) + tổng số mẫu từ lúc chạy."""
+
+    def __init__(self, window: int = 512):
+        self._samples: deque[float] = deque(maxlen=max(1, window))
+        self.count = 0
+        self.total_ms = 0.0
+
+    def add(self, ms: float):
+        self._samples.append(ms)
+        self.count += 1
+        self.total_ms += ms
+
+    def summary(self) -> dict:
+        ordered = sorted(self._samples)
+        n = len(ordered)
+
+        def pct(p: float) -> float:
+            # nearest-rank trên cửa sổ mẫu gần nhất
+            return round(ordered[min(n - 1, int(p / 100 * n))], 2) if n else 0.0
+
+        buckets, i = {}, 0
+        for bound in BUCKETS_MS:
+            while i < n and ordered[i] <= bound:
+                i += 1
+            buckets[str(bound)] = i
+        buckets["+Inf"] = n
+
+        return {
+            "count": self.count,
+            "window": n,
+            "mean_ms": round(sum(ordered) / n, 2) if n else 0.0,
+            "p50_ms": pct(50),
+            "p90_ms": pct(90),
+            "p95_ms": pct(95),
+            "p99_ms": pct(99),
+            "max_ms": round(ordered[-1], 2) if n else 0.0,
+            "buckets": buckets,
+        }
+
+
+class TimingRegistry:
+    def __init__(self, enabled: bool = True, window: int = 512):
+        self.enabled = enabled
+        self.window = window
+        self._lock = threading.Lock()
+        # (luồng, camera, bước) -> histogram
+        self._hists: dict[tuple[str, str, str], RollingHistogram] = {}
+
+    def start(self, flow: str, camera: str = "", force: bool = False) -> "Timings":
+        """
+        Timings cho 1 lần chạy. Tắt đo -> NO_TIMINGS (không bấm giờ),
+        trừ khi force (client xin timings trong response).
+        """
+        if not self.enabled and not force:
+            return NO_TIMINGS
+        return Timings(self, flow, camera)
+
+    def record(self, flow: str, camera: str, stages: dict[str, float]):
+        if not self.enabled:
+            return
+        with self._lock:
+            for stage, sec in stages.items():
+                key = (flow, camera, stage)
+                hist = self._hists.get(key)
+                if hist is None:
+                    hist = self._hists[key] = RollingHistogram(self.window)
+                hist.add(sec * 1000)
+
+    def snapshot(self) -> dict:
+        """{luồng: {camera: {bước: histogram}}}"""
+        flows: dict = {}
+        with self._lock:
+            for (flow, camera, stage), hist in sorted(self._hists.items()):
+                flows.setdefault(flow, {}).setdefault(camera, {})[stage] = hist.summary()
+        return {"enabled": self.enabled, "window": self.window, "flows": flows}
+
+    def reset(self):
+        with self._lock:
+            self._hists.clear()
+
+
+class Timings:
+    """Thời gian từng bước của 1 lần snap / 1 frame (giây, cộng dồn nếu 1 bước chạy nhiều lần)."""
+
+    def __init__(self, registry: TimingRegistry, flow: str, camera: str):
+        self._registry = registry
+        self.flow = flow
+        self.camera = camera
+        self.stages: dict[str, float] = {}
+        self._t0 = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - t0
+
+    def finish(self) -> dict[str, float]:
+        """Chốt tổng thời gian và ghi vào histogram."""
+        self.stages["total"] = time.perf_counter() - self._t0
+        self._registry.record(self.flow, self.camera, self.stages)
+        return self.stages
+
+    def as_dict(self) -> dict[str, float]:
+        return {name: round(sec * 1000, 2) for name, sec in self.stages.items()}
+
+
+class _NoTimings:
+    """Timings khi tắt đo: không bấm giờ, không ghi gì."""
+
+    stages: dict[str, float] = {}
+    _null = nullcontext()
+
+    def stage(self, name: str):
+        return self._null
+
+    def finish(self) -> dict[str, float]:
+        return self.stages
+
+    def as_dict(self) -> dict[str, float]:
+        return {}
+
+
+NO_TIMINGS = _NoTimings()
+
+metrics = TimingRegistry(enabled=config.TIMING_ENABLED, window=config.TIMING_WINDOW)
@@ -0,0 +1,220 @@
+# app/streaming/tracker.py
+"""
+Theo dõi biển số qua nhiều frame + bỏ phiếu kết quả OCR.
+
+Mỗi box YOLO được gán vào 1 track (ghép theo IoU, dự phòng theo khoảng cách
+tâm). Mỗi track chỉ OCR vài lần: kết quả được cộng điểm theo độ tin cậy, khi
+1 chuỗi chiếm ưu thế rõ ràng thì track "chốt" biển số và không OCR nữa.
+Xe đứng chờ ở barrier không bị OCR lại liên tục, biển số cũng không nhảy
+qua lại giữa "29-H1 12345" và "29-HI 12345".
+
+Track chỉ ghép theo vị trí box: xe sau dừng đúng chỗ xe trước sẽ rơi vào track
+cũ đã chốt. Vì vậy snap (ghi lượt vào / ra) luôn đọc lại 1 lần track đã chốt
+(verify), chữ khác thì tách thành track mới thay vì trả biển số của xe trước.
+"""
+import itertools
+import threading
+import time
+from dataclasses import dataclass, field
+
+Box = tuple[int, int, int, int]
+
+
+def iou(a: Box, b: Box) -> float:
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, ix2 - ix1) * max(0, iy2 - iy1)
+    if inter == 0:
+        return 0.0
+    area_a = (a[2] - a[0]) * (a[3] - a[1])
+    area_b = (b[2] - b[0]) * (b[3] - b[1])
+    return inter / float(area_a + area_b - inter)
+
+
+def centroid_distance(a: Box, b: Box) -> float:
+    """Khoảng cách tâm, chia cho đường chéo box a (để không phụ thuộc độ phân giải)."""
+    ax, ay = (a[0] + a[2]) / 2, (a[1] + a[3]) / 2
+    bx, by = (b[0] + b[2]) / 2, (b[1] + b[3]) / 2
+    diag = max(1.0, ((a[2] - a[0]) ** 2 + (a[3] - a[1]) ** 2) ** 0.5)
+    return ((ax - bx) ** 2 + (ay - by) ** 2) ** 0.5 / diag
+
+
+@dataclass
+class Track:
+    id: int
+    box: Box
+    score: float
+    first_seen: float
+    last_seen: float
+    hits: int = 1
+    misses: int = 0           # số lần update liên tiếp không thấy track
+    ocr_count: int = 0
+    text_reads: int = 0       # số lần OCR đọc ra chữ
+    votes: dict[str, float] = field(default_factory=dict)
+    read_counts: dict[str, int] = field(default_factory=dict)
+    last_read: dict[str, int] = field(default_factory=dict)  # text_reads lúc đọc ra chuỗi đó lần cuối
+
+    @property
+    def text(self) -> str | None:
+        """
+        Biển số đang dẫn đầu phiếu bầu. Hoà điểm: chuỗi được đọc ra nhiều lần
+        hơn, vẫn hoà thì chuỗi đọc gần nhất.
+        """
+        if not self.votes:
+            return None
+        return max(self.votes, key=lambda t: (self.votes[t], self.read_counts[t], self.last_read[t]))
+
+    @property
+    def confidence(self) -> float:
+        """Tỉ lệ điểm của chuỗi dẫn đầu trên tổng điểm (0..1)."""
+        total = sum(self.votes.values())
+        if not total:
+            return 0.0
+        return round(max(self.votes.values()) / total, 4)
+
+
+class PlateTracker:
+    def __init__(
+        self,
+        iou_threshold: float = 0.3,
+        max_centroid_distance: float = 0.5,
+        max_misses: int = 5,
+        max_idle_sec: float = 30.0,
+        min_votes: int = 3,
+        converge_ratio: float = 0.6,
+        max_ocr: int = 8,
+    ):
+        """
+        iou_threshold: IoU tối thiểu để ghép box vào track cũ
+        max_centroid_distance: nếu IoU thấp, vẫn ghép khi tâm lệch ít hơn (theo đường chéo box)
+        max_misses: số lần nhận diện liên tiếp không thấy track thì xóa track
+        max_idle_sec: track không được nhìn thấy quá N giây thì xóa (dù chưa đủ misses)
+        min_votes: số lần OCR có chữ tối thiểu trước khi chốt
+        converge_ratio: chuỗi dẫn đầu phải chiếm >= tỉ lệ này tổng điểm để chốt
+        max_ocr: OCR tối đa bao nhiêu lần cho 1 track (chưa chốt cũng dừng)
+        """
+        self.iou_threshold = iou_threshold
+        self.max_centroid_distance = max_centroid_distance
+        self.max_misses = max_misses
+        self.max_idle_sec = max_idle_sec
+        self.min_votes = min_votes
+        self.converge_ratio = converge_ratio
+        self.max_ocr = max_ocr
+
+        self._lock = threading.Lock()
+        self._tracks: dict[int, Track] = {}
+        self._ids = itertools.count(1)
+
+        self.ocr_requested = 0
+        self.ocr_skipped = 0
+        self.splits = 0
+
+    # ---------- ghép box ----------
+
+    def update(self, boxes: list[tuple[Box, float]], ts: float | None = None) -> list[Track]:
+        """
+        boxes: [(box, score YOLO)] của 1 frame vừa nhận diện.
+        Trả về track tương ứng từng box, đúng thứ tự boxes.
+        """
+        now = ts if ts is not None else time.monotonic()
+        with self._lock:
+            # các cặp (track, box) ứng viên, ghép tham lam theo IoU cao nhất trước
+            pairs = []
+            for tid, track in self._tracks.items():
+                for bi, (box, _) in enumerate(boxes):
+                    overlap = iou(track.box, box)
+                    if overlap >= self.iou_threshold:
+                        pairs.append((overlap, 0.0, tid, bi))
+                    else:
+                        dist = centroid_distance(track.box, box)
+                        if dist <= self.max_centroid_distance:
+                            pairs.append((0.0, -dist, tid, bi))
+            pairs.sort(reverse=True)
+
+            assigned: dict[int, Track] = {}
+            used_tracks: set[int] = set()
+            for _, _, tid, bi in pairs:
+                if tid in used_tracks or bi in assigned:
+                    continue
+                track = self._tracks[tid]
+                track.box, track.score = boxes[bi]
+                track.last_seen = now
+                track.hits += 1
+                track.misses = 0
+                assigned[bi] = track
+                used_tracks.add(tid)
+
+            for bi, (box, score) in enumerate(boxes):
+                if bi not in assigned:
+                    track = Track(id=next(self._ids), box=box, score=score, first_seen=now, last_seen=now)
+                    self._tracks[track.id] = track
+                    assigned[bi] = track
+                    used_tracks.add(track.id)
+
+            # track không thấy trong frame này
+            for tid in list(self._tracks):
+                if tid in used_tracks:
+                    continue
+                track = self._tracks[tid]
+                track.misses += 1
+                if track.misses > self.max_misses or now - track.last_seen > self.max_idle_sec:
+                    del self._tracks[tid]
+
+            return [assigned[bi] for bi in range(len(boxes))]
+
+    # ---------- bỏ phiếu OCR ----------
+
+    def converged(self, track: Track) -> bool:
+        return track.text_reads >= self.min_votes and track.confidence >= self.converge_ratio
+
+    def needs_ocr(self, track: Track, verify: bool = False) -> bool:
+        """
+        verify: luôn OCR 1 lần dù track đã chốt / hết lượt OCR (snap ghi lượt:
+        box có thể là xe khác vừa dừng đúng chỗ xe trước, xem add_read).
+        """
+        with self._lock:
+            need = verify or (track.ocr_count < self.max_ocr and not self.converged(track))
+            if need:
+                self.ocr_requested += 1
+            else:
+                self.ocr_skipped += 1
+            return need
+
+    def add_read(self, track: Track, text: str | None, confidence: float, ts: float | None = None) -> Track:
+        """
+        Cộng 1 phiếu OCR (trọng số = độ tin cậy) cho track, trả về track nhận phiếu.
+        Track đã chốt mà đọc ra chữ khác -> xe khác ở cùng vị trí: tách track mới
+        (cùng box, chỉ có phiếu này) thay cho track cũ và trả về track mới.
+        """
+        with self._lock:
+            if text and self.converged(track) and text != track.text and track.id in self._tracks:
+                now = ts if ts is not None else time.monotonic()
+                del self._tracks[track.id]
+                track = Track(id=next(self._ids), box=track.box, score=track.score, first_seen=now, last_seen=now)
+                self._tracks[track.id] = track
+                self.splits += 1
+            track.ocr_count += 1
+            if text:
+                track.text_reads += 1
+                track.votes[text] = track.votes.get(text, 0.0) + max(confidence, 1e-3)
+                track.read_counts[text] = track.read_counts.get(text, 0) + 1
+                track.last_read[text] = track.text_reads
+            return track
+
+    def is_stable(self, track: Track) -> bool:
+        with self._lock:
+            return self.converged(track)
+
+    def tracks(self) -> list[Track]:
+        with self._lock:
+            return list(self._tracks.values())
+
+    def stats(self) -> dict:
+        total = self.ocr_requested + self.ocr_skipped
+        return {
+            "active_tracks": len(self._tracks),
+            "ocr_requested": self.ocr_requested,
+            "ocr_skipped": self.ocr_skipped,
+            "ocr_skip_ratio": round(self.ocr_skipped / total, 3) if total else 0.0,
+            "splits": self.splits,
+        }
@@ -0,0 +1,126 @@
+# app/streaming/warmup.py
+"""
+Warm-up model nhận diện ngay khi khởi động.
+
+Lần snap đầu tiên sau restart phải load YOLO + EasyOCR và khởi tạo graph cho
+lần chạy đầu (vài giây) trong lúc xe đang chờ ở barrier. Warm-up load sẵn 2
+model và chạy thử 1 frame / 1 crop giả ở chế độ nền, ghi lại thời gian từng
+bước để UI cổng biết nhận diện đã "nóng" chưa (GET /streaming/ready).
+"""
+import threading
+import time
+
+import numpy as np
+
+from . import config
+
+
+def _warm(load, run) -> dict:
+    """load() model rồi run() 2 lần: lần đầu (khởi tạo graph) và lần đã nóng."""
+    try:
+        t0 = time.perf_counter()
+        load()
+        t1 = time.perf_counter()
+        run()
+        t2 = time.perf_counter()
+        run()
+        t3 = time.perf_counter()
+    except Exception as e:
+        return {"state": "error", "error": str(e)}
+    return {
+        "state": "ready",
+        "load_ms": round((t1 - t0) * 1000, 1),
+        "first_run_ms": round((t2 - t1) * 1000, 1),
+        "warm_run_ms": round((t3 - t2) * 1000, 1),
+    }
+
+
+def warm_up_models() -> dict[str, dict]:
+    """Chạy trong process giữ model (process nhận diện, hoặc process API nếu inline)."""
+    from . import ocr, recognition
+
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    crop = np.full((60, 200, 3), 255, dtype=np.uint8)
+
+    load_detector = (
+        recognition.get_onnx_detector if config.DETECTOR_BACKEND == "onnx" else recognition.get_model
+    )
+    return {
+        "detector": _warm(load_detector, lambda: recognition.locate_plates(frame)),
+        "ocr": _warm(ocr.get_reader, lambda: ocr.read_plates([crop])),
+    }
+
+
+def all_ready(models: dict[str, dict]) -> bool:
+    return bool(models) and all(m.get("state") == "ready" for m in models.values())
+
+
+class InlineWarmup:
+    """Warm-up khi INFERENCE_MODE=inline: chạy ở thread nền của process API."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self.state = "cold"  # cold -> warming -> ready / error
+        self.models: dict[str, dict] = {}
+        self.started_at: float | None = None
+        self.duration: float | None = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self.state = "warming"
+            self.started_at = time.time()
+            self._thread = threading.Thread(target=self._run, name="model-warmup", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        t0 = time.perf_counter()
+        self.models = warm_up_models()
+        self.duration = time.perf_counter() - t0
+        self.state = "ready" if all_ready(self.models) else "error"
+        print("✅ Warm-up model xong." if self.state == "ready" else "❌ Warm-up model lỗi.", self.models)
+
+    def status(self) -> dict:
+        return {
+            "state": self.state,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 1) if self.duration is not None else None,
+            "models": self.models,
+        }
+
+
+inline_warmup = InlineWarmup()
+
+
+def start_warmup():
+    """Gọi lúc app startup: load model + chạy thử ở nền, không chặn API."""
+    if not config.MODEL_WARMUP:
+        return
+
+    from .inference import inference_pool
+
+    if inference_pool is None:
+        inline_warmup.start()
+    else:
+        # process con tự warm-up ngay khi được spawn
+        inference_pool.start()
+
+
+def readiness() -> dict:
+    """
+    ready: nhận được request nhận diện. MODEL_WARMUP=false -> state "disabled",
+    ready=True luôn (model load lúc có request đầu, không có gì để chờ); trả 503
+    mãi thì UI cổng / health check coi như dịch vụ đã chết.
+    """
+    from .inference import inference_pool
+
+    if inference_pool is None:
+        status = inline_warmup.status()
+    else:
+        status = inference_pool.warmup_status()
+    if not config.MODEL_WARMUP and status["state"] == "cold":
+        status["state"] = "disabled"
+    ready = status["state"] in ("ready", "disabled")
+    return {"ready": ready, "mode": config.INFERENCE_MODE, **status}
@@ -0,0 +1,244 @@
+# benchmarks/alpr_throughput.py
+"""
+Thông lượng ALPR trên clip phát lại (không cần webcam), tách theo từng bước
+của luồng snap:
+  read    : lấy frame từ nguồn (file video / thư mục ảnh)
+  region  : cắt ROI + thu nhỏ trước YOLO
+  detect  : YOLO (backend theo DETECTOR_BACKEND)
+  ocr     : đọc các crop biển số của frame (1 lô, theo OCR_MODE)
+  encode  : vẽ khung + JPEG + base64 như API snap
+Kèm FPS nhận diện, độ trễ snap end-to-end (p50/p95/p99), CPU / RSS và độ
+chính xác biển số đọc được của từng clip (bỏ phiếu qua các frame).
+
+Gọi thẳng model trong process này (không qua process nhận diện / batcher /
+cache OCR) để đo chi phí thật của từng bước.
+
+Chạy từ thư mục server/ (cần best.pt + model EasyOCR):
+    python -m benchmarks.alpr_throughput --json alpr.json
+    python -m benchmarks.alpr_throughput --baseline alpr.json --max-regression 0.2
+
+--data: thư mục chứa clip (file video / thư mục ảnh), tên clip "<biển số>_<mô tả>";
+mặc định bộ mẫu benchmarks/samples (tạo lại bằng benchmarks.make_samples).
+--baseline: so với kết quả cũ, thoát mã 1 nếu chậm / sai hơn quá ngưỡng.
+"""
+import argparse
+import base64
+import json
+import resource
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import cv2
+
+from app.streaming import config, ocr, recognition
+from app.streaming.recognition import PlateDetection, detection_region, draw_detections, plate_text_of
+from app.streaming.sources import IMAGE_EXTS, ImageFolderSource, VideoFileSource
+
+from .common import accuracy_summary, compact_plate, latency_summary, write_json
+
+SAMPLES = Path(__file__).parent / "samples"
+VIDEO_EXTS = {".avi", ".mp4", ".mkv", ".mov"}
+STAGES = ["read", "region", "detect", "ocr", "encode"]
+
+# (đường dẫn trong kết quả, cao hơn là tốt hơn?)
+REGRESSION_METRICS = [
+    (("detection_fps",), True),
+    (("pipeline_fps",), True),
+    (("snap_e2e", "p50_ms"), False),
+    (("snap_e2e", "p95_ms"), False),
+    (("stages", "ocr", "p95_ms"), False),
+    (("accuracy", "exact_match"), True),
+]
+
+
+def find_clips(folder: Path) -> list[Path]:
+    clips = []
+    for path in sorted(folder.iterdir()):
+        if path.is_dir() and any(p.suffix.lower() in IMAGE_EXTS for p in path.iterdir()):
+            clips.append(path)
+        elif path.suffix.lower() in VIDEO_EXTS:
+            clips.append(path)
+    return clips
+
+
+def open_clip(path: Path, speed: float):
+    # phát 1 lượt, không lặp
+    if path.is_dir():
+        return ImageFolderSource(str(path), fps=config.REPLAY_IMAGE_FPS, speed=speed, loop=False)
+    return VideoFileSource(str(path), speed=speed, loop=False)
+
+
+def snap_frame(frame, timings: dict[str, list[float]]) -> list[PlateDetection]:
+    """1 lần snap, ghi thời gian từng bước vào timings."""
+    t0 = time.perf_counter()
+    region = detection_region(frame, config.DETECT_ROI, config.DETECT_MAX_SIDE)
+    t1 = time.perf_counter()
+    located = [(region.to_frame(b), s) for b, s in recognition.locate_plates(region.image)]
+    located = [(b, s) for b, s in located if b[2] > b[0] and b[3] > b[1]]
+    t2 = time.perf_counter()
+    reads = ocr.read_plates([frame[y1:y2, x1:x2] for (x1, y1, x2, y2), _ in located]) if located else []
+    t3 = time.perf_counter()
+    detections = [
+        PlateDetection(box=b, score=s, text=r.text, confidence=r.confidence)
+        for (b, s), r in zip(located, reads)
+    ]
+    plate_text = plate_text_of(detections)
+    annotated = draw_detections(frame.copy(), detections, plate_text)
+    ok, buffer = cv2.imencode(".jpg", annotated)
+    base64.b64encode(buffer.tobytes())
+    t4 = time.perf_counter()
+
+    timings["region"].append(t1 - t0)
+    timings["detect"].append(t2 - t1)
+    if located:
+        timings["ocr"].append(t3 - t2)
+    timings["encode"].append(t4 - t3)
+    timings["e2e"].append(t4 - t0)
+    return detections
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize() / 1024 / 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run(clips: list[Path], speed: float, repeat: int, max_frames: int) -> dict:
+    timings: dict[str, list[float]] = {s: [] for s in STAGES + ["e2e"]}
+    clip_results, pairs = [], []
+    crops = 0
+
+    usage0 = resource.getrusage(resource.RUSAGE_SELF)
+    wall0 = time.perf_counter()
+    for clip in clips:
+        label = clip.stem.split("_")[0]
+        votes: Counter = Counter()
+        frames = 0
+        for _ in range(repeat):
+            source = open_clip(clip, speed)
+            try:
+                while not max_frames or frames < max_frames:
+                    t0 = time.perf_counter()
+                    ok, frame = source.read()
+                    if not ok:
+                        break
+                    timings["read"].append(time.perf_counter() - t0)
+                    detections = snap_frame(frame, timings)
+                    crops += len(detections)
+                    frames += 1
+                    text = plate_text_of(detections)
+                    if text:
+                        votes[compact_plate(text)] += 1
+            finally:
+                source.release()
+
+        read = votes.most_common(1)[0][0] if votes else None
+        pairs.append((label, read))
+        clip_results.append({"clip": clip.name, "label": label, "frames": frames, "read": read})
+    wall = time.perf_counter() - wall0
+    usage1 = resource.getrusage(resource.RUSAGE_SELF)
+
+    cpu = (usage1.ru_utime - usage0.ru_utime) + (usage1.ru_stime - usage0.ru_stime)
+    frames = len(timings["e2e"])
+    return {
+        "frames": frames,
+        "crops": crops,
+        "detection_fps": round(frames / max(sum(timings["detect"]), 1e-9), 2),
+        "pipeline_fps": round(frames / max(sum(timings["e2e"]), 1e-9), 2),
+        "snap_e2e": latency_summary(timings["e2e"]),
+        "stages": {s: latency_summary(timings[s]) for s in STAGES},
+        "stage_share": {
+            s: round(sum(timings[s]) / max(sum(timings["e2e"]), 1e-9), 4) for s in STAGES if s != "read"
+        },
+        "accuracy": accuracy_summary(pairs),
+        "clips": clip_results,
+        "resources": {
+            "wall_sec": round(wall, 2),
+            "cpu_sec": round(cpu, 2),
+            # > 100% khi torch dùng nhiều core
+            "cpu_percent": round(cpu / max(wall, 1e-9) * 100, 1),
+            "rss_mb": round(rss_mb(), 1),
+            "max_rss_mb": round(usage1.ru_maxrss / 1024, 1),
+        },
+    }
+
+
+def warm_up(clips: list[Path]) -> float:
+    """Load model + chạy lần đầu (không tính vào kết quả)."""
+    source = open_clip(clips[0], speed=0)
+    try:
+        ok, frame = source.read()
+    finally:
+        source.release()
+    if not ok:
+        raise SystemExit(f"Không đọc được frame từ {clips[0]}")
+    t0 = time.perf_counter()
+    snap_frame(frame, {s: [] for s in STAGES + ["e2e"]})
+    ocr.read_plates([frame[:64, :200]])
+    return time.perf_counter() - t0
+
+
+def compare(baseline: dict, current: dict, max_regression: float) -> list[dict]:
+    """Các chỉ số kém hơn baseline quá max_regression (tỉ lệ, vd. 0.2 = 20%)."""
+    regressions = []
+    for path, higher_is_better in REGRESSION_METRICS:
+        old, new = baseline, current
+        for key in path:
+            old, new = (old or {}).get(key), (new or {}).get(key)
+        if not isinstance(old, (int, float)) or not isinstance(new, (int, float)) or not old:
+            continue
+        change = (new - old) / old
+        worse = -change if higher_is_better else change
+        if worse > max_regression:
+            regressions.append({"metric": ".".join(path), "baseline": old, "current": new, "change": round(change, 4)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default=str(SAMPLES), help="thư mục clip (file video / thư mục ảnh)")
+    parser.add_argument("--speed", type=float, default=0.0, help="tốc độ phát: 0 = nhanh hết mức, 1 = FPS gốc")
+    parser.add_argument("--repeat", type=int, default=1, help="số lượt phát mỗi clip")
+    parser.add_argument("--max-frames", type=int, default=0, help="tối đa N frame mỗi clip (0 = hết clip)")
+    parser.add_argument("--json", help="ghi kết quả ra file JSON")
+    parser.add_argument("--baseline", help="file JSON kết quả cũ để so sánh")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args()
+
+    clips = find_clips(Path(args.data))
+    if not clips:
+        raise SystemExit(f"Không có clip nào trong {args.data}")
+
+    warmup_sec = warm_up(clips)
+    result = {
+        "config": {
+            "detector_backend": config.DETECTOR_BACKEND,
+            "ocr_mode": config.OCR_MODE,
+            "ocr_quantize": config.OCR_QUANTIZE,
+            "detect_roi": config.DETECT_ROI,
+            "detect_max_side": config.DETECT_MAX_SIDE,
+            "speed": args.speed,
+            "repeat": args.repeat,
+        },
+        "warmup_ms": round(warmup_sec * 1000, 1),
+        **run(clips, args.speed, args.repeat, args.max_frames),
+    }
+
+    regressions = None
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare(baseline, result, args.max_regression)
+        result["regressions"] = regressions
+
+    write_json(args.json, result)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
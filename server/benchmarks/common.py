@@ -0,0 +1,97 @@
+# benchmarks/common.py
+"""Hàm dùng chung cho các script benchmark (chạy từ thư mục server/)."""
+import csv
+import json
+import re
+import statistics
+from pathlib import Path
+
+import cv2
+
+IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".bmp"}
+
+
+def percentile(values: list[float], p: float) -> float:
+    """Percentile p (0..100) bằng nội suy tuyến tính; list rỗng -> 0."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * p / 100
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def latency_summary(seconds: list[float]) -> dict:
+    """Tóm tắt độ trễ (ms): mean / p50 / p95 / p99 / max."""
+    ms = [s * 1000 for s in seconds]
+    return {
+        "count": len(ms),
+        "mean_ms": round(statistics.fmean(ms), 2) if ms else 0.0,
+        "p50_ms": round(percentile(ms, 50), 2),
+        "p95_ms": round(percentile(ms, 95), 2),
+        "p99_ms": round(percentile(ms, 99), 2),
+        "max_ms": round(max(ms), 2) if ms else 0.0,
+    }
+
+
+def compact_plate(text: str | None) -> str:
+    """So sánh biển số không phân biệt dấu '-', '.', khoảng trắng, hoa/thường."""
+    return re.sub(r"[^0-9A-Z]", "", (text or "").upper())
+
+
+def edit_distance(a: str, b: str) -> int:
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = cur
+    return prev[-1]
+
+
+def load_labelled_images(folder: str | Path) -> list[tuple[str, str, "cv2.Mat"]]:
+    """
+    Đọc bộ ảnh có nhãn: [(tên file, biển số đúng, ảnh BGR)].
+    Nhãn lấy từ labels.csv (filename,plate) nếu có, không thì từ tên file
+    (phần trước dấu "_" đầu tiên, ví dụ "29H112345_01.jpg" -> "29H112345").
+    """
+    folder = Path(folder)
+    labels: dict[str, str] = {}
+    csv_path = folder / "labels.csv"
+    if csv_path.exists():
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            for row in csv.reader(f):
+                if len(row) >= 2 and row[0] != "filename":
+                    labels[row[0].strip()] = row[1].strip()
+
+    items = []
+    for path in sorted(folder.iterdir()):
+        if path.suffix.lower() not in IMAGE_EXTS:
+            continue
+        image = cv2.imread(str(path))
+        if image is None:
+            continue
+        label = labels.get(path.name) or path.stem.split("_")[0]
+        items.append((path.name, label, image))
+    return items
+
+
+def accuracy_summary(pairs: list[tuple[str, str | None]]) -> dict:
+    """pairs: [(nhãn, kết quả OCR)] -> tỉ lệ đúng nguyên biển + tỉ lệ lỗi ký tự (CER)."""
+    if not pairs:
+        return {"exact_match": 0.0, "cer": 0.0}
+    exact = sum(compact_plate(a) == compact_plate(b) for a, b in pairs)
+    errors = sum(edit_distance(compact_plate(a), compact_plate(b)) for a, b in pairs)
+    chars = sum(max(1, len(compact_plate(a))) for a, _ in pairs)
+    return {
+        "exact_match": round(exact / len(pairs), 4),
+        "cer": round(errors / chars, 4),
+    }
+
+
+def write_json(path: str | None, data: dict):
+    """In kết quả ra stdout, và ghi file nếu có --json."""
+    text = json.dumps(data, ensure_ascii=False, indent=2)
+    print(text)
+    if path:
+        Path(path).write_text(text, encoding="utf-8")
@@ -0,0 +1,107 @@
+# benchmarks/detector_backends.py
+"""
+So sánh detector biển số bản torch (ultralytics, best.pt) và ONNX Runtime
+(best.onnx, export tự động nếu chưa có) trên cùng bộ ảnh:
+  - độ trễ mỗi frame (p50 / p95 ...) và thời gian load model lần đầu
+  - độ khớp: box ONNX ghép với box torch theo IoU, lệch điểm conf
+
+Chạy từ thư mục server/ (cần best.pt):
+    python -m benchmarks.detector_backends --data data/frames --repeat 3 --json detector.json
+
+--data: thư mục ảnh frame camera (không cần nhãn).
+"""
+import argparse
+import time
+
+from app.streaming import recognition
+from app.streaming.tracker import iou
+
+from .common import latency_summary, load_labelled_images, write_json
+
+
+def run_backend(name: str, fn, images, repeat: int) -> tuple[dict, list]:
+    t0 = time.perf_counter()
+    fn(images[0])  # lần đầu: load model (+ export ONNX nếu cần)
+    load_sec = time.perf_counter() - t0
+
+    samples, outputs = [], []
+    for _ in range(repeat):
+        outputs = []
+        for image in images:
+            t0 = time.perf_counter()
+            outputs.append(fn(image))
+            samples.append(time.perf_counter() - t0)
+
+    return {
+        "backend": name,
+        "first_call_ms": round(load_sec * 1000, 1),
+        "per_frame": latency_summary(samples),
+        "boxes": sum(len(o) for o in outputs),
+    }, outputs
+
+
+def parity(reference: list, candidate: list, min_iou: float = 0.5) -> dict:
+    """Ghép tham lam box candidate với box reference theo IoU cao nhất."""
+    matched, ious, score_deltas = 0, [], []
+    total_ref = sum(len(r) for r in reference)
+    total_cand = sum(len(c) for c in candidate)
+
+    for ref, cand in zip(reference, candidate):
+        pairs = sorted(
+            ((iou(rb, cb), ri, ci) for ri, (rb, _) in enumerate(ref) for ci, (cb, _) in enumerate(cand)),
+            reverse=True,
+        )
+        used_ref, used_cand = set(), set()
+        for overlap, ri, ci in pairs:
+            if overlap < min_iou:
+                break
+            if ri in used_ref or ci in used_cand:
+                continue
+            used_ref.add(ri)
+            used_cand.add(ci)
+            matched += 1
+            ious.append(overlap)
+            score_deltas.append(abs(ref[ri][1] - cand[ci][1]))
+
+    return {
+        "matched": matched,
+        "recall": round(matched / total_ref, 4) if total_ref else 1.0,
+        "precision": round(matched / total_cand, 4) if total_cand else 1.0,
+        "mean_iou": round(sum(ious) / len(ious), 4) if ious else 0.0,
+        "max_score_delta": round(max(score_deltas), 4) if score_deltas else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", required=True, help="thư mục ảnh frame")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--conf", type=float, help="ngưỡng conf cho cả 2 backend (mặc định như app)")
+    parser.add_argument("--json", help="ghi kết quả ra file JSON")
+    args = parser.parse_args()
+
+    images = [img for _, _, img in load_labelled_images(args.data)]
+    if not images:
+        raise SystemExit(f"Không có ảnh nào trong {args.data}")
+    if args.conf is not None:
+        recognition.DETECT_CONF = args.conf
+
+    torch_result, torch_out = run_backend("torch", recognition.locate_plates_torch, images, args.repeat)
+    onnx_result, onnx_out = run_backend(
+        "onnx", lambda img: recognition.get_onnx_detector()(img), images, args.repeat
+    )
+
+    write_json(args.json, {
+        "images": len(images),
+        "repeat": args.repeat,
+        "conf": recognition.DETECT_CONF,
+        "results": [torch_result, onnx_result],
+        "speedup_p50": round(
+            torch_result["per_frame"]["p50_ms"] / max(onnx_result["per_frame"]["p50_ms"], 1e-6), 2
+        ),
+        "parity": parity(torch_out, onnx_out),
+    })
+
+
+if __name__ == "__main__":
+    main()
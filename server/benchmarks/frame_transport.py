@@ -0,0 +1,96 @@
+# benchmarks/frame_transport.py
+"""
+Chi phí chuyển 1 frame từ process API sang process nhận diện:
+  - pickle : gửi nguyên numpy array qua multiprocessing.Queue (pipe)
+  - shm    : chép vào slot SharedFramePool, qua queue chỉ gửi SharedFrame,
+             process con dựng view trên shared memory (không copy)
+
+Process con chỉ đọc thưa vài pixel rồi trả lời, nên số đo là chi phí vận
+chuyển (round trip), không gồm thời gian chạy model.
+
+Chạy từ thư mục server/:
+    python -m benchmarks.frame_transport --frames 200 --json frame_transport.json
+"""
+import argparse
+import multiprocessing as mp
+import time
+
+import numpy as np
+
+from app.streaming.shared_frames import SharedFrame, SharedFramePool, open_frame
+
+from .common import latency_summary, write_json
+
+RESOLUTIONS = {
+    "480p": (480, 640),
+    "720p": (720, 1280),
+    "1080p": (1080, 1920),
+}
+
+
+def _echo(requests, results):
+    while True:
+        payload = requests.get()
+        if payload is None:
+            break
+        frame = open_frame(payload) if isinstance(payload, SharedFrame) else payload
+        results.put(int(frame[::64, ::64, 0].sum()))
+
+
+def run(shape: tuple[int, int], frames: int, shared: bool) -> dict:
+    ctx = mp.get_context("spawn")
+    requests, results = ctx.Queue(), ctx.Queue()
+    proc = ctx.Process(target=_echo, args=(requests, results), daemon=True)
+    proc.start()
+
+    pool = SharedFramePool(slots=1, slot_bytes=shape[0] * shape[1] * 3, min_bytes=0) if shared else None
+    rng = np.random.default_rng(0)
+    images = [rng.integers(0, 255, (*shape, 3), dtype=np.uint8) for _ in range(4)]
+
+    samples = []
+    try:
+        for i in range(frames + 5):
+            image = images[i % len(images)]
+            t0 = time.perf_counter()
+            ref = pool.put(image) if pool is not None else None
+            requests.put(ref if ref is not None else image)
+            checksum = results.get()
+            if ref is not None:
+                pool.release(ref)
+            elapsed = time.perf_counter() - t0
+
+            assert checksum == int(image[::64, ::64, 0].sum())
+            if i >= 5:  # bỏ vài frame đầu (process con còn khởi động)
+                samples.append(elapsed)
+    finally:
+        requests.put(None)
+        proc.join(timeout=5)
+        if pool is not None:
+            pool.close()
+
+    return latency_summary(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--json", help="ghi kết quả ra file JSON")
+    args = parser.parse_args()
+
+    results = []
+    for name, shape in RESOLUTIONS.items():
+        pickled = run(shape, args.frames, shared=False)
+        shared = run(shape, args.frames, shared=True)
+        results.append({
+            "resolution": name,
+            "frame_mb": round(shape[0] * shape[1] * 3 / 1024 / 1024, 2),
+            "pickle": pickled,
+            "shm": shared,
+            "speedup_p50": round(pickled["p50_ms"] / max(shared["p50_ms"], 1e-6), 2),
+        })
+
+    write_json(args.json, {"frames": args.frames, "results": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# benchmarks/make_samples.py
+"""
+Tạo bộ clip mẫu nhỏ cho benchmark (benchmarks/samples/): xe giả chạy vào làn,
+biển số vẽ bằng OpenCV, cố định seed -> chạy lại ra cùng dữ liệu.
+
+Tên clip = "<biển số>_<mô tả>" (nhãn theo quy ước của load_labelled_images),
+có cả file video (.avi) và thư mục ảnh để thử 2 kiểu nguồn phát lại.
+
+Chạy từ thư mục server/:
+    python -m benchmarks.make_samples --out benchmarks/samples
+"""
+import argparse
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+WIDTH, HEIGHT = 480, 270
+FRAMES = 12
+
+# (tên clip, dòng chữ trên biển, kiểu lưu)
+CLIPS = [
+    ("30A12345_car", ["30A-123.45"], "video"),
+    ("51F67890_car-night", ["51F-678.90"], "frames"),
+    ("29B112345_motorbike", ["29-B1", "123.45"], "frames"),
+]
+
+
+def draw_plate(lines: list[str]) -> np.ndarray:
+    """Biển trắng viền đen, 1 dòng (ô tô) hoặc 2 dòng (xe máy)."""
+    size = (46, 200) if len(lines) == 1 else (80, 110)
+    plate = np.full((*size, 3), 235, dtype=np.uint8)
+    cv2.rectangle(plate, (1, 1), (size[1] - 2, size[0] - 2), (20, 20, 20), 2)
+    step = size[0] // len(lines)
+    for i, text in enumerate(lines):
+        scale = 0.85 if len(lines) == 1 else 0.8
+        (tw, th), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, scale, 2)
+        org = ((size[1] - tw) // 2, step * i + (step + th) // 2)
+        cv2.putText(plate, text, org, cv2.FONT_HERSHEY_SIMPLEX, scale, (15, 15, 15), 2, cv2.LINE_AA)
+    return plate
+
+
+def render_clip(lines: list[str], dark: bool, rng: np.random.Generator) -> list[np.ndarray]:
+    """Xe đi từ mép dưới lên giữa khung hình rồi dừng lại trước barrier."""
+    base = np.linspace(90, 150, HEIGHT, dtype=np.float32)[:, None, None]
+    background = np.broadcast_to(base, (HEIGHT, WIDTH, 3)).astype(np.uint8)
+    if dark:
+        background = (background * 0.45).astype(np.uint8)
+    plate = draw_plate(lines)
+    ph, pw = plate.shape[:2]
+
+    frames = []
+    for i in range(FRAMES):
+        frame = background.copy()
+        # xe chạy trong 2/3 clip đầu, sau đó đứng yên
+        t = min(1.0, i / (FRAMES * 2 / 3))
+        cy = int(HEIGHT * (1.1 - 0.55 * t))
+        cx = WIDTH // 2
+        cv2.rectangle(frame, (cx - 130, cy - 80), (cx + 130, cy + 70), (60, 40, 160), -1)
+        y1, x1 = cy - ph // 2, cx - pw // 2
+        top, bottom = max(0, y1), min(HEIGHT, y1 + ph)
+        if bottom > top:
+            frame[top:bottom, x1:x1 + pw] = plate[top - y1:bottom - y1]
+        noise = rng.normal(0, 1, frame.shape)
+        frames.append(np.clip(frame + noise, 0, 255).astype(np.uint8))
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default="benchmarks/samples")
+    args = parser.parse_args()
+
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(2024)
+
+    for name, lines, kind in CLIPS:
+        frames = render_clip(lines, dark="night" in name, rng=rng)
+        if kind == "video":
+            writer = cv2.VideoWriter(str(out / f"{name}.avi"), cv2.VideoWriter_fourcc(*"MJPG"), 12, (WIDTH, HEIGHT))
+            for frame in frames:
+                writer.write(frame)
+            writer.release()
+        else:
+            folder = out / name
+            folder.mkdir(exist_ok=True)
+            for i, frame in enumerate(frames):
+                cv2.imwrite(str(folder / f"{i:04d}.jpg"), frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
+        print("✅", name, kind, len(frames), "frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# benchmarks/ocr_modes.py
+"""
+So sánh 2 đường OCR trên bộ crop biển số có nhãn:
+  - readtext : EasyOCR chạy CRAFT dò chữ trong crop rồi nhận dạng (đường cũ)
+  - recognize: bỏ CRAFT, crop (tách 2 dòng nếu cần) vào thẳng recognizer
+
+Chạy từ thư mục server/:
+    python -m benchmarks.ocr_modes --data data/plates --repeat 3 --json ocr_modes.json
+
+--data: thư mục ảnh crop biển số, nhãn trong labels.csv hoặc tên file.
+"""
+import argparse
+import time
+
+from app.streaming import ocr
+
+from .common import (
+    accuracy_summary,
+    compact_plate,
+    latency_summary,
+    load_labelled_images,
+    write_json,
+)
+
+
+def run_mode(name: str, fn, items, repeat: int) -> dict:
+    crops = [img for _, _, img in items]
+
+    # warm-up: lần đầu còn tốn thời gian khởi tạo graph
+    fn(crops[:1])
+
+    # độ trễ khi đọc từng crop (giống 1 lần snap)
+    single = []
+    reads = []
+    for _ in range(repeat):
+        reads = []
+        for crop in crops:
+            t0 = time.perf_counter()
+            reads.extend(fn([crop]))
+            single.append(time.perf_counter() - t0)
+
+    # cả bộ trong 1 lô
+    t0 = time.perf_counter()
+    fn(crops)
+    batch_sec = time.perf_counter() - t0
+
+    pairs = [(label, r.text) for (_, label, _), r in zip(items, reads)]
+    return {
+        "mode": name,
+        "per_crop": latency_summary(single),
+        "batch_total_ms": round(batch_sec * 1000, 2),
+        "batch_per_crop_ms": round(batch_sec * 1000 / len(crops), 2),
+        "accuracy": accuracy_summary(pairs),
+        "mismatches": [
+            {"file": f, "label": label, "read": r.text}
+            for (f, label, _), r in zip(items, reads)
+            if compact_plate(label) != compact_plate(r.text)
+        ][:20],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", required=True, help="thư mục crop biển số có nhãn")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-two-line", action="store_true", help="tắt tách 2 dòng ở chế độ recognize")
+    parser.add_argument("--json", help="ghi kết quả ra file JSON")
+    args = parser.parse_args()
+
+    items = load_labelled_images(args.data)
+    if not items:
+        raise SystemExit(f"Không có ảnh nào trong {args.data}")
+
+    two_line = not args.no_two_line
+    results = [
+        run_mode("readtext", ocr.readtext_plates, items, args.repeat),
+        run_mode("recognize", lambda c: ocr.recognize_plates(c, two_line=two_line), items, args.repeat),
+    ]
+
+    base, fast = results[0], results[1]
+    write_json(args.json, {
+        "images": len(items),
+        "repeat": args.repeat,
+        "two_line_split": two_line,
+        "results": results,
+        "speedup_p50": round(base["per_crop"]["p50_ms"] / max(fast["per_crop"]["p50_ms"], 1e-6), 2),
+        "exact_match_delta": round(
+            fast["accuracy"]["exact_match"] - base["accuracy"]["exact_match"], 4
+        ),
+    })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# benchmarks/ocr_quantize.py
+"""
+So sánh recognizer EasyOCR float32 và INT8 (dynamic quantization) trên bộ
+crop biển số có nhãn, cùng đường OCR đang cấu hình (OCR_MODE):
+  - độ trễ mỗi crop / cả lô, kích thước model
+  - độ chính xác từng bản + độ lệch (drift): tỉ lệ crop INT8 đọc khác float32
+
+Chạy từ thư mục server/:
+    python -m benchmarks.ocr_quantize --data data/plates --repeat 3 --json ocr_quantize.json
+
+--data: thư mục ảnh crop biển số, nhãn trong labels.csv hoặc tên file.
+"""
+import argparse
+import io
+
+import easyocr
+import torch
+
+from app.streaming import config, ocr
+from app.streaming.ocr_quantize import quantize_recognizer
+
+from .common import compact_plate, load_labelled_images, write_json
+from .ocr_modes import run_mode
+
+
+def model_mb(model: torch.nn.Module) -> float:
+    buf = io.BytesIO()
+    torch.save(model.state_dict(), buf)
+    return round(buf.tell() / 1024 / 1024, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", required=True, help="thư mục crop biển số có nhãn")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="ghi kết quả ra file JSON")
+    args = parser.parse_args()
+
+    items = load_labelled_images(args.data)
+    if not items:
+        raise SystemExit(f"Không có ảnh nào trong {args.data}")
+
+    reader = easyocr.Reader(
+        ocr.OCR_LANGS, gpu=False, detector=config.OCR_MODE != "recognize", quantize=False
+    )
+    variants = {"float32": reader.recognizer, "int8": quantize_recognizer(reader.recognizer)}
+    ocr._reader = reader
+
+    results, texts = [], {}
+    for name, model in variants.items():
+        reader.recognizer = model
+        result = run_mode(name, ocr.read_plates, items, args.repeat)
+        result["model_mb"] = model_mb(model)
+        results.append(result)
+        texts[name] = [ocr.read_plates([img])[0].text for _, _, img in items]
+
+    base, quant = results
+    changed = [
+        {"file": f, "float32": a, "int8": b}
+        for (f, _, _), a, b in zip(items, texts["float32"], texts["int8"])
+        if compact_plate(a) != compact_plate(b)
+    ]
+    write_json(args.json, {
+        "images": len(items),
+        "repeat": args.repeat,
+        "ocr_mode": config.OCR_MODE,
+        "results": results,
+        "speedup_p50": round(base["per_crop"]["p50_ms"] / max(quant["per_crop"]["p50_ms"], 1e-6), 2),
+        "drift": {
+            "changed_reads": round(len(changed) / len(items), 4),
+            "exact_match_delta": round(quant["accuracy"]["exact_match"] - base["accuracy"]["exact_match"], 4),
+            "cer_delta": round(quant["accuracy"]["cer"] - base["accuracy"]["cer"], 4),
+            "examples": changed[:20],
+        },
+    })
+
+
+if __name__ == "__main__":
+    main()
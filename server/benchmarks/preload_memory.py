@@ -0,0 +1,77 @@
+# benchmarks/preload_memory.py
+"""
+So sánh RAM của N process nhận diện khi mỗi process tự load model (spawn)
+và khi load sẵn trước khi fork (MODEL_PRELOAD, forkserver).
+
+Mỗi lượt: start InferencePool N process (có warm-up: load + chạy thử YOLO /
+EasyOCR), chờ warm-up xong, đọc /proc/<pid>/smaps_rollup của từng process:
+  unique_mb : RAM chỉ process đó giữ
+  shared_mb : RAM dùng chung với process khác (trọng số preload nằm ở đây)
+  pss_mb    : phần RAM "thật" của process (trang dùng chung chia đều)
+Tổng PSS là RAM thật cả nhóm dùng (lượt preload tính cả forkserver giữ bản
+trọng số gốc); tổng RSS - tổng PSS là phần tiết kiệm.
+
+Chạy từ thư mục server/ (cần best.pt + model EasyOCR):
+    python -m benchmarks.preload_memory --workers 3 --json preload.json
+"""
+import argparse
+import time
+
+from app.streaming.inference import InferencePool
+from app.streaming.memory import memory_report, parent_pid
+
+from .common import write_json
+
+
+def measure(workers: int, preload: bool, timeout: float) -> dict:
+    pool = InferencePool(workers=workers, warmup=True, preload=preload)
+    t0 = time.perf_counter()
+    pool.start()
+    try:
+        deadline = time.monotonic() + timeout
+        status = pool.warmup_status()
+        # chờ mọi process báo warm-up (kể cả lỗi) để đo RAM sau khi model đã chạy
+        while (
+            len(status["workers"]) < workers
+            or any(w["state"] in ("warming", "cold") for w in status["workers"])
+        ) and time.monotonic() < deadline:
+            time.sleep(0.5)
+            status = pool.warmup_status()
+        ready_sec = time.perf_counter() - t0
+
+        pids = {"inference": pool.worker_pids()}
+        if preload:
+            # tính cả forkserver: bản trọng số gốc nằm ở đó
+            pids["forkserver"] = [parent_pid(pids["inference"][0])]
+        report = memory_report(pids)
+    finally:
+        pool.stop()
+    return {
+        "preload": preload,
+        "warmup_state": status["state"],
+        # từ lúc start tới khi mọi process warm-up xong (gồm cả load model ở forkserver)
+        "ready_sec": round(ready_sec, 2),
+        "models": [w.get("models") for w in status["workers"]],
+        **report,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=2, help="số process nhận diện")
+    parser.add_argument("--timeout", type=float, default=300, help="thời gian chờ warm-up tối đa (giây)")
+    parser.add_argument("--json", help="ghi kết quả ra file JSON")
+    args = parser.parse_args()
+
+    runs = [measure(args.workers, preload, args.timeout) for preload in (False, True)]
+    before, after = runs[0]["total"], runs[1]["total"]
+    write_json(args.json, {
+        "workers": args.workers,
+        "runs": runs,
+        "pss_saved_mb": round(before["pss_mb"] - after["pss_mb"], 1),
+        "unique_saved_mb": round(before["unique_mb"] - after["unique_mb"], 1),
+    })
+
+
+if __name__ == "__main__":
+    main()
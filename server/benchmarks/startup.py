@@ -0,0 +1,84 @@
+# benchmarks/startup.py
+"""
+Thời gian import + RAM (RSS) lúc khởi động API, mỗi kịch bản chạy trong 1
+process Python mới:
+  - api        : import app.main (như uvicorn lúc start / reload)
+  - api_health : + gọi GET /health
+  - alpr_stack : + import ultralytics / easyocr (phần lần gọi camera /
+                 nhận diện đầu tiên phải trả khi INFERENCE_MODE=inline)
+
+Chạy từ thư mục server/:
+    python -m benchmarks.startup --repeat 5 --json startup.json
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+from .common import write_json
+
+HEAVY_MODULES = ["torch", "easyocr", "ultralytics", "onnxruntime", "cv2"]
+
+SCENARIOS = {
+    "api": "import app.main",
+    "api_health": (
+        "import app.main\n"
+        "from fastapi.testclient import TestClient\n"
+        "TestClient(app.main.app).get('/health')"
+    ),
+    "alpr_stack": "import app.main\nimport ultralytics\nimport easyocr",
+}
+
+PROBE = """
+import json, resource, sys, time
+t0 = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - t0
+print(json.dumps({{
+    "import_sec": elapsed,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "loaded": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def run_scenario(code: str, repeat: int) -> dict:
+    imports, totals, rss, loaded = [], [], [], []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE.format(code=code, heavy=HEAVY_MODULES)],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        totals.append(time.perf_counter() - t0)
+        # dòng cuối là kết quả đo (các dòng trước có thể là log của app)
+        probe = json.loads(out.stdout.strip().splitlines()[-1])
+        imports.append(probe["import_sec"])
+        rss.append(probe["rss_mb"])
+        loaded = probe["loaded"]
+
+    return {
+        "import_ms_median": round(statistics.median(imports) * 1000, 1),
+        "import_ms_min": round(min(imports) * 1000, 1),
+        "process_ms_median": round(statistics.median(totals) * 1000, 1),
+        "rss_mb_median": round(statistics.median(rss), 1),
+        "heavy_modules_loaded": loaded,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="ghi kết quả ra file JSON")
+    args = parser.parse_args()
+
+    results = {name: run_scenario(code, args.repeat) for name, code in SCENARIOS.items()}
+    write_json(args.json, {"repeat": args.repeat, "python": sys.version.split()[0], "results": results})
+
+
+if __name__ == "__main__":
+    main()
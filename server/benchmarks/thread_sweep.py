@@ -0,0 +1,171 @@
+# benchmarks/thread_sweep.py
+"""
+Quét cách chia CPU cho process nhận diện: số process (workers) x số thread
+torch mỗi process (threads), có / không ghim core, dưới tải snap đồng thời.
+
+Mỗi bố cục: start InferencePool (spawn, warm-up), --clients thread cùng gửi
+job YOLO ("locate", kèm OCR 1 crop nếu --ocr) liên tục trong --duration giây,
+đo thông lượng (snap/s) và độ trễ p50 / p95 / p99. Bố cục "torch mặc định"
+(mỗi process dùng mọi core, không ghim) được chạy kèm để thấy mức tranh CPU.
+
+Đề xuất: bố cục thông lượng cao nhất trong số các bố cục có p95 không quá
+--max-p95-ratio lần p95 tốt nhất -> đặt INFERENCE_WORKERS / TORCH_THREADS /
+INFERENCE_CPU_AFFINITY theo kết quả.
+
+Chạy từ thư mục server/ (cần best.pt, + model EasyOCR nếu --ocr):
+    python -m benchmarks.thread_sweep --cores 8 --clients 4 --json sweep.json
+"""
+import argparse
+import threading
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from app.streaming.inference import InferenceBusy, InferencePool, InferenceTimeout
+from app.streaming.threads import available_cpus
+
+from .common import latency_summary, write_json
+
+SAMPLE = Path(__file__).parent / "samples" / "51F67890_car-night" / "0006.jpg"
+
+
+def layouts(cores: int, max_workers: int, pin: bool) -> list[dict]:
+    """Các bố cục workers x threads dùng không quá `cores` core, + bố cục mặc định của torch."""
+    result = []
+    for workers in range(1, min(cores, max_workers) + 1):
+        threads = 1
+        while workers * threads <= cores:
+            result.append({"workers": workers, "threads": threads, "affinity": ""})
+            if pin and workers > 1:
+                result.append({"workers": workers, "threads": threads, "affinity": "auto"})
+            threads *= 2
+        # mỗi process dùng mọi core như torch mặc định (tranh CPU khi workers > 1)
+        if workers > 1 and cores > 1:
+            result.append({"workers": workers, "threads": cores, "affinity": "", "oversubscribed": True})
+    return result
+
+
+def load(pool: InferencePool, frame: np.ndarray, crop, clients: int, duration: float) -> dict:
+    latencies: list[float] = []
+    errors = {"busy": 0, "timeout": 0, "error": 0}
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client():
+        while time.monotonic() < stop_at:
+            t0 = time.perf_counter()
+            try:
+                pool.call("locate", frame)
+                if crop is not None:
+                    pool.call("read", [crop])
+            except InferenceBusy:
+                with lock:
+                    errors["busy"] += 1
+                time.sleep(0.01)
+                continue
+            except InferenceTimeout:
+                with lock:
+                    errors["timeout"] += 1
+                continue
+            except RuntimeError:
+                with lock:
+                    errors["error"] += 1
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - t0)
+
+    threads = [threading.Thread(target=client, daemon=True) for _ in range(clients)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+    return {
+        "snaps": len(latencies),
+        "throughput": round(len(latencies) / wall, 2),
+        "latency": latency_summary(latencies),
+        "errors": errors,
+    }
+
+
+def run_layout(layout: dict, frame, crop, clients: int, duration: float, timeout: float) -> dict:
+    pool = InferencePool(
+        workers=layout["workers"],
+        # đủ chỗ cho mọi client, không đo nhầm lỗi 503
+        max_pending=max(clients, layout["workers"]) * 2,
+        timeout=timeout,
+        warmup=True,
+        threads=layout["threads"],
+        affinity=layout["affinity"],
+    )
+    pool.start()
+    try:
+        deadline = time.monotonic() + 300
+        status = pool.warmup_status()
+        while len(status["workers"]) < layout["workers"] or any(
+            w["state"] in ("warming", "cold") for w in status["workers"]
+        ):
+            if time.monotonic() > deadline:
+                raise SystemExit("Warm-up quá lâu")
+            time.sleep(0.5)
+            status = pool.warmup_status()
+        result = load(pool, frame, crop, clients, duration)
+    finally:
+        pool.stop()
+    print("✅", layout, result["throughput"], "snap/s, p95", result["latency"]["p95_ms"], "ms")
+    return {**layout, **result}
+
+
+def recommend(results: list[dict], max_p95_ratio: float) -> dict | None:
+    ok = [r for r in results if r["snaps"] and not r.get("oversubscribed")]
+    if not ok:
+        return None
+    best_p95 = min(r["latency"]["p95_ms"] for r in ok)
+    candidates = [r for r in ok if r["latency"]["p95_ms"] <= best_p95 * max_p95_ratio]
+    best = max(candidates, key=lambda r: (r["throughput"], -r["latency"]["p95_ms"]))
+    return {
+        "INFERENCE_WORKERS": best["workers"],
+        "TORCH_THREADS": best["threads"],
+        "INFERENCE_CPU_AFFINITY": best["affinity"],
+        "throughput": best["throughput"],
+        "p95_ms": best["latency"]["p95_ms"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cores", type=int, default=len(available_cpus()), help="số core dành cho nhận diện")
+    parser.add_argument("--max-workers", type=int, default=4)
+    parser.add_argument("--clients", type=int, default=4, help="số snap đồng thời")
+    parser.add_argument("--duration", type=float, default=10.0, help="thời gian tải mỗi bố cục (giây)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="hạn chót mỗi job (giây)")
+    parser.add_argument("--no-pin", action="store_true", help="không thử bố cục ghim core")
+    parser.add_argument("--ocr", action="store_true", help="mỗi snap đọc thêm 1 crop OCR")
+    parser.add_argument("--image", default=str(SAMPLE), help="ảnh dùng làm frame snap")
+    parser.add_argument("--max-p95-ratio", type=float, default=1.5)
+    parser.add_argument("--json", help="ghi kết quả ra file JSON")
+    args = parser.parse_args()
+
+    frame = cv2.imread(args.image)
+    if frame is None:
+        raise SystemExit(f"Không đọc được ảnh {args.image}")
+    crop = frame[frame.shape[0] // 3:frame.shape[0] // 2, frame.shape[1] // 3:frame.shape[1] * 2 // 3] if args.ocr else None
+
+    results = [
+        run_layout(layout, frame, crop, args.clients, args.duration, args.timeout)
+        for layout in layouts(args.cores, args.max_workers, pin=not args.no_pin)
+    ]
+    write_json(args.json, {
+        "cores": args.cores,
+        "clients": args.clients,
+        "ocr": args.ocr,
+        "results": results,
+        "recommended": recommend(results, args.max_p95_ratio),
+    })
+
+
+if __name__ == "__main__":
+    main()
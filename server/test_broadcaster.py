@@ -0,0 +1,113 @@
+# test_broadcaster.py - Test MJPEG encode 1 lần cho mọi viewer, start / stop theo số viewer
+import threading
+import time
+
+from app.streaming.broadcaster import MjpegBroadcaster, mjpeg_part
+from app.streaming.camera import Frame
+
+
+class _Capture:
+    """Capture giả: frame mới mỗi 5 ms, đếm số generator frames() đang chạy."""
+
+    def __init__(self):
+        self.active = 0
+
+    def frames(self):
+        self.active += 1
+        try:
+            seq = 0
+            while True:
+                time.sleep(0.005)
+                seq += 1
+                yield Frame(seq, time.monotonic(), jpeg=b"%d" % seq)
+        finally:
+            self.active -= 1
+
+
+def _broadcaster():
+    capture = _Capture()
+    rendered = []
+
+    def render(frame):
+        rendered.append(frame.seq)
+        return frame.jpeg
+
+    return MjpegBroadcaster(lambda: capture, render), capture, rendered
+
+
+def _wait(predicate, timeout=1.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return predicate()
+
+
+def test_viewers_share_one_encode():
+    broadcaster, capture, rendered = _broadcaster()
+    a, b = broadcaster.stream(), broadcaster.stream()
+    for _ in range(5):
+        packet_a = next(a)
+        next(b)
+    assert broadcaster.viewers == 2 and capture.active == 1
+    assert packet_a.startswith(b"--frame\r\nContent-Type: image/jpeg")
+
+    # 2 viewer nhưng mỗi frame camera chỉ render + encode 1 lần
+    assert rendered == list(range(1, len(rendered) + 1))
+    assert broadcaster.frames_encoded == len(rendered)
+    a.close()
+    b.close()
+
+
+def test_last_viewer_stops_thread_and_next_viewer_restarts_it():
+    broadcaster, capture, _ = _broadcaster()
+    stream = broadcaster.stream()
+    next(stream)
+    assert broadcaster.running
+
+    stream.close()
+    assert broadcaster.viewers == 0
+    assert _wait(lambda: not broadcaster.running)
+    encoded = broadcaster.frames_encoded
+    time.sleep(0.05)
+    assert broadcaster.frames_encoded == encoded
+
+    # viewer mới -> thread encode mới
+    stream = broadcaster.stream()
+    assert next(stream) is not None and broadcaster.running
+    stream.close()
+
+
+def test_new_viewer_gets_current_packet_immediately():
+    broadcaster, _, _ = _broadcaster()
+    first = broadcaster.stream()
+    next(first)
+    late = broadcaster.stream()
+    t0 = time.monotonic()
+    packet = next(late)
+    assert packet.startswith(b"--frame") and time.monotonic() - t0 < 0.05
+    first.close()
+    late.close()
+
+
+def test_slow_viewer_skips_frames_without_holding_back_others():
+    broadcaster, _, rendered = _broadcaster()
+    fast, slow = broadcaster.stream(), broadcaster.stream()
+    next(fast)
+    next(slow)
+
+    got = []
+
+    def consume():
+        for _ in range(20):
+            got.append(next(fast))
+
+    t = threading.Thread(target=consume)
+    t.start()
+    t.join(2.0)
+    assert len(got) == 20
+
+    # viewer chậm không có hàng đợi: lần đọc sau nhận luôn gói mới nhất
+    latest = next(slow)
+    assert latest in (mjpeg_part(b"%d" % s) for s in rendered[-3:])
+    fast.close()
+    slow.close()
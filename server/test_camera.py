@@ -0,0 +1,114 @@
+# test_camera.py - Test thread capture duy nhất + ring buffer frame dùng chung
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from app.streaming import camera
+from app.streaming.camera import CaptureWorker, FrameRing
+
+
+class _FakeCap:
+    """Nguồn giả: frame thứ n có mọi pixel = n, đếm số lần release."""
+
+    passthrough = False
+    ended = False
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.count = 0
+        self.released = 0
+
+    def read_frame(self):
+        time.sleep(0.005)
+        if self.fail:
+            return False, None, None
+        self.count += 1
+        return True, np.full((4, 4, 3), self.count % 256, np.uint8), None
+
+    def release(self):
+        self.released += 1
+
+
+@pytest.fixture
+def caps(monkeypatch):
+    opened = []
+
+    def open_source(source):
+        cap = _FakeCap(fail=source == "broken")
+        opened.append(cap)
+        return cap
+
+    monkeypatch.setattr(camera, "open_source", open_source)
+    return opened
+
+
+def test_ring_keeps_only_latest_frames():
+    ring = FrameRing(3)
+    for i in range(5):
+        ring.push(np.full((2, 2, 3), i, np.uint8), ts=float(i))
+    frames = ring.snapshot()
+    assert [f.seq for f in frames] == [3, 4, 5]
+    assert ring.latest().seq == 5 and int(ring.latest().image[0, 0, 0]) == 4
+
+    # seq không quay lại sau clear: reader đang chờ không nhận nhầm frame cũ
+    ring.clear()
+    assert ring.latest() is None
+    assert ring.push(None, jpeg=b"x").seq == 6
+
+
+def test_wait_newer_times_out_then_wakes_on_push():
+    ring = FrameRing(2)
+    assert ring.wait_newer(0, timeout=0.01) is None
+
+    threading.Timer(0.02, lambda: ring.push(np.zeros((2, 2, 3), np.uint8))).start()
+    frame = ring.wait_newer(0, timeout=1.0)
+    assert frame is not None and frame.seq == 1
+
+
+def test_readers_share_one_capture(caps):
+    worker = CaptureWorker("fake", ring_size=4, idle_timeout=5.0)
+    seen = [[] for _ in range(3)]
+
+    def read(out):
+        for frame in worker.frames(timeout=1.0):
+            out.append(frame.seq)
+            if len(out) == 5:
+                return
+
+    threads = [threading.Thread(target=read, args=(out,)) for out in seen]
+    try:
+        for t in threads:
+            t.start()
+        snap = worker.latest_frame(timeout=1.0)
+        for t in threads:
+            t.join(2.0)
+        # 1 nguồn duy nhất dù có 4 người đọc; seq của mỗi reader tăng dần
+        assert len(caps) == 1
+        assert snap.seq >= 1
+        for out in seen:
+            assert len(out) == 5 and out == sorted(set(out))
+    finally:
+        worker.stop()
+
+
+def test_idle_capture_releases_source_and_reopens_on_read(caps):
+    worker = CaptureWorker("fake", idle_timeout=0.05)
+    worker.latest_frame(timeout=1.0)
+    time.sleep(0.3)
+    assert not worker.running
+    assert caps[0].released == 1
+
+    # đọc lại -> mở camera lần nữa
+    assert worker.latest_frame(timeout=1.0) is not None
+    assert len(caps) == 2
+    worker.stop()
+
+
+def test_read_failures_stop_capture_with_error(caps, monkeypatch):
+    monkeypatch.setattr(camera.config, "CAMERA_MAX_READ_FAILURES", 3)
+    worker = CaptureWorker("broken", idle_timeout=5.0)
+    with pytest.raises(RuntimeError, match="Không đọc được frame"):
+        worker.latest_frame(timeout=0.5)
+    assert not worker.running and caps[0].released == 1
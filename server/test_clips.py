@@ -0,0 +1,139 @@
+# test_clips.py - Test pre-roll JPEG của camera + ghi / đọc clip lượt vào ra
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.streaming import camera, clips
+from app.streaming.camera import CaptureWorker, Frame, PrerollRing
+from app.streaming.clips import ClipJob, ClipWriter
+
+
+def _frame(seq, ts):
+    return Frame(seq, ts, jpeg=b"\xff\xd8" + bytes([seq]) + b"\xff\xd9")
+
+
+def test_preroll_keeps_recent_frames_at_clip_fps():
+    ring = PrerollRing(seconds=1.0, fps=4)
+    for i in range(40):  # 20 fps trong 2 giây
+        ring.offer(_frame(i + 1, 100.0 + i * 0.05))
+
+    frames = ring.between(0, 1000)
+    assert len(frames) == ring.stats()["capacity"] == 5
+    assert [round(ts, 2) for ts, _ in frames] == [100.75, 101.0, 101.25, 101.5, 101.75]
+    assert [ts for ts, _ in ring.between(101.3, 101.8)] == [frames[3][0], frames[4][0]]
+
+
+def test_preroll_encodes_raw_frames():
+    ring = PrerollRing(seconds=1.0, fps=1, quality=50)
+    ring.offer(Frame(1, 5.0, image=np.zeros((8, 8, 3), np.uint8)))
+    assert ring.between(0, 10)[0][1][:2] == b"\xff\xd8"
+
+
+def test_write_clip_and_read_frames(tmp_path, monkeypatch):
+    ring = PrerollRing(seconds=3.0, fps=10)
+    for i in range(30):
+        ring.offer(_frame(i + 1, 10.0 + i * 0.1))
+    monkeypatch.setattr(clips, "get_pipeline", lambda _: SimpleNamespace(capture=SimpleNamespace(preroll=ring)))
+    writer = ClipWriter(tmp_path, preroll_sec=1.0, postroll_sec=0.5)
+    monkeypatch.setattr(clips, "clip_writer", writer)
+
+    path = writer.write(ClipJob(log_id=7, event="entry", camera_id="lane 1", ts=12.0, wall=0.0))
+    assert path == tmp_path / "7" / "entry-lane_1.mjpeg"
+
+    [meta] = clips.list_clips(7)
+    assert meta["frame_count"] == 16  # 11.0 .. 12.5
+    assert meta["bytes"] == path.stat().st_size
+    assert clips.clip_frame(7, "entry-lane_1", 0) == _frame(11, 0).jpeg
+    assert clips.clip_frame(7, "entry-lane_1", 16) is None
+    assert clips.clip_frame(7, "../7/entry-lane_1", 0) is None
+
+    # camera chưa có frame nào quanh thời điểm đó -> không ghi clip
+    assert writer.write(ClipJob(log_id=8, event="exit", camera_id="lane 1", ts=99.0, wall=0.0)) is None
+    assert writer.stats()["empty"] == 1
+
+
+class _FakeCap:
+    passthrough = False
+    ended = False
+
+    def read_frame(self):
+        time.sleep(0.005)
+        return True, np.zeros((8, 8, 3), np.uint8), None
+
+    def release(self):
+        pass
+
+
+def test_keep_alive_capture_ignores_idle_timeout(monkeypatch):
+    monkeypatch.setattr(camera, "open_source", lambda _: _FakeCap())
+    idle = CaptureWorker("fake", idle_timeout=0.05)
+    kept = CaptureWorker("fake", idle_timeout=0.05, preroll=PrerollRing(1.0, 10), keep_alive=True)
+    idle.start()
+    kept.start()
+    time.sleep(0.3)
+    try:
+        # không ai đọc: camera thường tự tắt, camera giữ clip vẫn chạy và có pre-roll
+        assert not idle.running
+        assert kept.running
+        assert kept.preroll.stats()["frames"] > 0
+    finally:
+        kept.stop()
+
+
+class _FlakyCap(_FakeCap):
+    """Đọc được vài frame rồi mất camera."""
+
+    def __init__(self, frames):
+        self.frames = frames
+
+    def read_frame(self):
+        if self.frames <= 0:
+            return False, None, None
+        self.frames -= 1
+        return super().read_frame()
+
+
+def test_keep_alive_capture_reopens_after_errors_with_backoff(monkeypatch):
+    monkeypatch.setattr(camera.config, "CAMERA_MAX_READ_FAILURES", 2)
+    opened = []
+
+    def open_source(_):
+        opened.append(time.monotonic())
+        if len(opened) == 2:
+            # lần mở lại đầu tiên cũng lỗi -> chờ gấp đôi rồi thử tiếp
+            raise RuntimeError("Không mở được camera")
+        return _FlakyCap(frames=3)
+
+    monkeypatch.setattr(camera, "open_source", open_source)
+    worker = CaptureWorker("fake", keep_alive=True, restart_delay=0.05, max_restart_delay=1.0)
+    worker.start()
+    try:
+        deadline = time.monotonic() + 2.0
+        while len(opened) < 4 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(opened) >= 4 and worker.restarts >= 2
+        # 0.05 s -> 0.1 s sau lần mở lỗi; đọc được frame thì lại bắt đầu từ 0.05 s
+        assert opened[2] - opened[1] >= 0.1
+        assert opened[3] - opened[2] < 0.1 + 0.05
+    finally:
+        worker.stop()
+    # đã stop: không mở lại nữa
+    count = len(opened)
+    time.sleep(0.2)
+    assert len(opened) == count
+
+
+def test_request_clips_reports_cameras_not_running(tmp_path, monkeypatch):
+    monkeypatch.setattr(clips.config, "CLIP_ENABLED", True)
+    monkeypatch.setattr(clips, "clip_cameras", lambda *a, **k: ["lane-1", "lane-2"])
+    running = {"lane-1": True, "lane-2": False}
+    monkeypatch.setattr(
+        clips, "get_pipeline", lambda cid: SimpleNamespace(capture=SimpleNamespace(running=running[cid], preroll=None))
+    )
+    writer = ClipWriter(tmp_path, preroll_sec=1.0, postroll_sec=0.0)
+    monkeypatch.setattr(clips, "clip_writer", writer)
+
+    result = clips.request_clips(3, "entry")
+    assert result == {"clips": ["entry-lane-1"], "skipped": ["lane-2"]}
+    assert writer.stats()["skipped"] == 1
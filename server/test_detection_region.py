@@ -0,0 +1,23 @@
+# test_detection_region.py - Test cắt ROI / thu nhỏ trước YOLO và đổi box về frame gốc
+import numpy as np
+
+from app.streaming.recognition import detection_region
+
+
+def test_full_frame_is_untouched():
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    region = detection_region(frame, roi=None, max_side=640)
+    assert region.image.shape == frame.shape
+    assert region.to_frame((10, 20, 110, 60)) == (10, 20, 110, 60)
+
+
+def test_roi_and_downscale_map_back_to_frame():
+    frame = np.zeros((1080, 1920, 3), dtype=np.uint8)
+    # nửa dưới, giữa frame: 960x540 -> thu nhỏ còn 640x360
+    region = detection_region(frame, roi=(0.25, 0.5, 0.5, 0.5), max_side=640)
+    assert region.image.shape[:2] == (360, 640)
+    assert region.offset == (480, 540)
+
+    assert region.to_frame((100, 50, 200, 100)) == (630, 615, 780, 690)
+    # box tràn ra ngoài bị kẹp trong frame
+    assert region.to_frame((600, 300, 700, 400)) == (1380, 990, 1530, 1080)
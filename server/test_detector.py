@@ -0,0 +1,81 @@
+# test_detector.py - Test nhịp nhận diện tách khỏi nhịp livestream (mỗi N frame, giữ kết quả cũ)
+import threading
+import time
+
+import numpy as np
+
+from app.streaming.camera import Frame
+from app.streaming.detector import CadencedDetector
+from app.streaming.recognition import PlateDetection
+
+
+def _frame(seq):
+    return Frame(seq, time.monotonic(), image=np.zeros((36, 64, 3), np.uint8))
+
+
+def _detect(calls):
+    def detect(frame):
+        calls.append(frame.seq)
+        return [PlateDetection(box=(1, 2, 3, 4), score=0.8, text=f"30A{frame.seq:05d}", confidence=0.9)]
+
+    return detect
+
+
+def test_model_runs_every_n_frames_and_serves_cached_result_between():
+    calls = []
+    detector = CadencedDetector(_detect(calls), every_n_frames=3)
+
+    submitted, last_ts = [], 0.0
+    for seq in range(1, 10):
+        if detector.submit(_frame(seq)):
+            submitted.append(seq)
+            last_ts = detector.wait_result(last_ts, 1.0).ts
+        else:
+            # frame giữa 2 lượt: preview vẽ lại kết quả gần nhất
+            cached = detector.latest()
+            assert cached is None or cached.frame_seq == submitted[-1]
+
+    assert submitted == [3, 6, 9] and calls == [3, 6, 9]
+    result = detector.latest()
+    assert result.frame_seq == 9 and result.plate_text == "30A00009" and result.size == (64, 36)
+
+    stats = detector.stats()
+    assert (stats["frames_seen"], stats["frames_submitted"], stats["inferences"]) == (9, 3, 3)
+
+
+def test_busy_detector_runs_newest_pending_frame():
+    calls, started, release = [], threading.Event(), threading.Event()
+    detect = _detect(calls)
+
+    def slow(frame):
+        started.set()
+        release.wait(1.0)
+        return detect(frame)
+
+    detector = CadencedDetector(slow)
+    detector.submit(_frame(1))
+    started.wait(1.0)
+    # model đang bận: frame 2 bị frame 3 thay, không xếp hàng
+    detector.submit(_frame(2))
+    detector.submit(_frame(3))
+    release.set()
+
+    deadline = time.monotonic() + 1.0
+    while len(calls) < 2 and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert calls == [1, 3]
+
+
+def test_min_interval_limits_submissions():
+    calls = []
+    detector = CadencedDetector(_detect(calls), min_interval=10.0)
+    assert detector.submit(_frame(1))
+    assert not any(detector.submit(_frame(seq)) for seq in range(2, 6))
+
+
+def test_stale_result_expires():
+    detector = CadencedDetector(_detect([]), max_age=0.05)
+    detector.submit(_frame(1))
+    assert detector.wait_result(0.0, 1.0) is not None
+    time.sleep(0.1)
+    assert detector.latest() is None
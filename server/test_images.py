@@ -0,0 +1,148 @@
+# test_images.py - Test kho ảnh biển số (lưu theo sha256, ảnh thu nhỏ, chuyển base64 cũ)
+import base64
+import hashlib
+import sqlite3
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app.images import migrate, routes
+from app.images import store as store_module
+from app.images.store import BlobStore
+from app.in_out import crud
+from app.models import Log
+
+
+def _jpeg(width=640, height=360):
+    image = np.full((height, width, 3), 128, np.uint8)
+    return cv2.imencode(".jpg", image)[1].tobytes()
+
+
+def test_store_dedupes_and_serves_thumbnails(tmp_path, monkeypatch):
+    store = BlobStore(tmp_path, thumb_widths=(160,), workers=1)
+    data = _jpeg()
+    key = store.put(data)
+    assert key.endswith(".jpg") and len(key) == 68
+    assert store.path(key) == tmp_path / key[:2] / key[2:4] / key
+    assert store.put_base64("data:image/jpeg;base64," + base64.b64encode(data).decode()) == key
+    assert store.stats()["stored"] == 1 and store.stats()["deduplicated"] == 1
+    assert store.put_base64("không phải ảnh") is None
+
+    thumb = store.thumbnail(key, 160)
+    assert cv2.imread(str(thumb)).shape[:2] == (90, 160)
+
+    monkeypatch.setattr(routes, "image_store", store)
+    app = FastAPI()
+    app.include_router(routes.router)
+    client = TestClient(app)
+    # ảnh biển số cần đăng nhập + quyền trang hóa đơn
+    assert client.get(f"/images/{key}").status_code == 401
+    app.dependency_overrides[routes.router.dependencies[0].dependency] = lambda: True
+
+    r = client.get(f"/images/{key}")
+    assert r.content == data
+    assert r.headers["etag"] == f'"{key[:64]}"'
+    assert r.headers["cache-control"].startswith("private") and "immutable" in r.headers["cache-control"]
+    assert client.get(f"/images/{key}", headers={"If-None-Match": r.headers["etag"]}).status_code == 304
+
+    r = client.get(f"/images/{key}", params={"w": 100})
+    assert r.headers["etag"] == f'"{key[:64]}-w160"' and r.content == thumb.read_bytes()
+    assert client.get("/images/../secret").status_code == 404
+    assert client.get("/images/" + "0" * 64 + ".jpg").status_code == 404
+
+
+def test_backfill_moves_base64_out_of_logs(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    store = BlobStore(tmp_path / "images")
+    monkeypatch.setattr(migrate, "image_store", store)
+
+    data = _jpeg()
+    db = Session()
+    db.add_all([
+        Log(entry_plate_image=base64.b64encode(data).decode(), exit_plate_image=""),
+        Log(entry_plate_image="hỏng"),
+        Log(),
+        Log(exit_plate_image="b'" + base64.b64encode(data).decode() + "'"),
+    ])
+    db.commit()
+    db.close()
+
+    report = migrate.backfill(batch_size=2, session_factory=Session)
+    assert report | {"seconds": 0} == {"rows": 2, "images": 2, "invalid": 1, "batches": 2, "seconds": 0}
+
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            "SELECT entry_image_key, exit_image_key, entry_plate_image, exit_plate_image FROM logs ORDER BY id"
+        )).all()
+    key = store.put(data)
+    assert rows == [(key, None, None, None), (None, None, "hỏng", None), (None, None, None, None), (None, key, None, None)]
+    # chạy lại không còn gì để chuyển
+    assert migrate.backfill(session_factory=Session)["rows"] == 0
+
+
+def test_ensure_columns_upgrades_old_table(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.sqlite'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE logs (id INTEGER PRIMARY KEY, entry_plate_image TEXT)"))
+    assert migrate.ensure_columns(engine) == ["entry_image_key", "exit_image_key"]
+    assert migrate.ensure_columns(engine) == []
+    assert {"entry_image_key", "exit_image_key"} <= {c["name"] for c in inspect(engine).get_columns("logs")}
+
+
+def test_plate_image_is_on_disk_before_key_is_returned(tmp_path, monkeypatch):
+    store = BlobStore(tmp_path, workers=1)
+    monkeypatch.setattr(crud, "image_store", store)
+    data = _jpeg()
+    key = crud.store_plate_image(base64.b64encode(data).decode())
+    assert key == f"{hashlib.sha256(data).hexdigest()}.jpg"
+    assert store.path(key).read_bytes() == data
+    assert crud.store_plate_image(None) is None
+
+    # ảnh hỏng / không ghi được -> request lỗi, log không được commit với key mồ côi
+    with pytest.raises(HTTPException) as e:
+        crud.store_plate_image("không phải ảnh")
+    assert e.value.status_code == 400
+
+    def fail(path, data):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(store_module, "_write_atomic", fail)
+    with pytest.raises(HTTPException) as e:
+        crud.store_plate_image(base64.b64encode(_jpeg(64, 32)).decode())
+    assert e.value.status_code == 500
+
+
+def test_backfill_writes_files_outside_db_transaction(tmp_path, monkeypatch):
+    path = tmp_path / "db.sqlite"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    store = BlobStore(tmp_path / "images")
+    db = Session()
+    db.add_all([Log(entry_plate_image=base64.b64encode(_jpeg(64 + i, 32)).decode()) for i in range(3)])
+    db.commit()
+    db.close()
+
+    writes = []
+
+    def put_base64(value):
+        # request /inout ghi DB đúng lúc backfill đang ghi file: không được chờ lock
+        conn = sqlite3.connect(path, timeout=0)
+        conn.execute("UPDATE logs SET log_type = 'parking'")
+        conn.commit()
+        conn.close()
+        writes.append(value)
+        return store.put_base64(value)
+
+    monkeypatch.setattr(migrate, "image_store", SimpleNamespace(put_base64=put_base64))
+    report = migrate.backfill(batch_size=2, session_factory=Session)
+    assert report["images"] == 3 and len(writes) == 3
@@ -0,0 +1,98 @@
+# test_inference.py - Test dọn job / slot shared memory khi process nhận diện treo hoặc chết
+import multiprocessing as mp
+import threading
+import time
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+import pytest
+
+from app.streaming.inference import InferencePool, InferenceTimeout
+
+
+class _Frames:
+    def __init__(self):
+        self.released = []
+
+    def release(self, ref):
+        self.released.append(ref)
+
+    def stats(self):
+        return {}
+
+
+class _Queue:
+    def cancel_join_thread(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def _pool(monkeypatch):
+    pool = InferencePool(workers=2, timeout=1.0, shared_frames=_Frames())
+    procs = [SimpleNamespace(alive=True, pid=100 + i, exitcode=None) for i in range(2)]
+    for p in procs:
+        p.is_alive = lambda p=p: p.alive
+    pool._procs, pool._requests, pool._results, pool._running = procs, [_Queue(), _Queue()], [None, None], True
+    monkeypatch.setattr(pool._ctx, "Queue", _Queue)
+    monkeypatch.setattr(pool, "_spawn", lambda i: SimpleNamespace(pid=200 + i, exitcode=None, is_alive=lambda: True))
+    return pool
+
+
+def test_stalled_job_keeps_slot_until_worker_reports(monkeypatch):
+    pool = _pool(monkeypatch)
+    fut = Future()
+    pool._jobs[1] = (fut, time.time() - 5, ["slot-a"], 0)
+
+    pool._check_workers()
+    # người gọi được báo timeout, chỗ trong hàng đợi được trả, slot thì chưa
+    with pytest.raises(InferenceTimeout):
+        fut.result(0)
+    assert 1 not in pool._jobs and pool.shared_frames.released == []
+    assert pool.stats()["held_slots"] == 1
+
+    # process con đọc xong, báo lại -> mới trả slot
+    pool._handle(1, False, "expired")
+    assert pool.shared_frames.released == ["slot-a"]
+    assert pool.stats()["held_slots"] == 0
+
+
+def test_dead_worker_jobs_fail_and_release_slots(monkeypatch):
+    pool = _pool(monkeypatch)
+    running, stalled, other = Future(), Future(), Future()
+    pool._jobs[1] = (running, time.time() + 5, ["slot-a"], 1)
+    pool._jobs[2] = (other, time.time() + 5, ["slot-b"], 0)
+    pool._held[3] = (["slot-c"], 1)
+
+    pool._procs[1].alive = False
+    pool._check_workers()
+    with pytest.raises(RuntimeError):
+        running.result(0)
+    assert sorted(pool.shared_frames.released) == ["slot-a", "slot-c"]
+    # job của process còn sống không bị đụng tới; process chết được thay
+    assert not other.done() and 2 in pool._jobs
+    assert pool.restarts == 1 and pool._procs[1].pid == 201
+
+
+def test_workers_checked_while_results_keep_arriving(monkeypatch):
+    pool = InferencePool(workers=1)
+    reader, writer = mp.Pipe(duplex=False)
+    pool._results, pool._running = [reader], True
+    checks = []
+    monkeypatch.setattr(pool, "_check_workers", lambda: checks.append(time.monotonic()))
+    monkeypatch.setattr(pool, "check_interval", 0.1)
+
+    def produce():
+        # kết quả về liên tục: queue kết quả không lúc nào trống
+        t0 = time.monotonic()
+        while time.monotonic() - t0 < 0.5:
+            writer.send((None, True, {"pid": 1}))
+            time.sleep(0.005)
+        pool._running = False
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    pool._collect()
+    producer.join()
+    assert len(checks) >= 3
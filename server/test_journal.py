@@ -0,0 +1,83 @@
+# test_journal.py - Test nhật ký nhận diện (segment mmap, xoay vòng, truy vấn)
+import time
+
+from app.streaming.cameras import parse_cameras
+from app.streaming.journal import HEADER, RECORD, RECORD_DTYPE, SNAP, EventJournal, JournalQuery, segment_paths
+from app.streaming.recognition import PlateDetection
+
+
+def _plate(text, track_id=1, box=(10, 20, 110, 60)):
+    return PlateDetection(box=box, score=0.9, text=text, confidence=0.8, track_id=track_id, stable=True)
+
+
+def test_record_layout():
+    assert RECORD.size == RECORD_DTYPE.itemsize == 64
+    assert HEADER.size == 32
+
+
+def test_append_and_query(tmp_path):
+    journal = EventJournal(tmp_path, segment_records=4, max_segments=2)
+    t0 = time.time()
+    assert journal.append("in", [_plate("29-H1 123.45"), PlateDetection(box=(0, 0, 1, 1), score=0.5)], ts=t0) == 1
+    journal.append("out", [_plate("51F-678.90", track_id=7)], source=SNAP, seq=42, ts=t0 + 1)
+
+    events = journal.query(JournalQuery())
+    assert [e["plate_number"] for e in events] == ["51F-678.90", "29-H1 123.45"]
+    assert events[0] | {"ts": 0, "time": ""} == {
+        "ts": 0,
+        "time": "",
+        "camera_id": "out",
+        "plate_number": "51F-678.90",
+        "confidence": 0.8,
+        "score": 0.9,
+        "track_id": 7,
+        "frame_seq": 42,
+        "box": [10, 20, 110, 60],
+        "source": "snap",
+        "stable": True,
+    }
+    assert [e["camera_id"] for e in journal.query(JournalQuery(plate="29h112345"))] == ["in"]
+    assert journal.query(JournalQuery(camera="in", since=t0 + 0.5)) == []
+    journal.close()
+
+
+def test_rotation_keeps_newest_segments(tmp_path):
+    journal = EventJournal(tmp_path, segment_records=2, max_segments=2)
+    for i in range(7):
+        journal.append("in", [_plate(f"30A{i:05d}", track_id=i + 1)], ts=1000.0 + i)
+        time.sleep(0.002)  # tên segment theo ms
+
+    assert len(segment_paths(tmp_path)) == 2
+    events = journal.query(JournalQuery(limit=3))
+    assert [e["track_id"] for e in events] == [7, 6, 5]
+    assert journal.stats()["records"] == 3
+    journal.close()
+
+
+def test_long_ids_and_plates_are_rejected_not_truncated(tmp_path):
+    # 2 id chung 12 byte đầu: cắt ra thì gộp làm 1 camera trong nhật ký
+    assert [c.id for c in parse_cameras(
+        '[{"id": "gate-entry-01", "source": "0"}, {"id": "gate-entry-02", "source": "1"}, {"id": "gate-in-01", "source": "2"}]'
+    )] == ["gate-in-01"]
+
+    journal = EventJournal(tmp_path)
+    t0 = time.time()
+    assert journal.append("gate-entry-01", [_plate("30A12345")], ts=t0) == 0
+    assert journal.append("gate-in-01", [_plate("30A12345"), _plate("X" * 17)], ts=t0) == 1
+    assert journal.stats()["rejected"] == 2
+    assert journal.query(JournalQuery(camera="gate-in-01"))[0]["plate_number"] == "30A12345"
+    # id dài không khớp nhầm camera có cùng 12 byte đầu
+    assert journal.query(JournalQuery(camera="gate-in-01-extra")) == []
+    journal.close()
+
+
+def test_only_fresh_reads_are_journaled(tmp_path):
+    journal = EventJournal(tmp_path)
+    fresh = _plate("30A12345")
+    # track đã chốt, lần nhận diện này không OCR lại (xe đứng chờ) -> không ghi trùng
+    idle = PlateDetection(box=(10, 20, 110, 60), score=0.9, text="30A12345", track_id=1, stable=True, fresh=False)
+    assert journal.append("in", [fresh], ts=1.0) == 1
+    for i in range(5):
+        assert journal.append("in", [idle], ts=2.0 + i) == 0
+    assert journal.stats()["records"] == 1
+    journal.close()
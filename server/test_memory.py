@@ -0,0 +1,47 @@
+# test_memory.py - Test báo cáo RAM riêng / dùng chung từng process (MODEL_PRELOAD)
+import os
+
+from app.streaming import memory
+from app.streaming.memory import memory_report, parent_pid, parse_smaps, sibling_workers
+
+SMAPS = """\
+00400000-00452000 r-xp 00000000 08:02 173521      /usr/bin/python3
+Rss:                 100 kB
+Pss:                  60 kB
+Shared_Clean:         80 kB
+Private_Clean:        20 kB
+7f0000000000-7f0000100000 rw-p 00000000 00:00 0
+Rss:                 200 kB
+Pss:                 200 kB
+Private_Dirty:       200 kB
+"""
+
+
+def test_parse_smaps_sums_every_mapping():
+    kb = parse_smaps(SMAPS)
+    assert kb["Rss"] == 300
+    assert kb["Pss"] == 260
+    assert kb["Shared_Clean"] + kb["Shared_Dirty"] == 80
+    assert kb["Private_Clean"] + kb["Private_Dirty"] == 220
+
+
+def test_report_for_current_process():
+    assert parent_pid(os.getpid()) == os.getppid()
+
+    report = memory_report({"api": [os.getpid()], "gone": [2 ** 22 + 1]})
+    # process không còn -> bỏ qua
+    assert [p["role"] for p in report["processes"]] == ["api"]
+    me = report["processes"][0]
+    assert me["rss_mb"] > 0
+    assert abs(me["unique_mb"] + me["shared_mb"] - me["rss_mb"]) <= 0.2
+    assert report["total"]["shared_saving_mb"] == round(me["rss_mb"] - me["pss_mb"], 1)
+
+
+def test_sibling_workers_without_proc(monkeypatch):
+    def listdir(path):
+        raise FileNotFoundError(path)
+
+    # cmdline đọc được nhưng không liệt kê được /proc (sandbox) -> không có worker nào, không lỗi
+    monkeypatch.setattr(memory.os, "listdir", listdir)
+    monkeypatch.setattr(memory, "_read", lambda path: b"python\0-m\0uvicorn")
+    assert sibling_workers(os.getpid()) == []
@@ -0,0 +1,87 @@
+# test_motion.py - Test motion gate: làn xe đứng yên thì bỏ qua model, có xe thì cho chạy
+import numpy as np
+import pytest
+
+from app.streaming import motion
+from app.streaming.motion import MotionGate
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(motion.time, "monotonic", clock.monotonic)
+    return clock
+
+
+def _still():
+    return np.full((120, 160, 3), 90, np.uint8)
+
+
+def _car(x1=40, x2=120):
+    image = _still()
+    image[30:90, x1:x2] = 230
+    return image
+
+
+def test_still_lane_is_gated_after_hold(clock):
+    gate = MotionGate(hold_sec=1.0, max_skip_sec=0)
+    # frame đầu chưa có nền -> cho chạy
+    assert gate.check(_still())
+    clock.now += 0.5
+    assert gate.check(_still())  # còn trong hold_sec
+    clock.now += 1.0
+    assert not gate.check(_still())
+    assert not gate.check(_still())
+
+    stats = gate.stats()
+    assert (stats["frames_checked"], stats["frames_passed"], stats["frames_gated"]) == (4, 2, 2)
+    assert stats["gated_ratio"] == 0.5 and stats["last_changed_ratio"] == 0.0
+
+
+def test_change_inside_roi_runs_model(clock):
+    gate = MotionGate(hold_sec=0.0, max_skip_sec=0)
+    gate.check(_still())
+    clock.now += 1.0
+    assert not gate.check(_still())
+    clock.now += 1.0
+    assert gate.check(_car())
+    assert gate.last_changed_ratio > 0.2
+
+
+def test_change_outside_roi_is_ignored(clock):
+    # ROI nửa trái, xe xuất hiện ở nửa phải
+    gate = MotionGate(roi=(0.0, 0.0, 0.5, 1.0), hold_sec=0.0, max_skip_sec=0)
+    gate.check(_still())
+    clock.now += 1.0
+    assert not gate.check(_car(x1=100, x2=160))
+    clock.now += 1.0
+    assert gate.check(_car(x1=0, x2=60))
+
+
+def test_max_skip_forces_a_run(clock):
+    gate = MotionGate(hold_sec=0.0, max_skip_sec=5.0)
+    gate.check(_still())
+    clock.now += 1.0
+    assert not gate.check(_still())
+    clock.now += 4.5
+    # quá max_skip_sec không chạy model -> chạy 1 lần dù không có chuyển động
+    assert gate.check(_still())
+    clock.now += 1.0
+    assert not gate.check(_still())
+
+
+def test_reset_treats_next_frame_as_motion(clock):
+    gate = MotionGate(hold_sec=0.0, max_skip_sec=0)
+    gate.check(_still())
+    clock.now += 1.0
+    assert not gate.check(_still())
+    gate.reset()
+    assert gate.check(_still())
@@ -0,0 +1,42 @@
+# test_ocr_cache.py - Test cache kết quả OCR theo perceptual hash
+import cv2
+import numpy as np
+
+from app.streaming.ocr import PlateRead
+from app.streaming.ocr_cache import OcrCache, plate_hash
+
+
+def make_plate(text: str) -> np.ndarray:
+    img = np.full((60, 200, 3), 220, np.uint8)
+    cv2.putText(img, text, (5, 42), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2)
+    return img
+
+
+def test_hash_tolerates_noise_but_not_other_plate():
+    a = make_plate("29H1 12345")
+    rng = np.random.default_rng(0)
+    noisy = np.clip(a.astype(int) + rng.integers(-8, 9, a.shape), 0, 255).astype(np.uint8)
+    other = make_plate("51L4 56789")
+
+    assert (plate_hash(a) ^ plate_hash(noisy)).bit_count() <= 12
+    assert (plate_hash(a) ^ plate_hash(other)).bit_count() > 40
+
+
+def test_cache_hit_miss_lru_and_ttl():
+    cache = OcrCache(max_size=2, ttl_sec=30, max_distance=2)
+    read = PlateRead("29H1-12345", 0.9, ("29H1", "12345"))
+
+    assert cache.get(0b1010) is None
+    cache.put(0b1010, read)
+    assert cache.get(0b1010) is read
+    # lệch 1 bit vẫn trúng
+    assert cache.get(0b1011) is read
+
+    cache.put(0b1 << 100, read)
+    cache.put(0b1 << 200, read)
+    assert cache.stats()["evictions"] == 1
+    assert cache.get(0b1010) is None
+
+    cache.ttl_sec = -1
+    assert cache.get(0b1 << 200) is None
+    assert cache.stats()["size"] == 0
@@ -0,0 +1,63 @@
+# test_ocr_recognize.py - Test xử lý ảnh của OCR chỉ-recognizer (bỏ viền crop, tách biển 2 dòng)
+import numpy as np
+import pytest
+
+from app.streaming import ocr
+
+
+@pytest.fixture(autouse=True)
+def _config(monkeypatch):
+    monkeypatch.setattr(ocr.config, "OCR_CROP_MARGIN", 0.05)
+    monkeypatch.setattr(ocr.config, "OCR_TWO_LINE_MAX_ASPECT", 2.0)
+
+
+def _plate(h, w, lines, dark_text=True):
+    """Biển giả: mỗi dòng chữ (y1, y2 theo tỉ lệ chiều cao) là các nét dọc cách đều."""
+    bg, ink = (230, 20) if dark_text else (20, 230)
+    plate = np.full((h, w), bg, np.uint8)
+    for y1, y2 in lines:
+        for x in range(w // 10, w - w // 10, 12):
+            plate[int(y1 * h):int(y2 * h), x:x + 5] = ink
+    return plate
+
+
+def test_normalize_crop_grays_and_trims_margin():
+    crop = np.zeros((100, 200, 3), np.uint8)
+    crop[:, :, 2] = 255  # đỏ
+    gray = ocr.normalize_crop(crop)
+    # bỏ 5% mỗi mép
+    assert gray.ndim == 2 and gray.shape == (90, 180)
+    assert int(gray[0, 0]) == 76  # BGR -> xám theo trọng số của OpenCV
+
+
+def test_normalize_crop_keeps_tiny_crops_whole(monkeypatch):
+    monkeypatch.setattr(ocr.config, "OCR_CROP_MARGIN", 0.3)
+    # bỏ viền thì chỉ còn 4 hàng -> giữ nguyên crop
+    gray = np.zeros((10, 40), np.uint8)
+    assert ocr.normalize_crop(gray) is gray
+
+
+def test_long_plate_is_read_as_one_line():
+    plate = _plate(40, 200, [(0.2, 0.8)])
+    assert ocr.split_two_line(plate) == [(0, 40)]
+
+
+def test_square_plate_is_cut_in_the_gap_between_lines():
+    plate = _plate(100, 120, [(0.1, 0.4), (0.55, 0.9)])
+    (top, bottom) = ocr.split_two_line(plate)
+    assert top[0] == 0 and bottom[1] == 100 and top[1] == bottom[0]
+    # điểm cắt nằm trong khe trống giữa 2 dòng chữ
+    assert 40 <= top[1] < 55
+
+
+def test_split_works_for_light_text_on_dark_plate():
+    plate = _plate(100, 120, [(0.1, 0.45), (0.6, 0.9)], dark_text=False)
+    _, bottom = ocr.split_two_line(plate)
+    assert 45 <= bottom[0] < 60
+
+
+def test_lines_are_resized_to_recognizer_height():
+    line = np.zeros((20, 100), np.uint8)
+    assert ocr._resize_line(line).shape == (ocr.RECOGNIZER_HEIGHT, 320)
+    # dòng rất hẹp không bị bóp dưới 1 ô vuông
+    assert ocr._resize_line(np.zeros((40, 10), np.uint8)).shape == (ocr.RECOGNIZER_HEIGHT, ocr.RECOGNIZER_HEIGHT)
@@ -0,0 +1,69 @@
+# test_onnx_detector.py - Test letterbox + đổi box ONNX về toạ độ frame gốc + NMS (không cần onnxruntime)
+import numpy as np
+import pytest
+
+from app.streaming.onnx_detector import OnnxPlateDetector, letterbox
+
+
+def _detector(imgsz=640, conf=0.3, iou=0.7):
+    # bỏ qua __init__: không mở session ONNX, chỉ dùng tiền / hậu xử lý
+    detector = OnnxPlateDetector.__new__(OnnxPlateDetector)
+    detector.imgsz, detector.conf, detector.iou = imgsz, conf, iou
+    return detector
+
+
+def _output(rows):
+    """rows [(cx, cy, w, h, score)] trên ảnh letterbox -> output YOLOv8 1 lớp (1, 5, số anchor)."""
+    return np.array(rows, dtype=np.float32).T[None]
+
+
+def _to_letterbox(box, ratio, pad):
+    x1, y1, x2, y2 = box
+    return ((x1 + x2) / 2 * ratio + pad[0], (y1 + y2) / 2 * ratio + pad[1], (x2 - x1) * ratio, (y2 - y1) * ratio)
+
+
+def test_letterbox_keeps_aspect_and_centers():
+    frame = np.zeros((720, 1280, 3), np.uint8)
+    image, ratio, pad = letterbox(frame, 640)
+    assert image.shape == (640, 640, 3)
+    assert ratio == 0.5 and pad == (0, 140)
+    # viền xám 114 trên / dưới, ảnh ở giữa
+    assert image[0, 0, 0] == 114 and image[639, 0, 0] == 114 and image[320, 320, 0] == 0
+
+
+def test_boxes_map_back_to_original_frame():
+    frame = np.zeros((720, 1280, 3), np.uint8)
+    detector = _detector()
+    blob, ratio, pad = detector.preprocess(frame)
+    assert blob.shape == (1, 3, 640, 640) and blob.dtype == np.float32
+
+    plate, other = (100, 200, 300, 260), (900, 500, 1100, 580)
+    output = _output([
+        (*_to_letterbox(plate, ratio, pad), 0.9),
+        (*_to_letterbox(other, ratio, pad), 0.6),
+    ])
+    located = detector.postprocess(output, ratio, pad, frame.shape[:2])
+    # điểm cao trước, toạ độ đúng trên frame 1280x720
+    assert [box for box, _ in located] == [plate, other]
+    assert [round(score, 2) for _, score in located] == [0.9, 0.6]
+
+
+def test_nms_drops_overlaps_and_low_scores():
+    detector = _detector()
+    ratio, pad = 1.0, (0, 0)
+    output = _output([
+        (100, 100, 80, 40, 0.9),
+        (102, 101, 80, 40, 0.8),  # trùng box trên -> NMS bỏ
+        (400, 400, 80, 40, 0.2),  # dưới ngưỡng conf
+    ])
+    [(box, score)] = detector.postprocess(output, ratio, pad, (640, 640))
+    assert box == (60, 80, 140, 120) and score == pytest.approx(0.9)
+    assert detector.postprocess(_output([(400, 400, 80, 40, 0.1)]), ratio, pad, (640, 640)) == []
+
+
+def test_boxes_are_clipped_to_frame():
+    detector = _detector()
+    output = _output([(10, 10, 60, 40, 0.9), (700, 300, 50, 20, 0.9)])
+    # box thứ 2 nằm hẳn ngoài frame 640 x 480 -> rỗng sau khi kẹp, bị bỏ
+    [(box, score)] = detector.postprocess(output, 1.0, (0, 0), (480, 640))
+    assert box == (0, 0, 40, 30) and score == pytest.approx(0.9)
@@ -0,0 +1,100 @@
+# test_plate_tracker.py - Test ghép track + bỏ phiếu OCR biển số
+from app.streaming.tracker import PlateTracker, iou
+
+
+def test_iou():
+    assert iou((0, 0, 10, 10), (0, 0, 10, 10)) == 1.0
+    assert iou((0, 0, 10, 10), (20, 20, 30, 30)) == 0.0
+    assert round(iou((0, 0, 10, 10), (5, 0, 15, 10)), 3) == 0.333
+
+
+def test_box_keeps_track_id_while_moving():
+    tracker = PlateTracker()
+    first = tracker.update([((100, 100, 200, 150), 0.9)], ts=0.0)[0]
+    # xe nhích lên vài pixel -> vẫn là track cũ
+    moved = tracker.update([((110, 104, 210, 154), 0.9)], ts=0.1)[0]
+    assert moved.id == first.id
+
+    # 2 xe cùng lúc -> xe mới có track mới, xe cũ giữ id
+    tracks = tracker.update([((115, 106, 215, 156), 0.9), ((500, 300, 600, 350), 0.8)], ts=0.2)
+    assert tracks[0].id == first.id
+    assert tracks[1].id != first.id
+
+
+def test_track_dropped_after_misses():
+    tracker = PlateTracker(max_misses=2)
+    first = tracker.update([((0, 0, 50, 20), 0.9)], ts=0.0)[0]
+    for i in range(3):
+        tracker.update([], ts=0.1 * (i + 1))
+    again = tracker.update([((0, 0, 50, 20), 0.9)], ts=1.0)[0]
+    assert again.id != first.id
+
+
+def test_votes_converge_and_stop_ocr():
+    tracker = PlateTracker(min_votes=3, converge_ratio=0.6, max_ocr=8)
+    track = tracker.update([((0, 0, 100, 40), 0.9)], ts=0.0)[0]
+
+    reads = [("29-H1 12345", 0.9), ("29-HI 12345", 0.5), ("29-H1 12345", 0.8), ("29-H1 12345", 0.7)]
+    ocr_calls = 0
+    for i, (text, conf) in enumerate(reads):
+        track = tracker.update([((0, 0, 100, 40), 0.9)], ts=0.1 * i)[0]
+        if tracker.needs_ocr(track):
+            ocr_calls += 1
+            tracker.add_read(track, text, conf)
+
+    assert track.text == "29-H1 12345"
+    assert tracker.is_stable(track)
+    # chốt sau 3 phiếu -> lần thứ 4 không OCR nữa
+    assert ocr_calls == 3
+    assert not tracker.needs_ocr(track)
+
+
+def _converge(tracker, box, text, n=3):
+    for i in range(n):
+        track = tracker.update([(box, 0.9)], ts=0.1 * i)[0]
+        if tracker.needs_ocr(track):
+            track = tracker.add_read(track, text, 0.9)
+    return track
+
+
+def test_snap_reverifies_converged_track_and_splits_new_car():
+    tracker = PlateTracker(min_votes=3, converge_ratio=0.6)
+    box = (100, 100, 200, 150)
+    first = _converge(tracker, box, "30A12345")
+    assert tracker.is_stable(first)
+
+    # xe khác dừng đúng chỗ cũ (trong max_idle_sec) -> ghép vào track đã chốt
+    track = tracker.update([((101, 100, 201, 150), 0.9)], ts=18.0)[0]
+    assert track.id == first.id
+    assert not tracker.needs_ocr(track)
+    # snap vẫn đọc lại 1 lần, chữ khác -> track mới, không còn biển số xe trước
+    assert tracker.needs_ocr(track, verify=True)
+    split = tracker.add_read(track, "51G67890", 0.8, ts=18.0)
+    assert split.id != first.id
+    assert split.text == "51G67890"
+    assert not tracker.is_stable(split)
+    assert [t.id for t in tracker.tracks()] == [split.id]
+    assert tracker.stats()["splits"] == 1
+
+    # cùng xe: đọc lại khớp -> giữ track, vẫn chốt
+    same = PlateTracker(min_votes=3, converge_ratio=0.6)
+    kept = _converge(same, box, "30A12345")
+    assert same.add_read(kept, "30A12345", 0.9) is kept
+    assert same.is_stable(kept)
+
+
+def test_vote_tie_prefers_more_reads_then_latest():
+    tracker = PlateTracker()
+    track = tracker.update([((0, 0, 100, 40), 0.9)], ts=0.0)[0]
+    tracker.add_read(track, "29H112345", 0.5)
+    tracker.add_read(track, "29HI12345", 0.25)
+    tracker.add_read(track, "29HI12345", 0.25)
+    # hoà điểm -> chuỗi đọc ra nhiều lần hơn
+    assert track.text == "29HI12345"
+
+    tracker = PlateTracker()
+    track = tracker.update([((0, 0, 100, 40), 0.9)], ts=0.0)[0]
+    tracker.add_read(track, "29H112345", 0.5)
+    tracker.add_read(track, "29HI12345", 0.5)
+    # hoà cả số lần đọc -> chuỗi đọc gần nhất
+    assert track.text == "29HI12345"
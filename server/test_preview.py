@@ -0,0 +1,50 @@
+# test_preview.py - Test preview passthrough (giữ JPEG gốc của camera) và cấu hình preview theo viewer
+import cv2
+import numpy as np
+
+from app.streaming.camera import Frame
+from app.streaming.jpeg import jpeg_size
+from app.streaming.preview import PreviewProfile, preview_profile, render_passthrough
+from app.streaming.sources import ImageFolderSource
+
+
+def _jpeg(w=640, h=360) -> bytes:
+    image = np.zeros((h, w, 3), dtype=np.uint8)
+    cv2.rectangle(image, (w // 4, h // 4), (w // 2, h // 2), (0, 200, 255), -1)
+    return cv2.imencode(".jpg", image)[1].tobytes()
+
+
+def test_passthrough_sends_camera_bytes_without_decoding():
+    data = _jpeg()
+    frame = Frame(1, 0.0, jpeg=data)
+    assert frame.size == (640, 360) == jpeg_size(data)
+
+    assert render_passthrough(frame, PreviewProfile(mode="passthrough")) is data
+    assert not frame.decoded
+
+
+def test_passthrough_downscale_decodes_reduced():
+    frame = Frame(1, 0.0, jpeg=_jpeg())
+    small = render_passthrough(frame, PreviewProfile(mode="passthrough", width=320, quality=60))
+    image = cv2.imdecode(np.frombuffer(small, np.uint8), cv2.IMREAD_COLOR)
+    assert image.shape[:2] == (180, 320)
+    # giải mã thẳng 1/2 từ JPEG, không giải mã ảnh đủ cỡ
+    assert not frame.decoded
+
+
+def test_profile_rounds_to_shared_presets():
+    assert preview_profile("passthrough", 700, 78) == PreviewProfile("passthrough", 640, 80)
+    assert preview_profile("annotated", None, 500) == PreviewProfile("annotated", None, 95)
+
+
+def test_image_folder_passthrough_keeps_jpeg(tmp_path):
+    data = _jpeg(64, 48)
+    (tmp_path / "0001.jpg").write_bytes(data)
+    source = ImageFolderSource(str(tmp_path), speed=0, loop=False, passthrough=True)
+
+    ok, image, jpeg = source.read_frame()
+    assert ok and image is None and jpeg == data
+    # read() vẫn trả ảnh BGR như nguồn thường
+    source._rewind()
+    ok, image = source.read()
+    assert ok and image.shape == (48, 64, 3)
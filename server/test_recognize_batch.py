@@ -0,0 +1,33 @@
+# test_recognize_batch.py - Test nhận diện nhiều ảnh upload trong 1 lô YOLO + 1 lô OCR
+import numpy as np
+
+from app.streaming import recognition
+from app.streaming.ocr import PlateRead
+
+
+def test_batch_runs_one_detect_and_one_ocr_call(monkeypatch):
+    frames = [np.zeros((100, 200, 3), dtype=np.uint8) for _ in range(3)]
+    boxes = [
+        [((10, 10, 60, 30), 0.9), ((100, 50, 150, 70), 0.8)],
+        [],
+        [((20, 20, 80, 40), 0.7)],
+    ]
+    located_calls, ocr_calls = [], []
+
+    def submit(images):
+        located_calls.append(len(images))
+        return boxes
+
+    def read(crops):
+        ocr_calls.append([c.shape[:2] for c in crops])
+        return [PlateRead(text=f"P{i}", confidence=0.5) for i in range(len(crops))]
+
+    monkeypatch.setattr(recognition.locate_batcher, "submit", submit)
+    monkeypatch.setattr(recognition.ocr_batcher, "read", read)
+
+    results = recognition.detect_plates_batch(frames, max_side=0)
+
+    assert located_calls == [3]
+    assert ocr_calls == [[(20, 50), (20, 50), (20, 60)]]
+    assert [[d.text for d in r] for r in results] == [["P0", "P1"], [], ["P2"]]
+    assert results[2][0].box == (20, 20, 80, 40)
@@ -0,0 +1,72 @@
+# test_shared_frames.py - Test slot shared memory chuyển frame sang process nhận diện
+import numpy as np
+import pytest
+
+from app.streaming import shared_frames
+from app.streaming.inference import InferencePool
+from app.streaming.shared_frames import SharedFramePool, open_frame
+
+
+@pytest.fixture
+def pool():
+    pool = SharedFramePool(slots=2, slot_bytes=64 * 1024, min_bytes=16 * 1024)
+    yield pool
+    pool.close()
+
+
+def _frame(h=100, w=100, value=7):
+    return np.full((h, w, 3), value, np.uint8)
+
+
+def test_put_copies_frame_into_slot_and_release_frees_it(pool):
+    frame = _frame()
+    ref = pool.put(frame)
+    assert ref is not None and ref.shape == frame.shape
+    # process con đọc đúng bytes đã chép
+    np.testing.assert_array_equal(open_frame(ref), frame)
+    assert pool.stats()["free"] == 1
+
+    pool.release(ref)
+    pool.release(ref)  # trả 2 lần không sinh thêm slot
+    assert pool.stats()["free"] == 2 and pool.stats()["frames"] == 1
+
+
+def test_exhausted_or_oversized_frames_fall_back_to_pickle(pool):
+    refs = [pool.put(_frame(value=i)) for i in range(2)]
+    assert all(refs)
+    assert pool.put(_frame()) is None
+    assert pool.put(_frame(200, 200)) is None
+    assert pool.stats()["fallbacks"] == 2
+
+    # hết slot thì chờ được tới khi có job trả slot
+    pool.release(refs[0])
+    assert pool.put(_frame(), timeout=0.1) is not None
+
+
+def test_small_crops_are_pickled_without_taking_a_slot(pool):
+    assert pool.put(_frame(20, 60)) is None
+    stats = pool.stats()
+    assert stats["small"] == 1 and stats["fallbacks"] == 0 and stats["free"] == 2
+
+
+def test_slots_are_capped_by_free_dev_shm(monkeypatch):
+    monkeypatch.setattr(shared_frames, "shm_free_bytes", lambda: 3 * 64 * 1024)
+    pool = SharedFramePool(slots=8, slot_bytes=64 * 1024, min_bytes=0)
+    try:
+        assert pool.put(_frame()) is not None
+        # chỉ dùng nửa /dev/shm còn trống: 1 slot
+        assert pool.stats()["slots"] == 1 and pool.put(_frame()) is None
+    finally:
+        pool.close()
+
+
+def test_share_puts_only_full_frames_in_shared_memory(pool):
+    inference = InferencePool(workers=1, shared_frames=pool)
+    frame, crop = _frame(), _frame(20, 60)
+
+    payload, refs = inference._share([frame, crop])
+    assert len(refs) == 1 and payload[0] == refs[0]
+    assert payload[1] is crop
+
+    payload, refs = inference._share(crop)
+    assert payload is crop and refs == []
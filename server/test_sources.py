@@ -0,0 +1,59 @@
+# test_sources.py - Test nguồn frame phát lại (thư mục ảnh / file video) thay cho webcam
+import time
+
+import cv2
+import numpy as np
+
+from app.streaming.sources import ImageFolderSource, VideoFileSource, open_source
+
+
+def _write_frames(folder, count=3):
+    for i in range(count):
+        cv2.imwrite(str(folder / f"{i:02d}.png"), np.full((8, 8, 3), i * 10, dtype=np.uint8))
+
+
+def test_image_folder_plays_in_order_then_ends(tmp_path):
+    _write_frames(tmp_path)
+    (tmp_path / "labels.csv").write_text("không phải ảnh")
+
+    source = open_source(str(tmp_path), speed=0, loop=False)
+    assert isinstance(source, ImageFolderSource)
+    values = []
+    while True:
+        ok, image = source.read()
+        if not ok:
+            break
+        values.append(int(image[0, 0, 0]))
+    assert values == [0, 10, 20]
+    assert source.ended
+
+
+def test_loop_restarts_from_first_frame(tmp_path):
+    _write_frames(tmp_path, count=2)
+    source = ImageFolderSource(str(tmp_path), speed=0, loop=True)
+    values = [int(source.read()[1][0, 0, 0]) for _ in range(5)]
+    assert values == [0, 10, 0, 10, 0]
+    assert not source.ended
+
+
+def test_native_speed_is_paced(tmp_path):
+    _write_frames(tmp_path, count=4)
+    source = ImageFolderSource(str(tmp_path), fps=50, speed=1, loop=False)
+    t0 = time.monotonic()
+    for _ in range(4):
+        source.read()
+    # 4 frame ở 50 FPS -> ~60 ms sau frame đầu
+    assert time.monotonic() - t0 >= 0.05
+
+
+def test_video_file_source(tmp_path):
+    path = tmp_path / "clip.avi"
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 10, (32, 32))
+    for _ in range(3):
+        writer.write(np.zeros((32, 32, 3), dtype=np.uint8))
+    writer.release()
+
+    source = open_source(str(path), speed=0, loop=False)
+    assert isinstance(source, VideoFileSource)
+    assert sum(source.read()[0] for _ in range(5)) == 3
+    source.release()
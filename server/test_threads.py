@@ -0,0 +1,36 @@
+# test_threads.py - Test chia ngân sách thread / core CPU cho các process nhận diện
+import pytest
+
+from app.streaming import threads
+from app.streaming.threads import affinity_groups, parse_cpu_list, thread_plan
+
+
+def test_parse_cpu_list():
+    assert parse_cpu_list("0-2,5") == (0, 1, 2, 5)
+    assert parse_cpu_list(" 3 ") == (3,)
+    with pytest.raises(ValueError):
+        parse_cpu_list("")
+    with pytest.raises(ValueError):
+        parse_cpu_list("a-b")
+
+
+def test_affinity_groups():
+    cpus = [0, 1, 2, 3, 4]
+    assert affinity_groups("", 2, cpus) == [None, None]
+    assert affinity_groups("auto", 2, cpus) == [(0, 1, 2), (3, 4)]
+    # ít core hơn process -> dùng chung
+    assert affinity_groups("auto", 3, [0, 1]) == [(0,), (1,), (0,)]
+    assert affinity_groups("0-1;2-3", 3, cpus) == [(0, 1), (2, 3), (0, 1)]
+
+
+def test_thread_plan(monkeypatch):
+    monkeypatch.setattr(threads, "available_cpus", lambda: list(range(8)))
+    assert [b.threads for b in thread_plan(3)] == [2, 2, 2]
+    assert [b.threads for b in thread_plan(2, threads=1)] == [1, 1]
+
+    pinned = thread_plan(2, affinity="auto")
+    assert [b.cpus for b in pinned] == [(0, 1, 2, 3), (4, 5, 6, 7)]
+    assert [b.threads for b in pinned] == [4, 4]
+
+    # sai định dạng -> không ghim
+    assert [b.cpus for b in thread_plan(2, affinity="x;y")] == [None, None]
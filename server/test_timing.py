@@ -0,0 +1,52 @@
+# test_timing.py - Test đo thời gian từng bước + histogram cuộn cho /streaming/metrics
+from app.streaming.timing import NO_TIMINGS, RollingHistogram, TimingRegistry
+
+
+def test_rolling_histogram_keeps_last_window():
+    hist = RollingHistogram(window=4)
+    for ms in (1000, 1, 3, 8, 40):
+        hist.add(ms)
+
+    summary = hist.summary()
+    # mẫu 1000 ms đã trượt khỏi cửa sổ, nhưng vẫn tính vào tổng số mẫu
+    assert summary["count"] == 5 and summary["window"] == 4
+    assert summary["max_ms"] == 40
+    assert summary["p50_ms"] == 8
+    assert summary["buckets"]["1"] == 1
+    assert summary["buckets"]["5"] == 2
+    assert summary["buckets"]["50"] == 4
+    assert summary["buckets"]["+Inf"] == 4
+
+
+def test_stages_are_recorded_per_flow_and_camera():
+    registry = TimingRegistry(enabled=True, window=8)
+    for _ in range(2):
+        timings = registry.start("snap", "in")
+        with timings.stage("detect"):
+            pass
+        with timings.stage("ocr"):
+            pass
+        with timings.stage("ocr"):
+            pass
+        timings.finish()
+
+    assert set(timings.as_dict()) == {"detect", "ocr", "total"}
+    snap = registry.snapshot()["flows"]["snap"]["in"]
+    assert set(snap) == {"detect", "ocr", "total"}
+    assert snap["total"]["count"] == 2
+
+
+def test_disabled_registry_is_a_no_op_unless_forced():
+    registry = TimingRegistry(enabled=False)
+    assert registry.start("snap", "in") is NO_TIMINGS
+    with NO_TIMINGS.stage("detect"):
+        pass
+    assert NO_TIMINGS.finish() == {} and NO_TIMINGS.as_dict() == {}
+
+    # client xin ?timings=true: vẫn đo cho response nhưng không ghi histogram
+    timings = registry.start("snap", "in", force=True)
+    with timings.stage("read"):
+        pass
+    timings.finish()
+    assert "read" in timings.as_dict()
+    assert registry.snapshot()["flows"] == {}
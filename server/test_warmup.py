@@ -0,0 +1,27 @@
+# test_warmup.py - Test trạng thái sẵn sàng của model nhận diện (/streaming/ready)
+from app.streaming import config, inference, warmup
+
+
+def test_disabled_warmup_reports_ready(monkeypatch):
+    monkeypatch.setattr(config, "MODEL_WARMUP", False)
+    monkeypatch.setattr(inference, "inference_pool", None)
+    monkeypatch.setattr(warmup, "inline_warmup", warmup.InlineWarmup())
+
+    status = warmup.readiness()
+    # không warm-up: model load lúc có request đầu, không được báo 503 mãi
+    assert status["state"] == "disabled"
+    assert status["ready"] is True
+
+
+def test_warming_and_error_are_not_ready(monkeypatch):
+    monkeypatch.setattr(config, "MODEL_WARMUP", True)
+    monkeypatch.setattr(inference, "inference_pool", None)
+    inline = warmup.InlineWarmup()
+    monkeypatch.setattr(warmup, "inline_warmup", inline)
+
+    inline.state = "warming"
+    assert warmup.readiness()["ready"] is False
+    inline.state = "error"
+    assert warmup.readiness()["ready"] is False
+    inline.state = "ready"
+    assert warmup.readiness()["ready"] is True